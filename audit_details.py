@@ -0,0 +1,356 @@
+import functools
+import heapq
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Rows kept per deep-dive table; report_stream keeps the same top rows while streaming.
+TOP_K = 10
+
+# network-requests resourceType -> the resource-summary type it is counted under.
+RESOURCE_TYPES = {
+    'Document': 'document',
+    'Script': 'script',
+    'Stylesheet': 'stylesheet',
+    'Image': 'image',
+    'Font': 'font',
+    'Media': 'media',
+}
+
+# Audit id -> the numeric item field its rows are ranked by, largest first.
+RANKED_ITEMS = {
+    'bootup-time': 'total',
+    'mainthread-work-breakdown': 'duration',
+    'long-tasks': 'duration',
+    'render-blocking-resources': 'wastedMs',
+    'network-requests': 'transferSize',
+    'layout-shifts': 'score',
+    'layout-shift-elements': 'score',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def rank_key(field):
+    """
+    Sort key on item[field]; rows without a number rank last.
+    """
+    def key(item):
+        value = item.get(field) if isinstance(item, dict) else None
+        return value if isinstance(value, (int, float)) else float('-inf')
+    return key
+
+
+def top_items(items, field, k=TOP_K):
+    """
+    The k rows with the largest `field`, largest first. heapq.nlargest keeps a
+    k-sized heap, so long tables are never sorted whole.
+    """
+    return heapq.nlargest(k, items, key=rank_key(field))
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else None
+
+
+def _items(audit):
+    return (audit.get('details') or {}).get('items') or []
+
+
+def _table(audit, field, k, row):
+    """
+    One ranked table: {'score', 'display_value', 'count', 'rows'}.
+    """
+    items = _items(audit)
+    return {
+        'score': audit.get('score'),
+        'display_value': audit.get('displayValue', ''),
+        # Streamed and compact reports keep only the top rows but record the real count
+        'count': (audit.get('details') or {}).get('itemCount', len(items)),
+        'rows': [row(item) for item in top_items(items, field, k)],
+    }
+
+
+def _node(node):
+    node = node or {}
+    return {
+        'label': node.get('nodeLabel') or node.get('selector') or '',
+        'selector': node.get('selector', ''),
+        'snippet': node.get('snippet', ''),
+    }
+
+
+def _chain_path(chains):
+    """
+    The request chain ending last: [(depth, request), ...] from the root down.
+    """
+    best_end = None
+    best_path = []
+    # Iterative DFS; chains can nest deeper than is comfortable to recurse into
+    stack = [(0, child, ()) for child in (chains or {}).values()]
+    while stack:
+        depth, node, path = stack.pop()
+        request = node.get('request') or {}
+        path = path + ((depth, request),)
+        children = node.get('children') or {}
+        if children:
+            stack.extend((depth + 1, child, path) for child in children.values())
+            continue
+        end = _number(request.get('endTime'))
+        if end is not None and (best_end is None or end > best_end):
+            best_end, best_path = end, list(path)
+    return best_path
+
+
+def _critical_chain(audit):
+    details = audit.get('details') or {}
+    longest = details.get('longestChain') or {}
+    path = _chain_path(details.get('chains'))
+    if not path:
+        return None
+    origin = _number(path[0][1].get('startTime')) or 0
+    return {
+        'score': audit.get('score'),
+        'display_value': audit.get('displayValue', ''),
+        'count': len(details.get('chains') or {}),
+        'duration_ms': _number(longest.get('duration')),
+        'length': longest.get('length', len(path)),
+        'transfer_size': _number(longest.get('transferSize')),
+        # Request times in the chain tree are in seconds
+        'rows': [{
+            'url': request.get('url', ''),
+            'depth': depth,
+            'start_ms': ((_number(request.get('startTime')) or origin) - origin) * 1000,
+            'duration_ms': ((_number(request.get('endTime')) or 0) - (_number(request.get('startTime')) or 0)) * 1000,
+            'transfer_size': _number(request.get('transferSize')),
+        } for depth, request in path],
+    }
+
+
+def _lcp_element(audit):
+    """
+    The LCP node and, on Lighthouse 10+, its TTFB / load delay / load time /
+    render delay phases. Older reports have a plain table with just the node.
+    """
+    details = audit.get('details') or {}
+    tables = (details.get('items') or []) if details.get('type') == 'list' else [details]
+    node = None
+    phases = []
+    for table in tables:
+        for item in (table or {}).get('items') or []:
+            if not isinstance(item, dict):
+                continue
+            if node is None and isinstance(item.get('node'), dict):
+                node = _node(item['node'])
+            elif 'phase' in item:
+                phases.append({'phase': item['phase'], 'timing_ms': _number(item.get('timing')),
+                               'percent': item.get('percent', '')})
+    if node is None and not phases:
+        return None
+    return {'score': audit.get('score'), 'display_value': audit.get('displayValue', ''),
+            'node': node or _node(None), 'phases': phases}
+
+
+def _cls_culprit(item):
+    causes = [sub.get('cause', '') for sub in ((item.get('subItems') or {}).get('items') or [])
+              if isinstance(sub, dict) and sub.get('cause')]
+    return {**_node(item.get('node')), 'score': _number(item.get('score')), 'causes': causes}
+
+
+def deep_dive(audits, k=TOP_K):
+    """
+    Top-k rows of the tables behind TBT and LCP, keyed by panel: scripts by
+    CPU time, main-thread work, long tasks, render-blocking resources, the
+    heaviest requests, the critical request chain, the LCP element and the
+    layout-shift culprits. Audits absent from the report are left out.
+    """
+    panels = {}
+    if 'bootup-time' in audits:
+        panels['scripts'] = _table(audits['bootup-time'], 'total', k, lambda item: {
+            'url': item.get('url', ''),
+            'total_ms': _number(item.get('total')),
+            'scripting_ms': _number(item.get('scripting')),
+            'parse_ms': _number(item.get('scriptParseCompile')),
+        })
+    if 'mainthread-work-breakdown' in audits:
+        panels['main_thread'] = _table(audits['mainthread-work-breakdown'], 'duration', k, lambda item: {
+            'label': item.get('groupLabel') or item.get('group', ''),
+            'duration_ms': _number(item.get('duration')),
+        })
+    if 'long-tasks' in audits:
+        table = _table(audits['long-tasks'], 'duration', k, lambda item: {
+            'url': item.get('url', ''),
+            'start_ms': _number(item.get('startTime')),
+            'duration_ms': _number(item.get('duration')),
+        })
+        # The longest tasks, shown in timeline order
+        table['rows'].sort(key=lambda row: row['start_ms'] or 0)
+        panels['long_tasks'] = table
+    if 'render-blocking-resources' in audits:
+        panels['render_blocking'] = _table(audits['render-blocking-resources'], 'wastedMs', k, lambda item: {
+            'url': item.get('url', ''),
+            'transfer_size': _number(item.get('totalBytes')),
+            'wasted_ms': _number(item.get('wastedMs')),
+        })
+    if 'network-requests' in audits:
+        panels['requests'] = _table(audits['network-requests'], 'transferSize', k, lambda item: {
+            'url': item.get('url', ''),
+            'resource_type': item.get('resourceType', ''),
+            'transfer_size': _number(item.get('transferSize')),
+            # networkRequestTime/networkEndTime since Lighthouse 10, startTime/endTime before
+            'start_ms': _number(item.get('networkRequestTime', item.get('startTime'))),
+            'end_ms': _number(item.get('networkEndTime', item.get('endTime'))),
+        })
+    if 'critical-request-chains' in audits:
+        chain = _critical_chain(audits['critical-request-chains'])
+        if chain:
+            panels['critical_chain'] = chain
+    if 'largest-contentful-paint-element' in audits:
+        lcp = _lcp_element(audits['largest-contentful-paint-element'])
+        if lcp:
+            panels['lcp_element'] = lcp
+    # layout-shifts replaced layout-shift-elements in Lighthouse 12
+    for audit_id in ('layout-shifts', 'layout-shift-elements'):
+        if audit_id in audits:
+            panels['layout_shifts'] = _table(audits[audit_id], 'score', k, _cls_culprit)
+            break
+    return panels
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.netloc else ''
+
+
+def _entity_name(value):
+    # A plain name since Lighthouse 10, a {'type': 'link', 'text'} cell before
+    if isinstance(value, dict):
+        value = value.get('text') or value.get('name')
+    return value if isinstance(value, str) and value else None
+
+
+def _third_party_check(entities, summary_audit, page_origin):
+    """
+    is_third_party(origin, entity) for one report. The LHR's `entities` (with
+    their isFirstParty flag and origins) decide first, then the entity names
+    third-party-summary lists; an origin neither knows is third party only
+    when it is not exactly the tested page's origin.
+    """
+    first_party = set()
+    origin_entities = {}
+    for entity in entities if isinstance(entities, list) else ():
+        name = _entity_name(entity.get('name')) if isinstance(entity, dict) else None
+        if not name:
+            continue
+        if entity.get('isFirstParty'):
+            first_party.add(name)
+        for origin in entity.get('origins') or ():
+            if isinstance(origin, str):
+                origin_entities.setdefault(origin, name)
+
+    summary_audit = summary_audit or {}
+    third_parties = set()
+    # A cut-down summary would pass its missing entities off as first party
+    if not first_party and 'itemCount' not in (summary_audit.get('details') or {}):
+        third_parties = {_entity_name(item.get('entity')) for item in _items(summary_audit)
+                         if isinstance(item, dict)} - {None}
+
+    def is_third_party(origin, entity):
+        entity = entity or origin_entities.get(origin)
+        if entity and first_party:
+            return entity not in first_party
+        if entity and third_parties:
+            return entity in third_parties
+        return bool(page_origin) and origin != page_origin
+    return is_third_party
+
+
+class RequestTotals:
+    """
+    Running transfer totals over network-requests rows: bytes and counts per
+    resource type and per origin. report_stream feeds it every row of a table
+    it cuts to the top rows, so budgets still sum every request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.by_type = {}
+        self.by_origin = {}
+        self.document_url = None
+
+    def add(self, item):
+        if not isinstance(item, dict):
+            return
+        self.count += 1
+        size = _number(item.get('transferSize')) or 0
+        entity = _entity_name(item.get('entity'))
+        resource_type = RESOURCE_TYPES.get(item.get('resourceType'), 'other')
+        entry = self.by_type.setdefault(resource_type, {'bytes': 0, 'count': 0})
+        entry['bytes'] += size
+        entry['count'] += 1
+        url = item.get('url', '')
+        origin = _origin(url) if isinstance(url, str) else ''
+        if origin:
+            entry = self.by_origin.setdefault(origin, {'bytes': 0, 'count': 0, 'entity': None})
+            entry['bytes'] += size
+            entry['count'] += 1
+            entry['entity'] = entry['entity'] or entity
+        if self.document_url is None and item.get('resourceType') == 'Document' and isinstance(url, str):
+            self.document_url = url
+
+    def summary(self):
+        """
+        The totals as stored under `details.requestTotals` of a streamed report.
+        """
+        return {'count': self.count, 'byType': self.by_type, 'byOrigin': self.by_origin,
+                'documentUrl': self.document_url}
+
+
+def request_totals(items):
+    totals = RequestTotals()
+    for item in items:
+        totals.add(item)
+    return totals.summary()
+
+
+def resource_usage(audits, page_url='', entities=None):
+    """
+    Transfer bytes and request counts by resource type (resource-summary,
+    else summed over network-requests) and bytes per third-party origin,
+    classified by Lighthouse's entities (the LHR's `entities` list, else
+    each row's `entity` and third-party-summary).
+    A request table cut to its top rows without `requestTotals` beside it
+    cannot be summed: 'complete' is then False, only resource-summary types
+    are given and 'third_party' is None (not measured).
+    """
+    details = (audits.get('network-requests') or {}).get('details') or {}
+    requests = _items({'details': details})
+    totals = details.get('requestTotals')
+    if not isinstance(totals, dict):
+        complete = details.get('itemCount', len(requests)) == len(requests)
+        totals = request_totals(requests) if complete else None
+
+    by_type = {}
+    for item in _items(audits.get('resource-summary') or {}):
+        if isinstance(item, dict) and item.get('resourceType'):
+            by_type[item['resourceType']] = {'bytes': _number(item.get('transferSize')) or 0,
+                                             'count': _number(item.get('requestCount')) or 0}
+    if not by_type and totals and totals['count']:
+        by_type = {key: dict(entry) for key, entry in totals['byType'].items()}
+        by_type['total'] = {'bytes': sum(entry['bytes'] for entry in totals['byType'].values()),
+                            'count': totals['count']}
+
+    third_party = None
+    if totals is not None:
+        # Without entities, first party is the tested page's origin, or the main document's
+        page_origin = _origin(page_url) or _origin(totals.get('documentUrl') or '')
+        is_third_party = _third_party_check(entities, audits.get('third-party-summary'), page_origin)
+        third_party = Counter()
+        for origin, entry in totals['byOrigin'].items():
+            if is_third_party(origin, entry.get('entity')):
+                third_party[origin] = entry['bytes']
+        third_party = dict(third_party.most_common())
+
+    return {
+        'by_type': by_type,
+        'third_party': third_party,
+        'complete': totals is not None,
+    }
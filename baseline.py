@@ -0,0 +1,182 @@
+import json
+import math
+import os
+
+from generate_report import DIAGNOSTIC_PASS_SCORE, UNKNOWN_URL, extract_report_data, load_report
+
+SUMMARY_FORMAT = 'lighthouse-baseline-summary'
+SUMMARY_VERSION = 2
+
+# A change smaller than this fraction of the baseline value is treated as noise.
+MIN_RELATIVE_CHANGE = 0.10
+
+# Absolute noise floors per audit; smaller changes are never flagged.
+ABSOLUTE_FLOORS = {
+    'first-contentful-paint': 100,
+    'largest-contentful-paint': 100,
+    'speed-index': 100,
+    'total-blocking-time': 50,
+    'cumulative-layout-shift': 0.02,
+}
+
+# z-value used when both sides carry multi-run spread.
+Z_95 = 1.96
+
+
+def summarize_for_baseline(report_data):
+    """
+    Reduces extracted report data to the small JSON summary stored as a baseline.
+    """
+    run_stats = report_data.get('run_stats') or {}
+    spread = {m['id']: m['numeric_value'] for m in run_stats.get('metrics', []) if m.get('numeric_value')}
+
+    metrics = {}
+    for metric in report_data['metrics']:
+        entry = {
+            'title': metric['title'],
+            'numeric_value': metric.get('numeric_value'),
+            'numeric_unit': metric.get('numeric_unit'),
+            'score': metric['score'],
+        }
+        stats = spread.get(metric.get('id'))
+        if stats:
+            # Compare on the multi-run median, with its spread, when available
+            entry.update(numeric_value=stats['median'], stddev=stats['stddev'], n=stats['n'])
+        metrics[metric.get('id', metric['title'])] = entry
+
+    diagnostics = {
+        diag.get('id', diag['title']): {
+            'title': diag['title'],
+            'numeric_value': diag.get('numeric_value'),
+            'numeric_unit': diag.get('numeric_unit'),
+            'score': diag['score'],
+        }
+        for diag in report_data['diagnostics']
+    }
+
+    # Every performance audit, passing ones included, so a diagnostic that
+    # starts failing later is known to have passed here (version 2 on)
+    audits = {audit_id: dict(entry) for audit_id, entry in report_data['performance_audits'].items()}
+
+    return {
+        'format': SUMMARY_FORMAT,
+        'version': SUMMARY_VERSION,
+        'page_url': report_data['page_url'],
+        'execution_time': report_data['execution_time'],
+        'scores': report_data['scores'],
+        'metrics': metrics,
+        'diagnostics': diagnostics,
+        'audits': audits,
+    }
+
+
+def load_baseline(path):
+    """
+    Loads a baseline from a stored summary or from a full merged report.
+    """
+    data = load_report(path)
+    if data.get('format') == SUMMARY_FORMAT:
+        return data
+    return summarize_for_baseline(extract_report_data(data))
+
+
+def write_baseline(report_data, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summarize_for_baseline(report_data), f, indent=2)
+
+
+def _compare_entry(audit_id, current, baseline):
+    """
+    Compares one numeric audit. Lighthouse numeric values are all
+    lower-is-better (times, bytes, counts, shift), so a positive delta is worse.
+    """
+    result = {
+        'title': current['title'],
+        'current': current.get('numeric_value'),
+        'baseline': baseline.get('numeric_value') if baseline else None,
+        'in_baseline': baseline is not None,
+        'numeric_unit': current.get('numeric_unit'),
+        'delta': None,
+        'delta_pct': None,
+        'regression': False,
+        'improvement': False,
+        'newly_failing': False,
+    }
+    if result['current'] is None or result['baseline'] is None:
+        return result
+
+    delta = result['current'] - result['baseline']
+    result['delta'] = delta
+    if result['baseline']:
+        result['delta_pct'] = delta / result['baseline'] * 100
+
+    # Noise threshold: relative change, absolute floor and, with multi-run
+    # data on both sides, the standard error of the difference.
+    threshold = max(abs(result['baseline']) * MIN_RELATIVE_CHANGE, ABSOLUTE_FLOORS.get(audit_id, 0))
+    if current.get('stddev') is not None and baseline.get('stddev') is not None:
+        standard_error = math.sqrt(current['stddev'] ** 2 / current.get('n', 1) +
+                                   baseline['stddev'] ** 2 / baseline.get('n', 1))
+        threshold = max(threshold, Z_95 * standard_error)
+
+    result['regression'] = delta > threshold
+    result['improvement'] = -delta > threshold
+    return result
+
+
+def _passed_in_baseline(audit_id, baseline):
+    """
+    True when a diagnostic failing now was passing in the baseline run. A
+    version 1 summary lists only the failing diagnostics, so there an audit
+    missing from them passed; version 2 records every audit's score.
+    """
+    if audit_id in baseline['diagnostics']:
+        return False
+    if 'audits' not in baseline:
+        return True
+    previous = baseline['audits'].get(audit_id)
+    return previous is not None and (previous.get('score') is None or previous['score'] >= DIAGNOSTIC_PASS_SCORE)
+
+
+def _compare_diagnostic(audit_id, current, baseline):
+    entry = _compare_entry(audit_id, current,
+                           baseline['diagnostics'].get(audit_id) or baseline.get('audits', {}).get(audit_id))
+    if _passed_in_baseline(audit_id, baseline):
+        # Starting to fail is a regression whatever the size of the numeric change
+        entry['newly_failing'] = entry['regression'] = True
+    return entry
+
+
+def compare_to_baseline(report_data, baseline, allow_other_page=False):
+    """
+    Computes per-metric and per-diagnostic deltas against a baseline summary.
+    Raises ValueError when the baseline was taken on a different page URL,
+    unless `allow_other_page` (the diff then says so under 'page_mismatch').
+    """
+    current = summarize_for_baseline(report_data)
+    known = {current['page_url'], baseline.get('page_url')} - {None, '', UNKNOWN_URL}
+    page_mismatch = len(known) > 1
+    if page_mismatch and not allow_other_page:
+        raise ValueError(f"baseline is for {baseline['page_url']}, not {current['page_url']}; "
+                         "deltas between different pages are meaningless")
+
+    metrics = {audit_id: _compare_entry(audit_id, entry, baseline['metrics'].get(audit_id))
+               for audit_id, entry in current['metrics'].items()}
+    diagnostics = {audit_id: _compare_diagnostic(audit_id, entry, baseline)
+                   for audit_id, entry in current['diagnostics'].items()}
+    scores = {key: {'current': value, 'baseline': baseline['scores'].get(key),
+                    'delta': None if baseline['scores'].get(key) is None else value - baseline['scores'][key]}
+              for key, value in current['scores'].items()}
+
+    regressions = [audit_id for audit_id, entry in {**metrics, **diagnostics}.items() if entry['regression']]
+    return {
+        'page_url': current['page_url'],
+        'execution_time': current['execution_time'],
+        'baseline': {'page_url': baseline.get('page_url'), 'execution_time': baseline.get('execution_time')},
+        'page_mismatch': page_mismatch,
+        'scores': scores,
+        'metrics': metrics,
+        'diagnostics': diagnostics,
+        'regressions': regressions,
+    }
+
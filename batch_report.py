@@ -0,0 +1,207 @@
+import argparse
+import functools
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from extract_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ExtractCache
+from generate_report import MIN_PASS_SCORE, extract_report_data, generate_html_report, load_report
+from report_stream import COMPRESSED_SUFFIXES
+
+# File pattern used when a directory is given as input (plain, .gz or .zst).
+DEFAULT_PATTERN = '**/merged-report*.json*'
+
+
+def find_inputs(source, pattern=DEFAULT_PATTERN):
+    """
+    Expands a directory, glob or single file into a sorted list of inputs.
+    Returns (root, paths) where root is the directory output names are relative to.
+    """
+    if os.path.isdir(source):
+        root = source
+        paths = glob.glob(os.path.join(source, pattern), recursive=True)
+    elif glob.has_magic(source):
+        # Everything before the first wildcard is the common root
+        prefix = source[:min(source.find(c) for c in '*?[' if c in source)]
+        root = os.path.dirname(prefix) or '.'
+        paths = glob.glob(source, recursive=True)
+    else:
+        root = os.path.dirname(source) or '.'
+        paths = [source]
+    paths = sorted(p for p in paths if os.path.isfile(p))
+    listed = set(paths)
+    return root, [p for p in paths if not _is_extra_copy(p, listed)]
+
+
+def _is_extra_copy(path, listed):
+    """
+    True for a .gz/.zst copy of a report whose plain file (or an earlier
+    COMPRESSED_SUFFIXES copy) is also listed: both would render to the same
+    dashboard, so only the one resolve_report_path() prefers is kept.
+    """
+    for i, suffix in enumerate(COMPRESSED_SUFFIXES):
+        if path.endswith(suffix):
+            plain = path[:-len(suffix)]
+            return any(candidate in listed for candidate in [plain] + [plain + s for s in COMPRESSED_SUFFIXES[:i]])
+    return False
+
+
+def output_name(input_path, root):
+    """
+    Deterministic dashboard file name for one input, e.g.
+    home/mobile/merged-report.json -> home__mobile__merged-report.html
+    """
+    relative = os.path.relpath(input_path, root)
+    for suffix in COMPRESSED_SUFFIXES:
+        if relative.endswith(suffix):
+            relative = relative[:-len(suffix)]
+    stem = os.path.splitext(relative)[0]
+    return stem.replace(os.sep, '__').replace('/', '__') + '.html'
+
+
+def output_names(inputs, root):
+    """
+    output_name() of each input, in order. Raises ValueError when two inputs
+    map to the same name (e.g. a/b__c.json and a__b/c.json), since their
+    renders would overwrite each other.
+    """
+    names = [output_name(path, root) for path in inputs]
+    seen = {}
+    for path, name in zip(inputs, names):
+        if name in seen:
+            raise ValueError(f"{seen[name]} and {path} would both be written to {name}")
+        seen[name] = path
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def _worker_cache(cache_dir):
+    # One cache handle per worker process; eviction is left to the parent
+    return ExtractCache(cache_dir)
+
+
+def render_one(job):
+    """
+    Loads, extracts and renders a single report.
+    Runs in a worker process; never raises so one bad file cannot stop the batch.
+    """
+    input_path, output_path, min_pass_score, stream, offline, cache_dir = job
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': output_path, 'ok': False, 'error': None, 'cache': None}
+    try:
+        if cache_dir:
+            cache = _worker_cache(cache_dir)
+            render_key = cache.render_key(input_path, min_pass_score=min_pass_score, offline=offline)
+            if cache.output_is_current(output_path, render_key):
+                result.update(ok=True, cache='skipped', seconds=time.perf_counter() - start)
+                return result
+            hits = cache.hits
+            report_data = cache.extract(input_path, stream=stream)
+            result['cache'] = 'hit' if cache.hits > hits else 'miss'
+        else:
+            report_data = extract_report_data(load_report(input_path, stream=stream))
+        html_content = generate_html_report(report_data, min_pass_score=min_pass_score, offline=offline)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        if cache_dir:
+            cache.record_output(output_path, render_key)
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(inputs, root, output_dir, workers=None, min_pass_score=MIN_PASS_SCORE, stream=False,
+              offline=False, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Renders every input over a process pool and returns the per-file results
+    in input order. With `cache_dir`, extraction goes through ExtractCache and
+    outputs that are already current are skipped; pass None to disable it.
+    Raises ValueError, before anything is rendered, when two inputs share a
+    dashboard name.
+    """
+    names = output_names(inputs, root)
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, os.path.join(output_dir, name), min_pass_score, stream, offline, cache_dir)
+            for path, name in zip(inputs, names)]
+    if not jobs:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [render_one(job) for job in jobs]
+
+    # Hand out work in chunks so per-task IPC stays small next to the render cost
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_one, jobs, chunksize=chunksize))
+
+
+def print_summary(results, elapsed, slowest=5):
+    ok = [r for r in results if r['ok']]
+    failed = [r for r in results if not r['ok']]
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+
+    print(f"Rendered {len(ok)}/{len(results)} reports in {elapsed:.2f}s ({rate:.1f} reports/sec)")
+    cached = [r['cache'] for r in results if r.get('cache')]
+    if cached:
+        print(f"Extraction cache: {cached.count('hit')} hits, {cached.count('miss')} misses, "
+              f"{cached.count('skipped')} unchanged outputs skipped")
+    if failed:
+        print(f"{len(failed)} failed:")
+        for r in failed:
+            print(f"  {r['input']}: {r['error']}")
+    if results:
+        print(f"Slowest {min(slowest, len(results))}:")
+        for r in sorted(results, key=lambda r: r['seconds'], reverse=True)[:slowest]:
+            print(f"  {r['seconds'] * 1000:8.1f} ms  {r['input']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render many merged reports in parallel.")
+    parser.add_argument('source', help="Directory, glob or single merged report")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN,
+                        help="File pattern used when SOURCE is a directory")
+    parser.add_argument('--output-dir', default='dashboards', help="Where to write the HTML dashboards")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--min-pass-score', type=int, default=MIN_PASS_SCORE)
+    parser.add_argument('--stream', action='store_true', help="Stream each input instead of loading it whole")
+    parser.add_argument('--offline', action='store_true', help="Write self-contained dashboards (no network)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Extraction cache, keyed by each input's content hash")
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument('--no-cache', action='store_true', help="Always re-parse and re-extract every input")
+    parser.add_argument('--slowest', type=int, default=5, help="How many of the slowest files to list")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root, inputs = find_inputs(args.source, args.pattern)
+    if not inputs:
+        print(f"No reports found in {args.source}")
+        return 1
+
+    print(f"Rendering {len(inputs)} reports into {args.output_dir}...")
+    start = time.perf_counter()
+    try:
+        results = run_batch(inputs, root, args.output_dir, workers=args.workers,
+                            min_pass_score=args.min_pass_score, stream=args.stream, offline=args.offline,
+                            cache_dir=None if args.no_cache else args.cache_dir)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    print_summary(results, time.perf_counter() - start, slowest=args.slowest)
+    if not args.no_cache:
+        cache = ExtractCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+        cache.prune()
+        if cache.evicted:
+            print(f"Evicted {cache.evicted} cache entries")
+    return 0 if all(r['ok'] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
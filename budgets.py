@@ -0,0 +1,229 @@
+import argparse
+import fnmatch
+import json
+import os
+from urllib.parse import urlsplit
+
+from generate_report import extract_report_data, format_budget_value, load_report
+
+BUDGET_REPORT_FORMAT = 'lighthouse-budget-report'
+BUDGET_REPORT_VERSION = 1
+
+# Keys a budget entry may have. resourceSizes, resourceCounts and timings follow
+# Lighthouse's budget.json (sizes in KiB); page and thirdParty are ours.
+BUDGET_KEYS = {'page', 'path', 'resourceSizes', 'resourceCounts', 'timings', 'thirdParty'}
+
+# resource-summary types a size or count budget can name.
+RESOURCE_TYPES = {'total', 'document', 'script', 'stylesheet', 'image', 'font', 'media', 'other', 'third-party'}
+
+# Audit ids a timing budget can name: budget.json's timing metrics plus the
+# performance diagnostics with a numericValue. A typo is rejected up front
+# instead of never being measured.
+TIMING_METRICS = {
+    'first-contentful-paint', 'largest-contentful-paint', 'speed-index', 'total-blocking-time',
+    'cumulative-layout-shift', 'interactive', 'max-potential-fid', 'first-meaningful-paint',
+    'server-response-time', 'bootup-time', 'mainthread-work-breakdown', 'render-blocking-resources',
+    'redirects', 'dom-size', 'total-byte-weight',
+}
+
+
+def _check_limits(entries, field, where):
+    if not isinstance(entries, list):
+        raise ValueError(f"{where}.{field} must be a list")
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get('budget'), (int, float)):
+            raise ValueError(f"{where}.{field} entries need a numeric 'budget': {entry!r}")
+
+
+def validate_budgets(budgets):
+    """
+    Checks a parsed budget file; raises ValueError naming the first problem.
+    """
+    if isinstance(budgets, dict):
+        budgets = budgets.get('budgets')
+    if not isinstance(budgets, list):
+        raise ValueError("A budget file is a list of budget entries (or {\"budgets\": [...]})")
+    for i, budget in enumerate(budgets):
+        where = f"budgets[{i}]"
+        if not isinstance(budget, dict):
+            raise ValueError(f"{where} must be an object")
+        unknown = set(budget) - BUDGET_KEYS
+        if unknown:
+            raise ValueError(f"{where} has unknown keys: {', '.join(sorted(unknown))}")
+        for field in ('resourceSizes', 'resourceCounts'):
+            _check_limits(budget.get(field, []), field, where)
+            for entry in budget.get(field, []):
+                if entry.get('resourceType') not in RESOURCE_TYPES:
+                    raise ValueError(f"{where}.{field}: unknown resourceType {entry.get('resourceType')!r}")
+        _check_limits(budget.get('timings', []), 'timings', where)
+        for entry in budget.get('timings', []):
+            if not isinstance(entry.get('metric'), str):
+                raise ValueError(f"{where}.timings entries need a 'metric': {entry!r}")
+            if entry['metric'] not in TIMING_METRICS:
+                raise ValueError(f"{where}.timings: unknown metric {entry['metric']!r}")
+        third_party = budget.get('thirdParty', {})
+        if not isinstance(third_party, dict) or not all(
+                isinstance(value, (int, float)) for value in
+                [third_party.get('bytesPerOrigin', 0), *third_party.get('origins', {}).values()]):
+            raise ValueError(f"{where}.thirdParty needs numeric 'bytesPerOrigin' / 'origins' budgets (KiB)")
+    return budgets
+
+
+def load_budgets(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return validate_budgets(json.load(f))
+
+
+def select_budget(budgets, page=None, page_url=''):
+    """
+    The budget for one page: like Lighthouse, the last matching entry wins.
+    An entry matches on `page` (the merged report's page name), on `path`
+    (a glob over the URL path) or, with neither, always.
+    """
+    url_path = urlsplit(page_url).path or '/'
+    selected = None
+    for budget in budgets:
+        if 'page' in budget and budget['page'] != page:
+            continue
+        if 'path' in budget and not fnmatch.fnmatchcase(url_path, budget['path']):
+            continue
+        selected = budget
+    return selected
+
+
+def _metric_value(report_data, audit_id):
+    # Any performance audit, passing or failing, weighted or not
+    entry = report_data['performance_audits'].get(audit_id) or {}
+    return entry.get('numeric_value'), entry.get('numeric_unit')
+
+
+def _check(kind, key, label, limit, actual, unit):
+    return {
+        'kind': kind,
+        'key': key,
+        'label': label,
+        'limit': limit,
+        'actual': actual,
+        'unit': unit,
+        'measured': actual is not None,
+        'over': None if actual is None else actual - limit,
+        # A budget the report cannot be checked against has not been met
+        'passed': actual is not None and actual <= limit,
+    }
+
+
+def evaluate_budget(report_data, budget):
+    """
+    Checks one report's extracted data against one budget entry.
+    Sizes are compared in bytes (budget KiB * 1024).
+    """
+    usage = report_data.get('resources') or {'by_type': {}, 'third_party': {}, 'complete': True}
+    checks = []
+    for entry in budget.get('resourceSizes', []):
+        resource_type = entry['resourceType']
+        actual = usage['by_type'].get(resource_type, {}).get('bytes')
+        checks.append(_check('size', resource_type, f"{resource_type} transfer size",
+                             entry['budget'] * 1024, actual, 'byte'))
+    for entry in budget.get('resourceCounts', []):
+        resource_type = entry['resourceType']
+        actual = usage['by_type'].get(resource_type, {}).get('count')
+        checks.append(_check('count', resource_type, f"{resource_type} requests", entry['budget'], actual, 'count'))
+
+    third_party = budget.get('thirdParty', {})
+    origin_limits = third_party.get('origins', {})
+    default_limit = third_party.get('bytesPerOrigin')
+    if usage['third_party'] is None:
+        # Origins cannot be summed from a cut-down request table: every limit is unmeasured
+        for origin, limit in origin_limits.items():
+            checks.append(_check('third-party', origin, f"{origin} transfer size", limit * 1024, None, 'byte'))
+        if default_limit is not None:
+            checks.append(_check('third-party', '*', "third-party transfer size per origin",
+                                 default_limit * 1024, None, 'byte'))
+    else:
+        for origin, size in usage['third_party'].items():
+            limit = origin_limits.get(origin, default_limit)
+            if limit is not None:
+                checks.append(_check('third-party', origin, f"{origin} transfer size", limit * 1024, size, 'byte'))
+
+    for entry in budget.get('timings', []):
+        # budget.json metric names are the Lighthouse audit ids
+        actual, unit = _metric_value(report_data, entry['metric'])
+        checks.append(_check('timing', entry['metric'], entry['metric'], entry['budget'], actual, unit))
+
+    violations = [check for check in checks if check['measured'] and not check['passed']]
+    not_measured = [check['label'] for check in checks if not check['measured']]
+    return {
+        'page': report_data.get('page'),
+        'page_url': report_data['page_url'],
+        'execution_time': report_data['execution_time'],
+        'checks': checks,
+        'violations': [check['label'] for check in violations],
+        'not_measured': not_measured,
+        'passed': not violations and not not_measured,
+        # False when the request table was cut down and its sums are not measured
+        'complete': usage['complete'],
+    }
+
+
+def write_budget_report(results, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'format': BUDGET_REPORT_FORMAT, 'version': BUDGET_REPORT_VERSION, 'results': results}, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check merged reports against performance budgets.")
+    parser.add_argument('budgets', help="Budget file (JSON, Lighthouse budget.json style)")
+    parser.add_argument('reports', nargs='+', help="Merged reports to check")
+    parser.add_argument('--stream', action='store_true', help="Stream each input instead of loading it whole")
+    parser.add_argument('--json', metavar='PATH', default='lighthouse/budget-report.json',
+                        help="Where to write the violations as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        budgets = load_budgets(args.budgets)
+    except (OSError, ValueError) as e:
+        print(f"Error loading budgets {args.budgets}: {e}")
+        return 2
+
+    results = []
+    exit_code = 0
+    for path in args.reports:
+        try:
+            report_data = extract_report_data(load_report(path, stream=args.stream))
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}")
+            exit_code = 2
+            continue
+        budget = select_budget(budgets, report_data.get('page'), report_data['page_url'])
+        if budget is None:
+            print(f"{path}: no budget matches page {report_data.get('page')!r}")
+            continue
+        result = evaluate_budget(report_data, budget)
+        result['source'] = os.path.abspath(path)
+        results.append(result)
+        status = 'within budget' if result['passed'] else f"{len(result['violations'])} over budget"
+        if result['not_measured']:
+            status += f", {len(result['not_measured'])} not measured"
+        print(f"{path}: {status}")
+        for check in result['checks']:
+            if not check['measured']:
+                print(f"  {check['label']}: not measured")
+            elif not check['passed']:
+                print(f"  {check['label']}: {format_budget_value(check['actual'], check['unit'])} "
+                      f"> {format_budget_value(check['limit'], check['unit'])}")
+        if not result['complete']:
+            print("  note: the request table was truncated without totals; budgets summed from it are not measured")
+        if not result['passed']:
+            exit_code = max(exit_code, 1)
+
+    write_budget_report(results, args.json)
+    print(f"Budget report saved: {args.json}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
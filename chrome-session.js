@@ -0,0 +1,37 @@
+import chromeLauncher from "chrome-launcher";
+import { Builder } from "selenium-webdriver";
+import chrome from "selenium-webdriver/chrome.js";
+
+// Launches one headless Chrome with a remote debugging port that both
+// Selenium (via debuggerAddress) and Lighthouse (via port) can attach to.
+export async function launchSharedChrome() {
+    const instance = await chromeLauncher.launch({ chromeFlags: ["--headless"] });
+    return {
+        port: instance.port,
+        debuggerAddress: `127.0.0.1:${instance.port}`,
+        kill: () => instance.kill()
+    };
+}
+
+// Builds a WebDriver session: attached to a running Chrome when
+// `debuggerAddress` is given, otherwise a fresh headless Chrome as before.
+export async function buildChromeDriver({ debuggerAddress } = {}) {
+    const options = new chrome.Options();
+    if (debuggerAddress) {
+        options.debuggerAddress(debuggerAddress);
+    } else {
+        options.addArguments("--headless");
+    }
+    return new Builder().forBrowser("chrome").setChromeOptions(options).build();
+}
+
+// Drops cookies and HTTP cache left by the Selenium flow so the Lighthouse
+// phase on the same browser starts cold. Lighthouse resets origin storage itself.
+export async function isolateBrowserState(driver) {
+    try {
+        await driver.sendDevToolsCommand("Network.clearBrowserCache", {});
+        await driver.sendDevToolsCommand("Network.clearBrowserCookies", {});
+    } catch (err) {
+        console.log("⚠ Could not clear browser state:", err.message);
+    }
+}
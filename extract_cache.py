@@ -0,0 +1,205 @@
+import ast
+import functools
+import hashlib
+import importlib.util
+import os
+import pickle
+
+from generate_report import EXTRACTOR_VERSION, extract_report_data, load_report
+from pipeline_trace import maybe_span
+from report_stream import resolve_report_path
+
+DEFAULT_CACHE_DIR = '.report-cache'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Module whose source, with every local module it imports at load time,
+# decides the rendered HTML; editing any of them (a template or a helper
+# such as flow_timings.rate_vital) invalidates every recorded output.
+RENDER_ROOT = 'generate_report'
+
+_HASH_CHUNK = 1 << 20
+
+
+def content_hash(path):
+    """
+    Hex digest of the file's raw bytes (compressed inputs are hashed as stored).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _module_path(name, local_dir):
+    spec = importlib.util.find_spec(name)
+    origin = spec.origin if spec else None
+    if origin and origin.endswith('.py') and os.path.dirname(os.path.abspath(origin)) == local_dir:
+        return origin
+    return None
+
+
+def render_modules(root=RENDER_ROOT):
+    """
+    {module name: source path} for `root` and the repo modules it imports at
+    module level, transitively. Imports inside functions (baseline, budgets,
+    ...) run after rendering and are left out; so are stdlib modules.
+    """
+    local_dir = os.path.dirname(os.path.abspath(importlib.util.find_spec(root).origin))
+    modules = {}
+    pending = [root]
+    while pending:
+        name = pending.pop()
+        path = _module_path(name, local_dir)
+        if name in modules or path is None:
+            continue
+        modules[name] = path
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), path)
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module)
+    return modules
+
+
+@functools.lru_cache(maxsize=None)
+def renderer_fingerprint():
+    digest = hashlib.blake2b(digest_size=16)
+    for name, path in sorted(render_modules().items()):
+        digest.update(name.encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ExtractCache:
+    """
+    On-disk cache of extract_report_data() output, keyed by the input's
+    content hash and EXTRACTOR_VERSION, plus a record of which rendered
+    outputs are still current. Entries are pickles; the least recently
+    used are evicted by prune() once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evicted = 0
+        self._keys = {}
+        os.makedirs(os.path.join(directory, 'extract'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'render'), exist_ok=True)
+
+    def content_key(self, path):
+        path = resolve_report_path(path)
+        if path not in self._keys:
+            self._keys[path] = f"v{EXTRACTOR_VERSION}-{content_hash(path)}"
+        return self._keys[path]
+
+    def _read(self, entry_path):
+        try:
+            with open(entry_path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Truncated or written by an incompatible version: drop it
+            os.remove(entry_path)
+            return None
+        # The mtime doubles as the last-used time for eviction
+        os.utime(entry_path)
+        return value
+
+    def _write(self, entry_path, value):
+        # Write-then-rename so parallel workers never read a partial entry
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+
+    def extract(self, path, stream=False, tracer=None):
+        """
+        Returns extract_report_data() for `path`, from the cache when the file's
+        content was seen before. Load errors propagate as from load_report().
+        """
+        with maybe_span(tracer, 'content hash'):
+            entry_path = os.path.join(self.directory, 'extract', self.content_key(path) + '.pickle')
+        with maybe_span(tracer, 'cache lookup'):
+            report_data = self._read(entry_path)
+        if report_data is not None:
+            self.hits += 1
+            return report_data
+
+        self.misses += 1
+        with maybe_span(tracer, 'load'):
+            data = load_report(path, stream=stream)
+        with maybe_span(tracer, 'extract'):
+            report_data = extract_report_data(data)
+        if report_data:
+            self._write(entry_path, report_data)
+        return report_data
+
+    def render_key(self, input_path, **options):
+        """
+        Identifies one rendering: input content, renderer source and options.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(self.content_key(input_path).encode())
+        digest.update(renderer_fingerprint().encode())
+        digest.update(repr(sorted(options.items())).encode())
+        return digest.hexdigest()
+
+    def _render_entry(self, output_path):
+        name = hashlib.blake2b(os.path.abspath(output_path).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, 'render', name + '.pickle')
+
+    def output_is_current(self, output_path, render_key):
+        """
+        True when `output_path` was written for `render_key` and not touched since.
+        """
+        state = self._read(self._render_entry(output_path))
+        if not state or state['render_key'] != render_key:
+            return False
+        try:
+            st = os.stat(output_path)
+        except FileNotFoundError:
+            return False
+        if (st.st_size, st.st_mtime_ns) != (state['size'], state['mtime_ns']):
+            return False
+        self.skipped += 1
+        return True
+
+    def record_output(self, output_path, render_key):
+        st = os.stat(output_path)
+        self._write(self._render_entry(output_path),
+                    {'render_key': render_key, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns})
+
+    def prune(self):
+        """
+        Evicts least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        for sub in ('extract', 'render'):
+            with os.scandir(os.path.join(self.directory, sub)) as it:
+                for entry in it:
+                    if entry.name.endswith('.pickle'):
+                        st = entry.stat()
+                        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evicted += 1
+
+    def summary(self):
+        return (f"Extraction cache: {self.hits} hits, {self.misses} misses, "
+                f"{self.skipped} unchanged outputs skipped, {self.evicted} evicted")
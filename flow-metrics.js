@@ -0,0 +1,127 @@
+import { spanOrRun } from "./pipeline-trace.js";
+
+// Resource entries kept per page snapshot (the slowest ones).
+const SLOWEST_RESOURCES = 10;
+
+// Installed in the page before its own scripts run (and again after each
+// navigation, for browsers without CDP). Buffered observers also pick up
+// entries recorded before installation. CLS uses the session windows of the
+// Web Vitals definition (1 s gap, 5 s cap); INP is the longest interaction,
+// which equals the p98 definition below 50 interactions.
+const VITALS_OBSERVER = `(() => {
+  if (window.__flowVitals || typeof PerformanceObserver === "undefined") return;
+  const vitals = window.__flowVitals = { lcp: null, lcpElement: null, cls: 0, inp: null, interactions: 0 };
+  const observe = (type, callback, options = {}) => {
+    try {
+      new PerformanceObserver(list => list.getEntries().forEach(callback)).observe({ type, buffered: true, ...options });
+    } catch (err) { /* entry type not supported */ }
+  };
+  observe("largest-contentful-paint", entry => {
+    vitals.lcp = entry.renderTime || entry.loadTime || entry.startTime;
+    vitals.lcpElement = entry.element ? entry.element.tagName.toLowerCase() + (entry.element.id ? "#" + entry.element.id : "") : null;
+  });
+  let session = 0, sessionStart = 0, lastShift = 0;
+  observe("layout-shift", entry => {
+    if (entry.hadRecentInput) return;
+    if (entry.startTime - lastShift > 1000 || entry.startTime - sessionStart > 5000) {
+      session = 0;
+      sessionStart = entry.startTime;
+    }
+    session += entry.value;
+    lastShift = entry.startTime;
+    vitals.cls = Math.max(vitals.cls, session);
+  });
+  const interactions = new Map();
+  observe("event", entry => {
+    if (!entry.interactionId) return;
+    interactions.set(entry.interactionId, Math.max(interactions.get(entry.interactionId) || 0, entry.duration));
+    vitals.interactions = interactions.size;
+    vitals.inp = Math.max(...interactions.values());
+  }, { durationThreshold: 16 });
+})();`;
+
+// Reads one snapshot of the page's Navigation Timing, paint timings, vitals
+// and resource entries. Runs in the page via executeScript.
+const SNAPSHOT = `
+  const round = value => (typeof value === "number" ? Math.round(value * 10) / 10 : null);
+  const [nav] = performance.getEntriesByType("navigation");
+  const paint = {};
+  performance.getEntriesByType("paint").forEach(entry => { paint[entry.name] = round(entry.startTime); });
+  const resources = performance.getEntriesByType("resource");
+  const entryCounts = {};
+  performance.getEntries().forEach(entry => { entryCounts[entry.entryType] = (entryCounts[entry.entryType] || 0) + 1; });
+  const vitals = window.__flowVitals || {};
+  return {
+    url: location.href,
+    navigation: nav ? {
+      type: nav.type,
+      ttfb: round(nav.responseStart - nav.startTime),
+      domContentLoaded: round(nav.domContentLoadedEventEnd - nav.startTime),
+      load: round(nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : null),
+      transferSize: nav.transferSize
+    } : null,
+    paint,
+    vitals: { lcp: round(vitals.lcp), lcpElement: vitals.lcpElement || null, cls: vitals.cls ?? null,
+              inp: round(vitals.inp), interactions: vitals.interactions || 0 },
+    resources: {
+      count: resources.length,
+      transferSize: resources.reduce((sum, entry) => sum + (entry.transferSize || 0), 0),
+      slowest: resources
+        .map(entry => ({ url: entry.name, initiatorType: entry.initiatorType, start: round(entry.startTime),
+                         duration: round(entry.duration), transferSize: entry.transferSize || 0 }))
+        .sort((a, b) => b.duration - a.duration)
+        .slice(0, arguments[0])
+    },
+    entryCounts
+  };`;
+
+// Collects per-step durations and page snapshots for one Selenium flow.
+// The result is the `flow` block of the merged report's `selenium` section.
+export function createFlowRecorder(driver, { tracer = null } = {}) {
+  const origin = performance.now();
+  const steps = [];
+  const pages = [];
+
+  return {
+    // Registers the vitals observer for every document the session opens.
+    async install() {
+      try {
+        await driver.sendDevToolsCommand("Page.addScriptToEvaluateOnNewDocument", { source: VITALS_OBSERVER });
+      } catch (err) {
+        console.log("⚠ Could not pre-install the vitals observer:", err.message);
+      }
+    },
+
+    // Times one user-visible step; also a span in the pipeline trace.
+    async step(name, fn) {
+      const start = performance.now();
+      const record = { name, startMs: Math.round(start - origin), durationMs: null, status: "ok" };
+      steps.push(record);
+      try {
+        return await spanOrRun(tracer, name, fn, { cat: "selenium" });
+      } catch (err) {
+        record.status = "failed";
+        record.error = err.message;
+        throw err;
+      } finally {
+        record.durationMs = Math.round(performance.now() - start);
+      }
+    },
+
+    // Snapshots the current document's timings under `label`. Never throws:
+    // a missing snapshot must not fail the functional test.
+    async snapshot(label) {
+      try {
+        await driver.executeScript(VITALS_OBSERVER);
+        pages.push({ label, ...(await driver.executeScript(SNAPSHOT, SLOWEST_RESOURCES)) });
+      } catch (err) {
+        console.log(`⚠ Could not read page timings (${label}):`, err.message);
+        pages.push({ label, error: err.message });
+      }
+    },
+
+    result() {
+      return { steps, pages };
+    }
+  };
+}
@@ -0,0 +1,74 @@
+# Web Vitals boundaries: (good up to, poor above), in ms except CLS.
+VITALS_THRESHOLDS = {
+    'ttfb_ms': (800, 1800),
+    'fcp_ms': (1800, 3000),
+    'lcp_ms': (2500, 4000),
+    'cls': (0.1, 0.25),
+    'inp_ms': (200, 500),
+}
+
+
+def rate_vital(key, value):
+    """
+    'good', 'needs-improvement' or 'poor' for one vital; None when unrated.
+    """
+    if value is None or key not in VITALS_THRESHOLDS:
+        return None
+    good, poor = VITALS_THRESHOLDS[key]
+    if value <= good:
+        return 'good'
+    return 'needs-improvement' if value <= poor else 'poor'
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else None
+
+
+def _page_row(page):
+    navigation = page.get('navigation') or {}
+    vitals = page.get('vitals') or {}
+    resources = page.get('resources') or {}
+    return {
+        'label': page.get('label', ''),
+        'url': page.get('url', ''),
+        'error': page.get('error'),
+        'ttfb_ms': _number(navigation.get('ttfb')),
+        'fcp_ms': _number((page.get('paint') or {}).get('first-contentful-paint')),
+        'lcp_ms': _number(vitals.get('lcp')),
+        'lcp_element': vitals.get('lcpElement'),
+        'cls': _number(vitals.get('cls')),
+        'inp_ms': _number(vitals.get('inp')),
+        'interactions': vitals.get('interactions') or 0,
+        'dom_content_loaded_ms': _number(navigation.get('domContentLoaded')),
+        'load_ms': _number(navigation.get('load')),
+        'requests': _number(resources.get('count')),
+        'transfer_size': _number(resources.get('transferSize')),
+        'slowest_resources': resources.get('slowest') or [],
+    }
+
+
+def extract_flow(selenium):
+    """
+    The Selenium user flow's step durations and per-page timings (the
+    `flow` block flow-metrics.js adds to the merged report's `selenium`
+    section), or None for reports recorded without it.
+    """
+    flow = (selenium or {}).get('flow') if isinstance(selenium, dict) else None
+    if not isinstance(flow, dict):
+        return None
+    steps = [{
+        'name': step.get('name', ''),
+        'start_ms': _number(step.get('startMs')) or 0,
+        'duration_ms': _number(step.get('durationMs')),
+        'status': step.get('status', 'ok'),
+        'error': step.get('error'),
+    } for step in flow.get('steps') or [] if isinstance(step, dict)]
+    pages = [_page_row(page) for page in flow.get('pages') or [] if isinstance(page, dict)]
+    if not steps and not pages:
+        return None
+    return {
+        'status': selenium.get('status'),
+        'steps': steps,
+        'pages': pages,
+        'total_ms': max((step['start_ms'] + (step['duration_ms'] or 0) for step in steps), default=0),
+    }
@@ -1,6 +1,38 @@
+import argparse
+import functools
 import json
 import html
+import os
 from datetime import datetime, timezone
+from operator import itemgetter
+
+from audit_details import TOP_K, deep_dive, resource_usage
+from flow_timings import extract_flow, rate_vital
+from pipeline_trace import Tracer, timing_rows, write_trace
+from profile_matrix import PROFILE_METRICS, describe_profile, extract_profiles
+from report_assets import OFFLINE_FONT_CSS, STYLESHEET_MARK, doughnut_svg, inline_stylesheet
+from report_schema import ReportSchemaError, describe_validation, is_timestamp, report_url, validate_report
+from report_stream import open_report_text, stream_report_file
+from report_templates import (BUDGET_ROW, BUDGET_SECTION, CHART_SCRIPT, DEEP_DIVE_CELL, DEEP_DIVE_HEADER, DEEP_DIVE_PANEL, DEEP_DIVE_ROW,
+                              DEEP_DIVE_SECTION, DIAGNOSTIC_ROW, DIAGNOSTICS_SECTION, FLOW_SECTION, FLOW_TABLE, LOAD_ROW, LOAD_SECTION,
+                              METRIC_ROW, ONLINE_CHARTS, ONLINE_FONT_CSS, ONLINE_HEAD_ASSETS, PROFILE_HEADER, PROFILE_SECTION, PIPELINE_TIMING_ROW, PIPELINE_TIMING_SECTION,
+                              REPORT_PAGE, RUN_STATS_SECTION, TIMELINE_BAR, TOTAL_ROW, VALIDATION_SECTION, WEIGHTING_ITEM)
+from run_stats import summarize_runs
+
+# Minimum performance score required to pass; merge-reports.js gates on the same value
+MIN_PASS_SCORE = int(os.environ.get('MIN_PASS_SCORE') or 90)
+
+# Bump whenever extract_report_data's output changes; it keys the extraction cache.
+EXTRACTOR_VERSION = 9
+
+# execution_time for a report with neither mergedAt nor an LHR fetchTime
+UNKNOWN_TIME = 'Unknown time'
+# page_url for a report that names no tested URL anywhere
+UNKNOWN_URL = 'Unknown URL'
+
+# A performance audit scoring below this is listed as a failing diagnostic
+# (merge-reports.js keeps its details for the same reason).
+DIAGNOSTIC_PASS_SCORE = 0.9
 
 
 def get_score_color_hex(score):
@@ -62,136 +94,624 @@ def get_status_label(score):
     return 'FAIL'
 
 
-def extract_report_data(data):
+def report_page_url(lighthouse):
     """
-    Extracts and processes all necessary data from the raw JSON report.
+    Returns the tested URL: the LHR's finalUrl or requestedUrl, or for older
+    reports without them the first server-response-time item.
     """
-    try:
-        # Get top-level Lighthouse objects
-        lh_categories = data.get('lighthouse', {}).get('categories', {})
-        lh_audits = data.get('lighthouse', {}).get('audits', {})
+    page_url = report_url(lighthouse)
+    if page_url:
+        return page_url
+    lh_audits = lighthouse.get('audits') or {}
+    items = ((lh_audits.get('server-response-time') or {}).get('details') or {}).get('items') or []
+    if items and isinstance(items[0], dict):
+        return items[0].get('url', UNKNOWN_URL)
+    return UNKNOWN_URL
 
-        # --- 1. Get Summary Info ---
-        page_url = 'Unknown URL'
-        # Try to find a reliable URL from one of the audits
-        if 'server-response-time' in lh_audits and lh_audits['server-response-time'].get('details', {}).get('items',
-                                                                                                            []):
-            page_url = lh_audits['server-response-time']['details']['items'][0].get('url', 'Unknown URL')
 
-        raw_time = data.get('mergedAt', '2025-01-01T00:00:00.000Z')
+def category_score(lh_categories, category_id):
+    """
+    A category's 0-100 score, or 0 when Lighthouse did not score it.
+    """
+    category = lh_categories.get(category_id)
+    score = category.get('score') if isinstance(category, dict) else None
+    return round(score * 100) if isinstance(score, (int, float)) else 0
 
-        # Parse the ISO 8601 timestamp and format it
+
+def extract_report_data(data, validation=None):
+    """
+    Extracts and processes all necessary data from the raw JSON report.
+    Raises ReportSchemaError, before any other work, when the report has no
+    usable Lighthouse data (see report_schema.py); partial reports are
+    extracted with their gaps listed under 'validation'.
+    """
+    validation = validation or validate_report(data)
+    if validation['rejected']:
+        raise ReportSchemaError(validation)
+
+    # Get top-level Lighthouse objects
+    lighthouse = data['lighthouse']
+    lh_categories = lighthouse['categories']
+    # Audits that are not objects were flagged by the validator; skip them
+    lh_audits = {audit_id: audit for audit_id, audit in lighthouse['audits'].items() if isinstance(audit, dict)}
+
+    # --- 1. Get Summary Info ---
+    page_url = report_page_url(lighthouse)
+
+    # mergedAt is stamped by merge-reports.js; bare LHRs only carry fetchTime
+    raw_time = data.get('mergedAt') if is_timestamp(data.get('mergedAt')) else lighthouse.get('fetchTime')
+    if is_timestamp(raw_time):
         exec_time = datetime.fromisoformat(raw_time.replace('Z', '+00:00'))
         formatted_time = exec_time.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+    else:
+        formatted_time = UNKNOWN_TIME
+
+    # --- 2. Get All Category Scores ---
+    # Store scores as 0-100 integers; a missing or null one stays 0 for the
+    # charts but is listed in 'validation' and called out on the dashboard
+    scores = {
+        'accessibility': category_score(lh_categories, 'accessibility'),
+        'best_practices': category_score(lh_categories, 'best-practices'),
+        'seo': category_score(lh_categories, 'seo'),
+    }
+
+    # --- 3. Calculate Performance Metrics Breakdown ---
+    performance_metrics = []
+    weighting_scheme = []
+    metric_ids = set()
+
+    # Get all audit IDs that belong to the performance category
+    perf_audit_refs = lh_categories['performance']['auditRefs']
+    performance_audit_ids = {ref['id'] for ref in perf_audit_refs}
+
+    # Filter for just the audits that have weight (i.e., the main metrics)
+    weighted_audits = [ref for ref in perf_audit_refs if ref.get('weight', 0) > 0]
+
+    total_contribution = 0
+
+    for ref in weighted_audits:
+        audit_id = ref['id']
+        weight = ref['weight']  # This is the percentage (e.g., 10, 25)
+        audit = lh_audits.get(audit_id, {})
+
+        score = audit.get('score', 0) or 0  # This is 0-1
+
+        # Lighthouse score contribution is (score * weight)
+        contribution = score * weight
+        total_contribution += contribution
+
+        metric_ids.add(audit_id)  # Keep track of main metrics
+
+        performance_metrics.append({
+            'id': audit_id,
+            'title': audit.get('title', audit_id),
+            'display_value': audit.get('displayValue', 'N/A'),
+            'score': score,  # Score is 0-1
+            'weight': weight,  # Weight is a percentage (e.g., 10, 25, 30)
+            'contribution': contribution,
+            'numeric_value': audit.get('numericValue'),  # Raw value, e.g. milliseconds
+            'numeric_unit': audit.get('numericUnit'),
+        })
+
+        weighting_scheme.append({
+            'title': audit.get('title', audit_id),
+            'weight': int(weight),
+        })
+
+    # The final score is the sum of weighted contributions, rounded.
+    total_score = round(total_contribution)
+    scores['performance'] = total_score
+
+    # --- 4. Find Diagnostic Errors (PERFORMANCE ONLY) ---
+    # This section finds failing audits that are part of the 'performance'
+    # category but are *not* the main weighted metrics.
+    diagnostics = []
+    for audit_id, audit in lh_audits.items():
+        score = audit.get('score')
+
+        # Check if it's a failing audit (score < 0.9, and not null)
+        # AND it's a performance audit
+        # AND it's NOT one of the main weighted metrics (we already show those)
+        if (score is not None and
+                score < DIAGNOSTIC_PASS_SCORE and  # Fails if score is not 1 (or 0.9 for some)
+                audit_id in performance_audit_ids and
+                audit_id not in metric_ids):
+
+            details_text = audit.get('displayValue', '')
+            if not details_text:
+                details = audit.get('details', {})
+                if 'items' in details:
+                    # Streamed reports keep only the head of long item lists
+                    item_count = details.get('itemCount', len(details['items']))
+                    details_text = f"{item_count} items found"
+                else:
+                    # Fallback to description, remove markdown links
+                    details_text = audit.get('description', 'No details').split('[Learn more]')[0].strip()
+
+            # Sanitize HTML in details
+            details_text = html.escape(details_text)
+
+            diagnostics.append({
+                'id': audit_id,
+                'title': audit.get('title', audit_id),
+                'score': score,  # Score is 0-1
+                'status_label': get_status_label(score * 100),
+                'details_text': details_text,
+                'numeric_value': audit.get('numericValue'),
+                'numeric_unit': audit.get('numericUnit'),
+            })
 
-        # --- 2. Get All Category Scores ---
-        perf_score_raw = lh_categories.get('performance', {}).get('score', 0)
-        a11y_score_raw = lh_categories.get('accessibility', {}).get('score', 0)
-        bestp_score_raw = lh_categories.get('best-practices', {}).get('score', 0)
-        seo_score_raw = lh_categories.get('seo', {}).get('score', 0)
-
-        # Store scores as 0-100 integers
-        scores = {
-            'accessibility': round((a11y_score_raw or 0) * 100),
-            'best_practices': round((bestp_score_raw or 0) * 100),
-            'seo': round((seo_score_raw or 0) * 100),
+    # Every performance audit's raw value, passing or not: baselines compare
+    # on them and budget timings may name any of them, not just the above
+    performance_audits = {
+        audit_id: {
+            'title': audit.get('title', audit_id),
+            'score': audit.get('score'),
+            'numeric_value': audit.get('numericValue'),
+            'numeric_unit': audit.get('numericUnit'),
         }
+        for audit_id, audit in lh_audits.items() if audit_id in performance_audit_ids
+    }
+
+    # --- 5. Aggregate repeated Lighthouse passes, if any ---
+    run_stats = None
+    if data.get('lighthouseRuns'):
+        run_stats = summarize_runs(data['lighthouseRuns'])
+
+    return {
+        'page': data.get('page'),
+        'page_url': page_url,
+        'execution_time': formatted_time,
+        'scores': scores,
+        'metrics': performance_metrics,
+        'total_score': total_score,
+        'diagnostics': diagnostics,
+        'performance_audits': performance_audits,
+        'weighting_scheme': weighting_scheme,
+        'run_stats': run_stats,
+        # Top rows of the tables behind TBT/LCP/CLS (see audit_details.py)
+        'deep_dive': deep_dive(lh_audits),
+        # Bytes and requests by type and per third-party origin, for budgets.py
+        'resources': resource_usage(lh_audits, page_url, lighthouse.get('entities')),
+        # Chrome trace events from the Node runner (see pipeline-trace.js)
+        'pipeline_trace': list(data.get('trace') or []),
+        # Step durations and page timings from the Selenium flow (see flow-metrics.js)
+        'flow': extract_flow(data.get('selenium')),
+        # API latency percentiles from load_test.py, when it was run against this build
+        'load': data['load'] if isinstance(data.get('load'), dict) else None,
+        # Scores and metrics per throttling profile (see throttling-profiles.js)
+        'profiles': extract_profiles(data.get('profiles')),
+        # ok / partial / selenium-failed, with the missing and mistyped paths
+        'validation': validation,
+    }
+
+
+def format_stat(value, unit=None):
+    """
+    Formats a statistic for display, using the Lighthouse numericUnit when known.
+    """
+    if value is None:
+        return 'N/A'
+    if unit == 'millisecond':
+        return f"{value:,.0f} ms"
+    if unit == 'unitless':
+        return f"{value:.3f}"
+    return f"{value:.1f}"
 
-        # --- 3. Calculate Performance Metrics Breakdown ---
-        performance_metrics = []
-        weighting_scheme = []
-        metric_ids = set()
-
-        # Get all audit IDs that belong to the performance category
-        perf_audit_refs = lh_categories.get('performance', {}).get('auditRefs', [])
-        performance_audit_ids = {ref['id'] for ref in perf_audit_refs}
-
-        # Filter for just the audits that have weight (i.e., the main metrics)
-        weighted_audits = [ref for ref in perf_audit_refs if ref.get('weight', 0) > 0]
-
-        total_contribution = 0
 
-        for ref in weighted_audits:
-            audit_id = ref['id']
-            weight = ref['weight']  # This is the percentage (e.g., 10, 25)
-            audit = lh_audits.get(audit_id, {})
+def _baseline_cell(entry):
+    """
+    Table cell for the "vs baseline" column from one compare_to_baseline() entry.
+    """
+    if entry is not None and entry['newly_failing'] and entry['delta'] is None:
+        text, color_class = 'newly failing', 'text-red-600 font-semibold'
+    elif entry is None or not entry['in_baseline']:
+        text, color_class = 'new', 'text-gray-500'
+    elif entry['delta'] is None:
+        text, color_class = 'N/A', 'text-gray-500'
+    else:
+        text = ('+' if entry['delta'] >= 0 else '-') + format_stat(abs(entry['delta']), entry['numeric_unit'])
+        if entry['delta_pct'] is not None:
+            text += f" ({entry['delta_pct']:+.1f}%)"
+        if entry['regression']:
+            color_class = 'text-red-600 font-semibold'
+        elif entry['improvement']:
+            color_class = 'text-green-600 font-semibold'
+        else:
+            color_class = 'text-gray-600'
+    return f"""
+            <td class="px-6 py-4 whitespace-nowrap text-sm {color_class}">{text}</td>"""
+
+
+def _run_stats_row(label, stats, unit):
+    return f"""
+                        <tr class="hover:bg-gray-50">
+                            <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{label}</td>
+                            <td class="px-6 py-4 whitespace-nowrap text-sm font-semibold text-gray-900">{format_stat(stats['median'], unit)}</td>
+                            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{format_stat(stats['p75'], unit)}</td>
+                            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{format_stat(stats['p95'], unit)}</td>
+                            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{format_stat(stats['stddev'], unit)}</td>
+                            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{format_stat(stats['ci_low'], unit)} &ndash; {format_stat(stats['ci_high'], unit)}</td>
+                        </tr>"""
+
+
+def _pipeline_timing_html(events):
+    timing = timing_rows(events)
+    if not timing:
+        return ""
+    total_ms = timing[0]['total_ms']
+    rows = []
+    for row in timing:
+        rows.append(PIPELINE_TIMING_ROW.render(
+            indent=1.5 + 1.25 * row['depth'],
+            name=html.escape(row['name']),
+            cat=html.escape(row['cat']),
+            start='+' + format_stat(row['start_ms'], 'millisecond'),
+            duration=format_stat(row['duration_ms'], 'millisecond'),
+            left=f"{row['start_ms'] / (total_ms or 1) * 100:.2f}",
+            width=f"{max(row['duration_ms'] / (total_ms or 1) * 100, 0.5):.2f}",
+        ))
+    return PIPELINE_TIMING_SECTION.render(total=format_stat(total_ms, 'millisecond'), rows=''.join(rows))
+
+
+def format_bytes(value):
+    if value is None:
+        return 'N/A'
+    if value < 1024:
+        return f"{value:,.0f} B"
+    return f"{value / 1024:,.1f} KiB"
+
+
+def format_latency(value):
+    return 'N/A' if value is None else f"{value:,.1f} ms"
+
+
+def format_budget_value(value, unit):
+    """
+    Formats a budgets.py check value: bytes, a request count or a metric value.
+    """
+    if unit == 'byte':
+        return format_bytes(value)
+    if unit == 'count':
+        return 'N/A' if value is None else f"{value:,.0f}"
+    return format_stat(value, unit)
 
-            score = audit.get('score', 0) or 0  # This is 0-1
 
-            # Lighthouse score contribution is (score * weight)
-            contribution = score * weight
-            total_contribution += contribution
+def _url_text(url, indent=0):
+    """
+    A URL cell, shortened for display with the full URL as its tooltip.
+    """
+    short = url if len(url) <= 90 else url[:87] + '...'
+    style = f' style="padding-left: {indent}rem"' if indent else ''
+    return f'<span title="{html.escape(url)}"{style}>{html.escape(short)}</span>'
 
-            metric_ids.add(audit_id)  # Keep track of main metrics
 
-            performance_metrics.append({
-                'title': audit.get('title', audit_id),
-                'display_value': audit.get('displayValue', 'N/A'),
-                'score': score,  # Score is 0-1
-                'weight': weight,  # Weight is a percentage (e.g., 10, 25, 30)
-                'contribution': contribution,
-            })
+def _bar(start, duration, span):
+    return TIMELINE_BAR.render(left=f"{start / (span or 1) * 100:.2f}",
+                               width=f"{max(duration / (span or 1) * 100, 0.5):.2f}")
 
-            weighting_scheme.append({
-                'title': audit.get('title', audit_id),
-                'weight': int(weight),
-            })
 
-        # The final score is the sum of weighted contributions, rounded.
-        total_score = round(total_contribution)
-        scores['performance'] = total_score
-
-        # --- 4. Find Diagnostic Errors (PERFORMANCE ONLY) ---
-        # This section finds failing audits that are part of the 'performance'
-        # category but are *not* the main weighted metrics.
-        diagnostics = []
-        for audit_id, audit in lh_audits.items():
-            score = audit.get('score')
-
-            # Check if it's a failing audit (score < 0.9, and not null)
-            # AND it's a performance audit
-            # AND it's NOT one of the main weighted metrics (we already show those)
-            if (score is not None and
-                    score < 0.9 and  # Fails if score is not 1 (or 0.9 for some)
-                    audit_id in performance_audit_ids and
-                    audit_id not in metric_ids):
-
-                details_text = audit.get('displayValue', '')
-                if not details_text:
-                    if 'items' in audit.get('details', {}):
-                        item_count = len(audit['details']['items'])
-                        details_text = f"{item_count} items found"
-                    else:
-                        # Fallback to description, remove markdown links
-                        details_text = audit.get('description', 'No details').split('[Learn more]')[0].strip()
-
-                # Sanitize HTML in details
-                details_text = html.escape(details_text)
-
-                diagnostics.append({
-                    'title': audit.get('title', audit_id),
-                    'score': score,  # Score is 0-1
-                    'status_label': get_status_label(score * 100),
-                    'details_text': details_text,
-                })
-
-        return {
-            'page_url': page_url,
-            'execution_time': formatted_time,
-            'scores': scores,
-            'metrics': performance_metrics,
-            'total_score': total_score,
-            'diagnostics': diagnostics,
-            'weighting_scheme': weighting_scheme
-        }
-    except Exception as e:
-        print(f"Error processing JSON data: {e}")
-        return None
+def _deep_dive_rows(key, panel):
+    """
+    (headers, rows) for one deep-dive panel; a row is a list of (cell_class, html).
+    """
+    ms = functools.partial(format_stat, unit='millisecond')
+    rows = panel.get('rows', [])
+    if key == 'scripts':
+        return (('Script', 'Total CPU', 'Evaluation', 'Parse / Compile'),
+                [[('text-gray-900 break-all', _url_text(row['url'])),
+                  ('whitespace-nowrap font-semibold text-gray-900', ms(row['total_ms'])),
+                  ('whitespace-nowrap text-gray-700', ms(row['scripting_ms'])),
+                  ('whitespace-nowrap text-gray-700', ms(row['parse_ms']))] for row in rows])
+    if key == 'main_thread':
+        return (('Category', 'Time'),
+                [[('text-gray-900', html.escape(row['label'])),
+                  ('whitespace-nowrap font-semibold text-gray-900', ms(row['duration_ms']))] for row in rows])
+    if key == 'long_tasks':
+        span = max(((row['start_ms'] or 0) + (row['duration_ms'] or 0) for row in rows), default=0)
+        return (('Source', 'Start', 'Duration', 'Timeline'),
+                [[('text-gray-900 break-all', _url_text(row['url'])),
+                  ('whitespace-nowrap text-gray-700', ms(row['start_ms'])),
+                  ('whitespace-nowrap font-semibold text-gray-900', ms(row['duration_ms'])),
+                  ('w-1/3', _bar(row['start_ms'] or 0, row['duration_ms'] or 0, span))] for row in rows])
+    if key == 'render_blocking':
+        return (('Resource', 'Transfer Size', 'Est. Savings'),
+                [[('text-gray-900 break-all', _url_text(row['url'])),
+                  ('whitespace-nowrap text-gray-700', format_bytes(row['transfer_size'])),
+                  ('whitespace-nowrap font-semibold text-gray-900', ms(row['wasted_ms']))] for row in rows])
+    if key == 'requests':
+        return (('Request', 'Type', 'Transfer Size', 'Start', 'Duration'),
+                [[('text-gray-900 break-all', _url_text(row['url'])),
+                  ('whitespace-nowrap text-gray-500', html.escape(row['resource_type'] or '')),
+                  ('whitespace-nowrap font-semibold text-gray-900', format_bytes(row['transfer_size'])),
+                  ('whitespace-nowrap text-gray-700', ms(row['start_ms'])),
+                  ('whitespace-nowrap text-gray-700',
+                   ms(None if row['start_ms'] is None or row['end_ms'] is None else row['end_ms'] - row['start_ms']))]
+                 for row in rows])
+    if key == 'critical_chain':
+        span = max((row['start_ms'] + row['duration_ms'] for row in rows), default=0)
+        return (('Request', 'Start', 'Duration', 'Transfer Size', 'Timeline'),
+                [[('text-gray-900 break-all', _url_text(row['url'], indent=1.25 * row['depth'])),
+                  ('whitespace-nowrap text-gray-700', '+' + ms(row['start_ms'])),
+                  ('whitespace-nowrap font-semibold text-gray-900', ms(row['duration_ms'])),
+                  ('whitespace-nowrap text-gray-700', format_bytes(row['transfer_size'])),
+                  ('w-1/3', _bar(row['start_ms'], row['duration_ms'], span))] for row in rows])
+    if key == 'lcp_element':
+        node = panel['node']
+        element_rows = [('Element', 'text-gray-900', html.escape(node['label'])),
+                        ('Selector', 'font-mono text-gray-700 break-all', html.escape(node['selector'])),
+                        ('Snippet', 'font-mono text-gray-700 break-all', html.escape(node['snippet']))]
+        element_rows += [(html.escape(phase['phase']), 'text-gray-900',
+                          f"{ms(phase['timing_ms'])} <span class=\"text-gray-500\">{html.escape(phase['percent'])}</span>")
+                         for phase in panel['phases']]
+        return (('Item', 'Value'),
+                [[('whitespace-nowrap font-medium text-gray-700', label), (cell_class, value)]
+                 for label, cell_class, value in element_rows])
+    # layout_shifts
+    return (('Element', 'Shift Score', 'Likely Causes'),
+            [[('text-gray-900', f'<span title="{html.escape(row["selector"])}">{html.escape(row["label"])}</span>'),
+              ('whitespace-nowrap font-semibold text-gray-900', format_stat(row['score'], 'unitless')),
+              ('text-gray-700', html.escape(', '.join(row['causes'])) or 'N/A')] for row in rows])
+
+
+def _budget_html(result):
+    if not result or not result['checks']:
+        return ""
+    rows = []
+    # Violations and unmeasured budgets first, then in budget file order
+    for check in sorted(result['checks'], key=lambda check: check['passed']):
+        unit = check['unit']
+        if not check['measured']:
+            status, badge_class, over = 'NOT MEASURED', get_status_badge(50), ''
+        elif check['passed']:
+            status, badge_class, over = 'PASS', get_status_badge(100), ''
+        else:
+            status, badge_class = 'OVER', get_status_badge(0)
+            over = format_budget_value(check['over'], unit)
+        rows.append(BUDGET_ROW.render(
+            label=html.escape(check['label']),
+            limit=format_budget_value(check['limit'], unit),
+            actual_class='text-red-600' if check['measured'] and not check['passed'] else 'text-gray-900',
+            actual=format_budget_value(check['actual'], unit),
+            over=over,
+            badge_class=badge_class,
+            status=status,
+        ))
+    violations = len(result['violations'])
+    not_measured = len(result['not_measured'])
+    summary = (f"{violations} of {len(result['checks'])} budgets exceeded." if violations
+               else f"All {len(result['checks']) - not_measured} measured budgets met." if not_measured
+               else f"All {len(result['checks'])} budgets met.")
+    if not_measured:
+        summary += f" {not_measured} could not be measured from this report and fail the budget gate."
+    if not result['complete']:
+        summary += " The request table was cut to its largest rows without totals, so budgets summed from it are not measured."
+    return BUDGET_SECTION.render(summary=summary, rows=''.join(rows))
+
+
+# (panel key, title) in page order; see audit_details.deep_dive().
+DEEP_DIVE_PANELS = (
+    ('lcp_element', 'Largest Contentful Paint Element'),
+    ('layout_shifts', 'Layout Shift Culprits'),
+    ('scripts', 'JavaScript Execution Time'),
+    ('main_thread', 'Main-Thread Work Breakdown'),
+    ('long_tasks', 'Long Tasks'),
+    ('render_blocking', 'Render-Blocking Resources'),
+    ('critical_chain', 'Critical Request Chain'),
+    ('requests', 'Largest Network Requests'),
+)
+
+
+def _deep_dive_html(panels):
+    if not panels:
+        return ""
+    html_panels = []
+    for key, title in DEEP_DIVE_PANELS:
+        panel = panels.get(key)
+        if not panel:
+            continue
+        headers, rows = _deep_dive_rows(key, panel)
+        if not rows:
+            continue
+        if key == 'critical_chain':
+            summary = (f"{panel['length']} requests on the longest chain, "
+                       f"{format_stat(panel['duration_ms'], 'millisecond')}, {format_bytes(panel['transfer_size'])}")
+        elif key == 'lcp_element':
+            summary = html.escape(panel['node']['label'])
+        else:
+            summary = f"top {len(rows)} of {panel['count']}"
+        if panel.get('display_value'):
+            summary = f"{html.escape(panel['display_value'])} &middot; {summary}"
+        score = panel.get('score')
+        html_panels.append(DEEP_DIVE_PANEL.render(
+            open_attr=' open' if score is not None and score < 0.9 else '',
+            title=title,
+            summary=summary,
+            headers=''.join(DEEP_DIVE_HEADER.render(label) for label in headers),
+            rows=''.join(DEEP_DIVE_ROW.render(''.join(DEEP_DIVE_CELL.render(cell_class, value)
+                                                      for cell_class, value in row)) for row in rows),
+        ))
+    if not html_panels:
+        return ""
+    return DEEP_DIVE_SECTION.render(top_k=TOP_K, panels=''.join(html_panels))
+
+
+VITAL_RATING_CLASSES = {
+    'good': 'text-green-600 font-semibold',
+    'needs-improvement': 'text-amber-600 font-semibold',
+    'poor': 'text-red-600 font-semibold',
+}
+
+
+def _vital_cell(page, key):
+    value = page[key]
+    text = format_stat(value, 'unitless' if key == 'cls' else 'millisecond')
+    return VITAL_RATING_CLASSES.get(rate_vital(key, value), 'text-gray-700'), text
+
+
+def _flow_table(title, headers, rows):
+    return FLOW_TABLE.render(
+        title=title,
+        headers=''.join(DEEP_DIVE_HEADER.render(label) for label in headers),
+        rows=''.join(DEEP_DIVE_ROW.render(''.join(DEEP_DIVE_CELL.render(cell_class, value)
+                                                  for cell_class, value in row)) for row in rows),
+    )
+
+
+def _flow_html(flow):
+    if not flow:
+        return ""
+    tables = []
+    if flow['steps']:
+        rows = []
+        for step in flow['steps']:
+            failed = step['status'] != 'ok'
+            status = html.escape(step['error'] or step['status']) if failed else 'ok'
+            rows.append((
+                ('font-medium text-gray-900', html.escape(step['name'])),
+                ('whitespace-nowrap text-gray-700', '+' + format_stat(step['start_ms'], 'millisecond')),
+                ('whitespace-nowrap font-semibold text-gray-900', format_stat(step['duration_ms'], 'millisecond')),
+                ('text-red-600 font-semibold' if failed else 'text-green-600', status),
+                ('w-1/3', _bar(step['start_ms'], step['duration_ms'] or 0, flow['total_ms'])),
+            ))
+        tables.append(_flow_table('Steps', ('Step', 'Start', 'Duration', 'Status', 'Timeline'), rows))
+    if flow['pages']:
+        rows = []
+        for page in flow['pages']:
+            label = html.escape(page['label'])
+            if page['error']:
+                rows.append((('font-medium text-gray-900', label),
+                             ('text-gray-500', f"no timings: {html.escape(page['error'])}")))
+                continue
+            rows.append((
+                ('font-medium text-gray-900', f"{label}<br>{_url_text(page['url'])}"),
+                _vital_cell(page, 'ttfb_ms'),
+                _vital_cell(page, 'fcp_ms'),
+                _vital_cell(page, 'lcp_ms'),
+                _vital_cell(page, 'cls'),
+                # INP needs an interaction; the flow's clicks and keystrokes count
+                _vital_cell(page, 'inp_ms') if page['interactions'] else ('text-gray-500', 'no input'),
+                ('whitespace-nowrap text-gray-700', format_stat(page['dom_content_loaded_ms'], 'millisecond')),
+                ('whitespace-nowrap text-gray-700', format_stat(page['load_ms'], 'millisecond')),
+                ('text-gray-700', format_budget_value(page['requests'], 'count')),
+                ('whitespace-nowrap text-gray-700', format_bytes(page['transfer_size'])),
+            ))
+        tables.append(_flow_table('Pages', ('Page', 'TTFB', 'FCP', 'LCP', 'CLS', 'INP', 'DOMContentLoaded',
+                                            'Load', 'Requests', 'Transfer'), rows))
+    summary = f"{len(flow['steps'])} steps, {format_stat(flow['total_ms'], 'millisecond')}"
+    if flow['status']:
+        summary += f", test {html.escape(str(flow['status']))}"
+    return FLOW_SECTION.render(summary=summary, tables=''.join(tables))
+
+
+def _profiles_html(profiles):
+    """
+    The page under each throttling profile: the performance score, then the
+    metric display values, one column per profile.
+    """
+    if not profiles:
+        return ""
+    headers = ''.join(PROFILE_HEADER.render(html.escape(profile['name']), html.escape(describe_profile(profile['settings'])))
+                      for profile in profiles)
+    score_cells = []
+    for profile in profiles:
+        score = profile['scores']['performance']
+        if profile['error'] or score is None:
+            score_cells.append(('text-gray-500', html.escape(profile['error'] or 'N/A')))
+        else:
+            score_cells.append((f"{get_score_color_text(score)} font-bold", f"{score:g}"))
+    rows = [DEEP_DIVE_ROW.render(''.join(DEEP_DIVE_CELL.render(cell_class, value) for cell_class, value in
+                                         [('font-medium text-gray-900', 'Performance score')] + score_cells))]
+    for audit_id in PROFILE_METRICS:
+        entries = [profile['metrics'].get(audit_id) for profile in profiles]
+        if not any(entries):
+            continue
+        title = next(entry['title'] for entry in entries if entry)
+        cells = [('font-medium text-gray-900', html.escape(title))]
+        for entry in entries:
+            if entry is None or entry['score'] is None:
+                cells.append(('text-gray-500', 'N/A' if entry is None else html.escape(entry['display_value'])))
+            else:
+                cells.append((get_score_color_text(entry['score'] * 100), html.escape(entry['display_value'])))
+        rows.append(DEEP_DIVE_ROW.render(''.join(DEEP_DIVE_CELL.render(cell_class, value) for cell_class, value in cells)))
+    description = (f"The page under {len(profiles)} throttling and emulation profiles. The first profile's run "
+                   f"is the one reported above; the weakest column shows which condition a regression comes from.")
+    return PROFILE_SECTION.render(description=description, corner='Metric', headers=headers, rows=''.join(rows))
+
+
+def _load_row(result, name_class):
+    latency = result.get('latency_ms') or {}
+    error_rate = result.get('error_rate') or 0
+    return LOAD_ROW.render(
+        name_class=name_class,
+        name=html.escape(str(result.get('name', ''))),
+        requests=f"{result.get('requests', 0):,}",
+        error_class='text-red-600 font-semibold' if error_rate else 'text-gray-700',
+        error_rate=f"{error_rate:.2%}",
+        throughput=f"{result.get('throughput_rps') or 0:,.1f} req/s",
+        **{key: format_latency(latency.get(key)) for key in ('p50', 'p90', 'p99', 'p99_9', 'max')},
+    )
+
+
+# What each validation status means for the numbers on the dashboard
+VALIDATION_SUMMARIES = {
+    'partial': "Some fields were missing from the merged report. Scores and metrics that depend on them show as 0 or N/A and are not real measurements.",
+    'selenium-failed': "The Selenium flow failed before Lighthouse ran, so the scores below may describe an error page rather than the page under test.",
+}
+
+
+def _validation_html(validation):
+    """
+    Banner listing the paths report_schema.py found missing or mistyped,
+    so zeros that stand in for missing data are not read as measurements.
+    """
+    if not validation or validation['status'] == 'ok':
+        return ""
+    paths = validation['missing'] + validation['mistyped']
+    return VALIDATION_SECTION.render(
+        status=validation['status'],
+        summary=VALIDATION_SUMMARIES.get(validation['status'], ''),
+        paths=html.escape('; '.join(paths)) if paths else 'No missing fields.',
+    )
+
+
+def _load_html(load):
+    if not load:
+        return ""
+    rows = [_load_row(result, 'font-medium text-gray-900') for result in load.get('endpoints') or []]
+    rows.append(_load_row(dict(load, name='All endpoints'), 'font-bold text-indigo-700'))
+    if load.get('mode') == 'open':
+        summary = (f"{load.get('rps_target') or 0:g} requests/s over {load.get('concurrency')} connections "
+                   f"for {load.get('duration_s') or 0:.1f} s. Latencies count from when each request was due, "
+                   f"so queueing behind a slow backend shows up")
+    else:
+        summary = (f"{load.get('concurrency')} concurrent clients for {load.get('duration_s') or 0:.1f} s, "
+                   f"each sending its next request as soon as the last one returned")
+    summary = f"{html.escape(str(load.get('target', '')))}: {summary}."
+    return LOAD_SECTION.render(summary=summary, rows=''.join(rows))
+
+
+@functools.lru_cache(maxsize=32)
+def _weighting_html(items):
+    return ''.join(WEIGHTING_ITEM.render(weight, title) for weight, title in items)
+
+
+def decision_score(data):
+    """
+    Returns the score PASS/FAIL is decided on: the median performance score
+    when several Lighthouse passes were aggregated, else the single score.
+    """
+    run_stats = data.get('run_stats')
+    if run_stats and 'performance' in run_stats['categories']:
+        return run_stats['categories']['performance']['median']
+    return data['scores']['performance']
 
 
-def generate_html_report(data, min_pass_score=90):
+def generate_html_report(data, min_pass_score=90, offline=False):
     """
     Generates the full HTML report string from the processed data.
+    With offline=True the page is self-contained: a purged stylesheet and
+    inline SVG charts replace the Tailwind, Chart.js and Google Fonts fetches.
     """
     if not data:
         return "<h1>Error generating report.</h1>"
@@ -203,368 +723,413 @@ def generate_html_report(data, min_pass_score=90):
     # Use the color logic from the Lighthouse standard (90/50)
     perf_color_text = get_score_color_text(perf_score)
 
-    final_result = "PASS" if perf_score >= min_pass_score else "FAIL"
+    # With several Lighthouse passes, decide on the median rather than one sample
+    run_stats = data.get('run_stats')
+    final_score = decision_score(data)
+    final_result_note = ""
+    if run_stats and 'performance' in run_stats['categories']:
+        final_result_note = f"""
+                            <p class="text-sm text-gray-500 mt-1">Median of {run_stats['runs']} runs: {final_score:g}</p>"""
+
+    final_result = "PASS" if final_score >= min_pass_score else "FAIL"
     # Use red for FAIL as per image_45d246.png
     final_result_color = "text-green-600" if final_result == "PASS" else "text-red-600"
 
+    # Optional comparison against a baseline run (see baseline.py)
+    baseline_diff = data.get('baseline_diff')
+    baseline_th = ""
+    if baseline_diff:
+        baseline_th = """
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                vs Baseline
+                            </th>"""
+
     # --- Dynamic Sections ---
+    # Rows are collected in lists and joined once; the static markup lives in
+    # report_templates.py and is parsed once per process.
 
     # 1. Performance Breakdown Table Rows
-    metrics_rows_html = ""
+    metrics_rows = []
     total_weight = 0
     for metric in data['metrics']:
         metric_score_100 = round(metric['score'] * 100)
-        color_class = get_score_color_text(metric_score_100)
         weight = metric['weight']
         total_weight += weight
-        metrics_rows_html += f"""
-        <tr class="hover:bg-gray-50">
-            <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{metric['title']}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{metric['display_value']}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm font-semibold {color_class}">{metric_score_100}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{weight}%</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{round(metric['contribution'], 1)}</td>
-        </tr>
-        """
+        baseline_cell = ""
+        if baseline_diff:
+            baseline_cell = _baseline_cell(baseline_diff['metrics'].get(metric.get('id')))
+        # Positional in METRIC_ROW field order: title, display_value, color_class,
+        # score, weight, contribution, baseline_cell
+        metrics_rows.append(METRIC_ROW.render(
+            metric['title'], metric['display_value'], get_score_color_text(metric_score_100),
+            metric_score_100, weight, round(metric['contribution'], 1), baseline_cell))
 
     # Add a total row for the breakdown
-    metrics_rows_html += f"""
-    <tr class="bg-indigo-50 font-bold">
-        <td class="px-6 py-4 whitespace-nowrap text-sm text-indigo-700" colspan="3">FINAL CALCULATED SCORE</td>
-        <td class="px-6 py-4 whitespace-nowrap text-sm text-indigo-700">{total_weight}%</td>
-        <td class="px-6 py-4 whitespace-nowrap text-lg {perf_color_text}">{perf_score}</td>
-    </tr>
-    """
-
-    # 2. Diagnostics Table (Dynamic)
+    total_baseline_cell = ""
+    if baseline_diff:
+        perf_delta = baseline_diff['scores'].get('performance', {}).get('delta')
+        total_baseline_cell = f"""
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-indigo-700">{'' if perf_delta is None else f'{perf_delta:+d} pts'}</td>"""
+    metrics_rows.append(TOTAL_ROW.render(
+        total_weight=total_weight,
+        perf_color_text=perf_color_text,
+        perf_score=perf_score,
+        total_baseline_cell=total_baseline_cell,
+    ))
+
+    # 2. Throttling Profiles (page x profile scores, when run under several profiles)
+    validation_html = _validation_html(data.get('validation'))
+    profiles_html = _profiles_html(data.get('profiles'))
+
+    # 3. Interactive Flow Timings (from the Selenium flow, next to the lab data above)
+    flow_html = _flow_html(data.get('flow'))
+
+    # 4. API Load Test (when load_test.py added its results to the report)
+    load_html = _load_html(data.get('load'))
+
+    # 5. Diagnostics Table (Dynamic)
     diagnostics_html = ""
     if data['diagnostics']:
-        diagnostics_rows_html = ""
+        diagnostics_rows = []
         # Sort diagnostics by score (worst first)
-        sorted_diagnostics = sorted(data['diagnostics'], key=lambda x: x['score'])
+        sorted_diagnostics = sorted(data['diagnostics'], key=itemgetter('score'))
         for diag in sorted_diagnostics:
-            badge_class = get_status_badge(diag['score'] * 100)
-            diagnostics_rows_html += f"""
-            <tr class="hover:bg-gray-50">
-                <td class="px-6 py-4 text-sm font-medium text-gray-800">{diag['title']}</td>
-                <td class="px-6 py-4">
-                    <span class="{badge_class}">
-                        {diag['status_label']}
-                    </span>
-                </td>
-                <td class="px-6 py-4 text-sm text-gray-600">{diag['details_text']}</td>
-            </tr>
-            """
-
-        diagnostics_html = f"""
-        <section class="mb-12">
-            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Key Performance Diagnostics</h2>
-            <p class="text-gray-600 mb-4">
-                These audits do not directly contribute to the Performance score but highlight critical opportunities for improvement.
-            </p>
-            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
-                <table class="min-w-full divide-y divide-gray-200">
-                    <thead class="bg-indigo-50">
-                        <tr>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Diagnostic Audit
-                            </th>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Result
-                            </th>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Details
-                            </th>
-                        </tr>
-                    </thead>
-                    <tbody class="divide-y divide-gray-100">
-                        {diagnostics_rows_html}
-                    </tbody>
-                </table>
-            </div>
-        </section>
-
-        <hr class="my-8 border-gray-200">
-        """
-
-    # 3. Weighting Scheme List
-    weighting_html = ""
-    for item in data['weighting_scheme']:
-        weighting_html += f"""
-        <li class="bg-gray-50 border border-gray-200 rounded-lg p-4 text-center">
-            <strong class="text-2xl font-bold text-indigo-600 block mb-1">{item['weight']}%</strong>
-            <span class="text-gray-700">{item['title']}</span>
-        </li>
-        """
+            baseline_cell = ""
+            if baseline_diff:
+                baseline_cell = _baseline_cell(baseline_diff['diagnostics'].get(diag.get('id')))
+            # Positional in DIAGNOSTIC_ROW field order: title, badge_class,
+            # status_label, details_text, baseline_cell
+            diagnostics_rows.append(DIAGNOSTIC_ROW.render(
+                diag['title'], get_status_badge(diag['score'] * 100), diag['status_label'],
+                diag['details_text'], baseline_cell))
+        diagnostics_html = DIAGNOSTICS_SECTION.render(baseline_th=baseline_th, rows=''.join(diagnostics_rows))
+
+    # 6. Performance Budgets (when checked against a budget file, see budgets.py)
+    budget_html = _budget_html(data.get('budget_result'))
+
+    # 7. Multi-Run Statistics (only when several passes were aggregated)
+    run_stats_html = ""
+    if run_stats:
+        run_stats_rows = []
+        for key, title in (('performance', 'Performance'), ('accessibility', 'Accessibility'),
+                           ('best_practices', 'Best Practices'), ('seo', 'SEO')):
+            if key in run_stats['categories']:
+                run_stats_rows.append(_run_stats_row(f"{title} score", run_stats['categories'][key], None))
+        for metric in run_stats['metrics']:
+            if metric['numeric_value']:
+                run_stats_rows.append(_run_stats_row(metric['title'], metric['numeric_value'], metric['numeric_unit']))
+        run_stats_html = RUN_STATS_SECTION.render(runs=run_stats['runs'], rows=''.join(run_stats_rows))
+
+    # 8. Trace Deep Dive (the top rows of the audit tables behind TBT, LCP and CLS)
+    deep_dive_html = _deep_dive_html(data.get('deep_dive'))
+
+    # 9. Pipeline Timing (spans from the Node runner and this script, when recorded)
+    pipeline_timing_html = _pipeline_timing_html(data.get('pipeline_trace') or [])
+
+    # 10. Weighting Scheme List
+    # The scheme is the same for every report of a Lighthouse version, so it is cached
+    weighting_html = _weighting_html(tuple((item['weight'], item['title']) for item in data['weighting_scheme']))
+
+    # 11. Charts and page assets
+    chart_scores = {
+        'perf': perf_score,
+        'a11y': scores['accessibility'],
+        'bestp': scores['best_practices'],
+        'seo': scores['seo'],
+    }
+    chart_colors = {key: get_score_color_hex(score) for key, score in chart_scores.items()}
+    if offline:
+        # The stylesheet is purged against the finished page, see below
+        head_assets = STYLESHEET_MARK
+        font_css = OFFLINE_FONT_CSS
+        charts = {key: doughnut_svg(score, chart_colors[key], 0.85 if key == 'perf' else 0.8)
+                  for key, score in chart_scores.items()}
+        chart_script = ""
+    else:
+        head_assets = ONLINE_HEAD_ASSETS
+        font_css = ONLINE_FONT_CSS
+        charts = ONLINE_CHARTS
+        chart_script = CHART_SCRIPT.render(
+            perf_score=perf_score,
+            perf_color_hex=chart_colors['perf'],
+            a11y_score=chart_scores['a11y'],
+            a11y_color_hex=chart_colors['a11y'],
+            bestp_score=chart_scores['bestp'],
+            bestp_color_hex=chart_colors['bestp'],
+            seo_score=chart_scores['seo'],
+            seo_color_hex=chart_colors['seo'],
+        )
 
     # --- Final HTML String ---
-    # We use {{...}} to escape curly braces for Chart.js/CSS, and {variable} for Python f-strings
-    # Styling is based on the provided HTML report samples
-    html_template = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Lighthouse Performance Report</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@3.7.1/dist/chart.min.js"></script>
-    <style>
-        /* Custom font from load_test_report.html */
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800&display=swap');
-        body {{ font-family: 'Inter', sans-serif; }}
-
-        /* Styles for the main performance doughnut chart */
-        .chart-container-main {{
-            position: relative;
-            width: 200px;
-            height: 200px;
-        }}
-        .chart-score-main {{
-            position: absolute;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            font-size: 3.75rem; /* 60px */
-            font-weight: 800;
-        }}
-
-        /* Styles for the small doughnut charts */
-        .chart-container-sub {{
-            position: relative;
-            width: 120px; 
-            height: 120px;
-            margin: 0 auto 10px;
-        }}
-        .chart-score-sub {{
-            position: absolute;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            font-size: 1.875rem; /* 30px */
-            font-weight: 700;
-        }}
-        .weighting-list {{
-            list-style: none;
-            padding-left: 0;
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 15px;
-        }}
-    </style>
-</head>
-<body class="bg-gray-100 text-gray-800 p-4 sm:p-8">
-
-    <div class="max-w-7xl mx-auto">
-
-        <header class="mb-8 p-6 bg-white shadow-lg rounded-xl border-t-4 border-indigo-600">
-            <h1 class="text-3xl font-extrabold text-indigo-700">Lighthouse Performance Report</h1>
-            <p class="text-gray-500 mt-1 text-sm">
-                <strong>URL Tested:</strong> <a href="{data['page_url']}" target="_blank" class="text-indigo-500 hover:underline">{data['page_url']}</a> <br>
-                <strong>Generated on:</strong> {data['execution_time']}
-            </p>
-        </header>
-
-        <div class="grid grid-cols-1 mb-10">
-            <div class="bg-white p-6 rounded-xl shadow-md border-b-4 border-indigo-500">
-
-                <div class="grid grid-cols-1 md:grid-cols-2 gap-0 items-center">
-
-                    <!-- Left Side: Doughnut Chart -->
-                    <div class="flex flex-col items-center">
-                        <p class="text-sm text-gray-500 font-semibold uppercase tracking-wider mb-2">Performance Quality Index (PQI)</p>
-                        <div class="chart-container-main">
-                            <canvas id="perfScoreChart"></canvas>
-                            <div class="chart-score-main {perf_color_text}">{perf_score}</div>
-                        </div>
-                    </div>
-
-                    <!-- Right Side: Min Score and Final Result -->
-                    <div class="flex flex-col items-center">
-                        <div class="text-center mb-6">
-                            <p class="text-sm text-gray-500 font-semibold uppercase tracking-wider">Min Score to Pass</p>
-                            <p class="text-4xl font-bold text-gray-700 mt-1">{min_pass_score}</p>
-                        </div>
-                        <div class="text-center">
-                            <p class="text-sm text-gray-500 font-semibold uppercase tracking-wider">Final Result</p>
-                            <p class="text-4xl font-bold {final_result_color} mt-1">{final_result}</p>
-                        </div>
-                    </div>
-
-                </div>
-            </div>
-        </div>
-
-        <section class="mb-12">
-            <h2 class="text-2xl font-bold text-gray-700 mb-6 border-b pb-2">Additional Scores</h2>
-            <div class="grid grid-cols-1 md:grid-cols-3 gap-6">
-
-                <div class="bg-white p-6 rounded-xl shadow-lg text-center border-b-4 {get_score_color_border(scores['accessibility'])}">
-                    <h3 class="text-lg font-semibold text-gray-600 mb-4">Accessibility</h3>
-                    <div class="chart-container-sub">
-                        <canvas id="a11yChart"></canvas>
-                        <div class="chart-score-sub {get_score_color_text(scores['accessibility'])}">{scores['accessibility']}</div>
-                    </div>
-                </div>
-
-                <div class="bg-white p-6 rounded-xl shadow-lg text-center border-b-4 {get_score_color_border(scores['best_practices'])}">
-                    <h3 class="text-lg font-semibold text-gray-600 mb-4">Best Practices</h3>
-                    <div class="chart-container-sub">
-                        <canvas id="bestpChart"></canvas>
-                        <div class="chart-score-sub {get_score_color_text(scores['best_practices'])}">{scores['best_practices']}</div>
-                    </div>
-                </div>
-
-                <div class="bg-white p-6 rounded-xl shadow-lg text-center border-b-4 {get_score_color_border(scores['seo'])}">
-                    <h3 class="text-lg font-semibold text-gray-600 mb-4">SEO</h3>
-                    <div class="chart-container-sub">
-                        <canvas id="seoChart"></canvas>
-                        <div class="chart-score-sub {get_score_color_text(scores['seo'])}">{scores['seo']}</div>
-                    </div>
-                </div>
-            </div>
-        </section>
-
-        <hr class="my-8 border-gray-200">
-
-        <section class="mb-12">
-            <h2 class="text-2xl font-bold text-gray-700 mb-6 border-b pb-2">Performance Score Breakdown</h2>
-            <p class="text-gray-600 mb-4">
-                The final performance score is a weighted average of key user-centric metrics. 
-                This table shows how each metric contributed to the final score.
-            </p>
-            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
-                <table class="min-w-full divide-y divide-gray-200">
-                    <thead class="bg-indigo-50">
-                        <tr>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Metric
-                            </th>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Measured Value
-                            </th>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Score (0-100)
-                            </th>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Weight
-                            </th>
-                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
-                                Score Contribution
-                            </th>
-                        </tr>
-                    </thead>
-                    <tbody class="divide-y divide-gray-100">
-                        {metrics_rows_html}
-                    </tbody>
-                </table>
-            </div>
-        </section>
-
-        <hr class="my-8 border-gray-200">
-
-        {diagnostics_html}
-
-        <section>
-            <h2 class="text-2xl font-bold text-gray-700 mb-6 border-b pb-2">Score Weighting Scheme</h2>
-            <p class="text-gray-600 mb-4">This performance score was calculated using the Lighthouse 10 weighting:</p>
-            <ul class="weighting-list">
-                {weighting_html}
-            </ul>
-        </section>
-
-    </div>
-
-    <script>
-        // --- Chart Helper Function ---
-        // This function creates the small doughnut charts
-        function createDoughnutChart(chartId, score, scoreColor, cutout = '80%') {{
-            const data = {{
-                datasets: [{{
-                    data: [score, 100 - score],
-                    backgroundColor: [scoreColor, '#e9ecef'], // Use light gray for the remainder
-                    borderWidth: 0,
-                    borderRadius: 5
-                }}]
-            }};
-            const config = {{
-                type: 'doughnut',
-                data: data,
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    cutout: cutout,
-                    plugins: {{
-                        legend: {{ display: false }},
-                        tooltip: {{ enabled: false }}
-                    }}
-                }}
-            }};
-            // Check if element exists before creating chart
-            const ctx = document.getElementById(chartId);
-            if (ctx) {{
-                new Chart(ctx.getContext('2d'), config);
-            }}
-        }}
-
-        // --- Render Charts ---
-        // Create the main performance chart
-        createDoughnutChart('perfScoreChart', {perf_score}, '{get_score_color_hex(perf_score)}', '85%');
-
-        // Create the smaller charts for the "Additional Scores" section
-        createDoughnutChart('a11yChart', {scores['accessibility']}, '{get_score_color_hex(scores['accessibility'])}');
-        createDoughnutChart('bestpChart', {scores['best_practices']}, '{get_score_color_hex(scores['best_practices'])}');
-        createDoughnutChart('seoChart', {scores['seo']}, '{get_score_color_hex(scores['seo'])}');
-    </script>
-
-</body>
-</html>
-    """
-    return html_template
-
-
-def main():
+    page = REPORT_PAGE.render(
+        head_assets=head_assets,
+        font_css=font_css,
+        page_url=data['page_url'],
+        execution_time=data['execution_time'],
+        validation_html=validation_html,
+        perf_chart=charts['perf'],
+        perf_score=perf_score,
+        perf_color_text=perf_color_text,
+        min_pass_score=min_pass_score,
+        final_result=final_result,
+        final_result_color=final_result_color,
+        final_result_note=final_result_note,
+        a11y_chart=charts['a11y'],
+        a11y_score=scores['accessibility'],
+        a11y_border=get_score_color_border(scores['accessibility']),
+        a11y_color_text=get_score_color_text(scores['accessibility']),
+        bestp_chart=charts['bestp'],
+        bestp_score=scores['best_practices'],
+        bestp_border=get_score_color_border(scores['best_practices']),
+        bestp_color_text=get_score_color_text(scores['best_practices']),
+        seo_chart=charts['seo'],
+        seo_score=scores['seo'],
+        seo_border=get_score_color_border(scores['seo']),
+        seo_color_text=get_score_color_text(scores['seo']),
+        baseline_th=baseline_th,
+        metrics_rows_html=''.join(metrics_rows),
+        profiles_html=profiles_html,
+        flow_html=flow_html,
+        load_html=load_html,
+        budget_html=budget_html,
+        run_stats_html=run_stats_html,
+        diagnostics_html=diagnostics_html,
+        deep_dive_html=deep_dive_html,
+        pipeline_timing_html=pipeline_timing_html,
+        weighting_html=weighting_html,
+        chart_script=chart_script,
+    )
+    if offline:
+        page = inline_stylesheet(page)
+    return page
+
+
+def load_report(path, stream=False):
+    """
+    Loads a merged report from disk, full or compact, plain or gzip/zstd
+    compressed (a missing `merged-report.json` falls back to its .gz/.zst copy).
+    With stream=True the file is scanned incrementally and heavy subtrees
+    (screenshots, i18n, long item tables) are never materialized.
+    """
+    if stream:
+        return stream_report_file(path)
+    with open_report_text(path) as f:
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Lighthouse performance dashboard.")
+    parser.add_argument('--input', default='lighthouse/merged-report.json',
+                        help="Merged Selenium + Lighthouse JSON report")
+    parser.add_argument('--output', default='lighthouse_performance_dashboard.html',
+                        help="HTML dashboard to write")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the input instead of loading it whole (for very large reports)")
+    parser.add_argument('--offline', action='store_true',
+                        help="Write a self-contained dashboard (inlined CSS, SVG charts, no network)")
+    parser.add_argument('--history', metavar='DB',
+                        help="Append this run's scores and metrics to a SQLite trend store")
+    parser.add_argument('--run-id', default=os.environ.get('RUN_ID', ''),
+                        help="Run identifier stored alongside the history entry")
+    parser.add_argument('--min-pass-score', type=int, default=MIN_PASS_SCORE,
+                        help="Minimum performance score for a PASS result")
+    parser.add_argument('--baseline', metavar='PATH',
+                        help="Baseline merged report or stored summary to compare against")
+    parser.add_argument('--baseline-diff', metavar='PATH', default='lighthouse/baseline-diff.json',
+                        help="Where to write the JSON diff when --baseline is given")
+    parser.add_argument('--baseline-any-page', action='store_true',
+                        help="Compare against a baseline of a different page URL instead of refusing")
+    parser.add_argument('--write-baseline', metavar='PATH',
+                        help="Store this run's summary for use as a future --baseline")
+    parser.add_argument('--budgets', metavar='PATH',
+                        help="Check the report against a budget file; exceeding any budget exits with 1")
+    parser.add_argument('--budget-report', metavar='PATH', default='lighthouse/budget-report.json',
+                        help="Where to write the budget check results as JSON")
+    parser.add_argument('--cache-dir', default='.report-cache',
+                        help="Extraction cache, keyed by the input's content hash")
+    parser.add_argument('--cache-max-mb', type=int, default=64,
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-parse and re-extract the input")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="Write the pipeline timing spans (Node runner + this script) as Chrome trace JSON")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Run under cProfile, save the stats to PATH and print the top functions")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        return run(args)
+
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return run(args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"Profile saved: {args.profile} (top functions by cumulative time below)")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+
+
+def run(args):
+    """
+    The load / extract / render / write pipeline for parsed arguments.
+    """
+    tracer = Tracer()
+
     # Define input and output file paths
-    # Using the specific file name provided by the user
-    json_input_file = 'lighthouse/merged-report.json'
-    html_output_file = 'lighthouse_performance_dashboard.html'
+    json_input_file = args.input
+    html_output_file = args.output
 
-    # Define the minimum score required to pass
-    MIN_PASS_SCORE = 90
+    cache = None
+    render_key = None
+    if not args.no_cache:
+        # Imported here: extract_cache builds on this module
+        from extract_cache import ExtractCache
+        cache = ExtractCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
 
     print(f"Loading JSON data from {json_input_file}...")
 
-    # 1. Load data
+    # 1. Load data and 2. extract and process it (from the cache when the input is unchanged)
     try:
-        with open(json_input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if cache:
+            if not (args.history or args.baseline or args.write_baseline or args.budgets or args.trace):
+                # Nothing else needs the data: skip the run if the dashboard is already current
+                with tracer.span('content hash'):
+                    render_key = cache.render_key(json_input_file, min_pass_score=args.min_pass_score,
+                                                  offline=args.offline)
+                if cache.output_is_current(html_output_file, render_key):
+                    print(f"Input and renderer unchanged; {html_output_file} is up to date.")
+                    print(cache.summary())
+                    return 0
+            report_data = cache.extract(json_input_file, stream=args.stream, tracer=tracer)
+        else:
+            with tracer.span('load'):
+                data = load_report(json_input_file, stream=args.stream)
+            print("Processing data and calculating scores...")
+            with tracer.span('extract'):
+                report_data = extract_report_data(data)
     except FileNotFoundError:
         print(f"Error: Input file not found at {json_input_file}")
-        return
-    except json.JSONDecodeError:
+        return 2
+    except ReportSchemaError as e:
+        # Nothing to chart: fail fast rather than render an all-zero FAIL
+        print(f"Error: {json_input_file} has no usable Lighthouse report ({e})")
+        return 2
+    except ValueError:
         print(f"Error: Could not decode JSON from {json_input_file}")
-        return
-
-    # 2. Extract and process data
-    print("Processing data and calculating scores...")
-    report_data = extract_report_data(data)
-
-    if not report_data:
-        print("Failed to process report data.")
-        return
+        return 2
+
+    if report_data['validation']['status'] != 'ok':
+        print(f"Warning: {json_input_file} is {describe_validation(report_data['validation'])}")
+
+    if args.history:
+        # Imported here: trend_store builds on this module
+        from trend_store import open_store, record_run
+        conn = open_store(args.history)
+        try:
+            with tracer.span('history'):
+                record_run(conn, report_data, run_id=args.run_id)
+            print(f"Recorded run in trend store: {args.history}")
+        except ValueError as e:
+            print(f"Not recorded in trend store: {e}")
+        finally:
+            conn.close()
+
+    exit_code = 0
+    if args.baseline or args.write_baseline:
+        # Imported here: baseline builds on this module
+        from baseline import compare_to_baseline, load_baseline, write_baseline
+        if args.write_baseline:
+            write_baseline(report_data, args.write_baseline)
+            print(f"Baseline summary saved: {args.write_baseline}")
+        if args.baseline:
+            try:
+                baseline = load_baseline(args.baseline)
+            except (OSError, ValueError) as e:
+                print(f"Error loading baseline {args.baseline}: {e}")
+                return 1
+            try:
+                with tracer.span('baseline compare'):
+                    report_data['baseline_diff'] = compare_to_baseline(
+                        report_data, baseline, allow_other_page=args.baseline_any_page)
+            except ValueError as e:
+                print(f"Error comparing against baseline {args.baseline}: {e}")
+                return 1
+            if report_data['baseline_diff']['page_mismatch']:
+                print(f"WARNING: baseline page {baseline['page_url']} is not this run's page "
+                      f"{report_data['page_url']}; deltas compare different pages")
+            os.makedirs(os.path.dirname(args.baseline_diff) or '.', exist_ok=True)
+            with open(args.baseline_diff, 'w', encoding='utf-8') as f:
+                json.dump(report_data['baseline_diff'], f, indent=2)
+            regressions = report_data['baseline_diff']['regressions']
+            if regressions:
+                print(f"Regressions vs baseline: {', '.join(regressions)}")
+                exit_code = 1
+            else:
+                print("No regressions vs baseline.")
+            print(f"Baseline diff saved: {args.baseline_diff}")
+
+    if args.budgets:
+        # Imported here: budgets builds on this module
+        from budgets import evaluate_budget, load_budgets, select_budget, write_budget_report
+        try:
+            budgets = load_budgets(args.budgets)
+        except (OSError, ValueError) as e:
+            print(f"Error loading budgets {args.budgets}: {e}")
+            return 1
+        budget = select_budget(budgets, report_data.get('page'), report_data['page_url'])
+        if budget is None:
+            print(f"No budget in {args.budgets} matches page {report_data.get('page')!r}")
+        else:
+            with tracer.span('budgets'):
+                report_data['budget_result'] = evaluate_budget(report_data, budget)
+            write_budget_report([report_data['budget_result']], args.budget_report)
+            budget_result = report_data['budget_result']
+            if budget_result['violations']:
+                print(f"Over budget: {', '.join(budget_result['violations'])}")
+            if budget_result['not_measured']:
+                print(f"Not measured: {', '.join(budget_result['not_measured'])}")
+            if budget_result['passed']:
+                print("All budgets met.")
+            else:
+                exit_code = 1
+            print(f"Budget report saved: {args.budget_report}")
 
     # 3. Generate HTML
+    # The dashboard lists the spans known before rendering; --trace gets them all
+    runner_events = report_data['pipeline_trace']
+    report_data['pipeline_trace'] = runner_events + tracer.events
     print("Generating HTML report...")
-    html_content = generate_html_report(report_data, min_pass_score=MIN_PASS_SCORE)
+    with tracer.span('render'):
+        html_content = generate_html_report(report_data, min_pass_score=args.min_pass_score,
+                                            offline=args.offline)
 
     # 4. Save HTML file
     try:
-        with open(html_output_file, 'w', encoding='utf-8') as f:
+        with tracer.span('write'), open(html_output_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
         print(f"Successfully generated report: {html_output_file}")
+        if render_key:
+            cache.record_output(html_output_file, render_key)
     except IOError as e:
         print(f"Error writing HTML file: {e}")
 
+    if cache:
+        cache.prune()
+        print(cache.summary())
+
+    if args.trace:
+        write_trace(args.trace, runner_events + tracer.events)
+        print(f"Pipeline trace saved: {args.trace}")
+
+    return exit_code
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -1,45 +1,286 @@
 import lighthouse from "lighthouse";
 import chromeLauncher from "chrome-launcher";
+import { fork } from "child_process";
 import fs from "fs";
+import path from "path";
+import { fileURLToPath } from "url";
+import { spanOrRun } from "./pipeline-trace.js";
+import { profileFlags } from "./throttling-profiles.js";
 
-export async function runLighthouse(page) {
-    console.log(`💡 Running Lighthouse for page: ${page}`);
-
-    let url = "";
+function lighthouseUrl(page) {
     if (page === "login") {
-        url = "https://demoapp-ashen.vercel.app/login/";
+        return "https://demoapp-ashen.vercel.app/login/";
     } else if (page === "home") {
-        url = "https://demoapp-ashen.vercel.app/";
-    } else {
-        console.log("❌ Invalid PAGE for Lighthouse");
-        return null;
+        return "https://demoapp-ashen.vercel.app/";
     }
+    return null;
+}
 
-    const chrome = await chromeLauncher.launch({ chromeFlags: ["--headless"] });
+// Runs one Lighthouse pass against an already running Chrome on `port`.
+// With a `tracer`, the pass and Lighthouse's own phase measures become spans on track `tid`.
+// `flags` override Lighthouse settings, e.g. a throttling profile's profileFlags().
+export async function runLighthouseOnPort(url, port, lightHouseOutputPath, { tracer = null, tid = 1, flags = {} } = {}) {
     const options = {
         logLevel: "info",
         output: "json",
         //onlyCategories: ["performance"],
-        port: chrome.port
+        port,
+        ...flags
     };
 
     try {
-        const runnerResult = await lighthouse(url, options);
+        const runnerResult = await spanOrRun(tracer, "lighthouse pass", () => lighthouse(url, options), { tid });
 
         const reportJson = runnerResult.report;
-        const lightHouseOutputPath = `lighthouse/lh-report-${page}.json`;
 
-        if (!fs.existsSync("lighthouse")) fs.mkdirSync("lighthouse");
+        const outDir = path.dirname(lightHouseOutputPath);
+        if (!fs.existsSync(outDir)) fs.mkdirSync(outDir, { recursive: true });
 
-        fs.writeFileSync(lightHouseOutputPath, reportJson);
+        spanOrRun(tracer, "write lhr", () => fs.writeFileSync(lightHouseOutputPath, reportJson), { tid });
 
         console.log(`📄 Lighthouse report saved → ${lightHouseOutputPath}`);
 
-        return JSON.parse(reportJson);
+        const lhr = JSON.parse(reportJson);
+        tracer?.addLighthouseTiming(lhr, { tid });
+        return lhr;
     } catch (err) {
         console.log("❌ Lighthouse Failed:", err);
         return null;
+    }
+}
+
+export async function runSingleLighthouse(url, lightHouseOutputPath, traceOptions) {
+    const chrome = await spanOrRun(traceOptions.tracer, "chrome launch",
+        () => chromeLauncher.launch({ chromeFlags: ["--headless"] }), { tid: traceOptions.tid });
+    try {
+        return await runLighthouseOnPort(url, chrome.port, lightHouseOutputPath, traceOptions);
     } finally {
         await chrome.kill();
     }
 }
+
+// Lighthouse keeps module-level state (its logger, performance marks, the
+// collected trace), so passes that overlap in one Node process interfere.
+// forkLighthouseWorker() starts a child process (lighthouse-worker.js) whose
+// run() has runLighthouseOnPort's signature; give each concurrent worker its
+// own. A null `port` makes the child launch its own Chrome for the pass. A
+// child that dies fails its pass and is replaced on the next run().
+export function forkLighthouseWorker() {
+    let child = null;
+    let nextId = 0;
+    const pending = new Map();
+
+    function start() {
+        child = fork(fileURLToPath(new URL("./lighthouse-worker.js", import.meta.url)));
+        child.on("message", ({ id, ...reply }) => {
+            pending.get(id)?.(reply);
+            pending.delete(id);
+        });
+        child.on("error", err => console.log("❌ Lighthouse worker:", err));
+        child.on("exit", code => {
+            child = null;
+            for (const resolve of pending.values()) resolve({ ok: false, error: `exited with code ${code}` });
+            pending.clear();
+        });
+    }
+
+    async function run(url, port, lightHouseOutputPath, { tracer = null, tid = 1, flags = {} } = {}) {
+        if (!child) start();
+        const id = nextId++;
+        const reply = await new Promise(resolve => {
+            pending.set(id, resolve);
+            child.send({ id, url, port, outputPath: lightHouseOutputPath, flags, tid, traced: Boolean(tracer) });
+        });
+        tracer?.addEvents(reply.events || []);
+        if (!reply.ok) {
+            if (reply.error) console.log(`❌ Lighthouse worker ${reply.error}`);
+            return null;
+        }
+        return JSON.parse(fs.readFileSync(lightHouseOutputPath, "utf-8"));
+    }
+
+    function close() {
+        // The child exits once its IPC channel is gone
+        if (child) child.disconnect();
+    }
+
+    return { run, close };
+}
+
+// With `port`, Lighthouse reuses an already running (shared) Chrome.
+export async function runLighthouse(page, { port, tracer = null } = {}) {
+    console.log(`💡 Running Lighthouse for page: ${page}`);
+
+    const url = lighthouseUrl(page);
+    if (!url) {
+        console.log("❌ Invalid PAGE for Lighthouse");
+        return null;
+    }
+
+    const outputPath = `lighthouse/lh-report-${page}.json`;
+    const traceOptions = { tracer, tid: 1 };
+    return port ? runLighthouseOnPort(url, port, outputPath, traceOptions) : runSingleLighthouse(url, outputPath, traceOptions);
+}
+
+// Runs `runs` Lighthouse passes for one page, at most `parallel` Chrome
+// instances at a time, each concurrent worker in its own child process
+// (forkLighthouseWorker). With `port`, or one worker, the passes run one
+// after another in this process instead. Failed passes are dropped from the
+// returned list. Traced passes land on one track per pass (tid = pass number).
+export async function runLighthouseRuns(page, { runs = 1, parallel = 1, port, tracer = null } = {}) {
+    console.log(`💡 Running Lighthouse ${runs}x for page: ${page} (parallel=${parallel})`);
+
+    const url = lighthouseUrl(page);
+    if (!url) {
+        console.log("❌ Invalid PAGE for Lighthouse");
+        return [];
+    }
+
+    if (port) parallel = 1;
+
+    const results = new Array(runs).fill(null);
+    const workers = Math.max(1, Math.min(parallel, runs));
+    let next = 0;
+    async function worker() {
+        const lighthouseWorker = workers > 1 ? forkLighthouseWorker() : null;
+        try {
+            while (next < runs) {
+                const i = next++;
+                const outputPath = `lighthouse/lh-report-${page}-run${i + 1}.json`;
+                const traceOptions = { tracer, tid: i + 1 };
+                if (lighthouseWorker) {
+                    results[i] = await lighthouseWorker.run(url, null, outputPath, traceOptions);
+                } else {
+                    results[i] = port
+                        ? await runLighthouseOnPort(url, port, outputPath, traceOptions)
+                        : await runSingleLighthouse(url, outputPath, traceOptions);
+                }
+            }
+        } finally {
+            lighthouseWorker?.close();
+        }
+    }
+    await Promise.all(Array.from({ length: workers }, worker));
+
+    return results.filter(Boolean);
+}
+
+// Runs `runs` passes of `url` under every throttling profile (see
+// throttling-profiles.js), spreading the profiles over `parallel` Chrome
+// instances, each driven from its own child process (forkLighthouseWorker).
+// With `port` they run one after another on that shared Chrome, through
+// `runPass` (in this process unless the caller passes a forked worker's run).
+// Returns one { profile, lhr, runs, reportPath } per profile, in order, where
+// lhr is the median pass (null if every pass failed).
+export async function runProfileMatrix(url, profiles, { outDir = "lighthouse", filePrefix = "lh-report", runs = 1,
+                                                      parallel = 1, port, tracer = null,
+                                                      runPass = runLighthouseOnPort } = {}) {
+    console.log(`💡 Running Lighthouse under ${profiles.length} profiles for ${url} (parallel=${parallel})`);
+    if (port) parallel = 1;
+
+    const results = new Array(profiles.length).fill(null);
+    const workers = Math.max(1, Math.min(parallel, profiles.length));
+    let next = 0;
+    async function worker() {
+        let chrome = null;
+        const lighthouseWorker = workers > 1 ? forkLighthouseWorker() : null;
+        const runWorkerPass = lighthouseWorker ? lighthouseWorker.run : runPass;
+        try {
+            while (next < profiles.length) {
+                const i = next++;
+                const profile = profiles[i];
+                // One track per profile pass in the trace
+                const tid = i * runs + 1;
+                if (!port && !chrome) {
+                    chrome = await spanOrRun(tracer, "chrome launch",
+                        () => chromeLauncher.launch({ chromeFlags: ["--headless"] }), { tid });
+                }
+                const lhrs = [];
+                const reportPaths = new Map();
+                for (let run = 0; run < runs; run++) {
+                    const suffix = runs > 1 ? `-run${run + 1}` : "";
+                    const outputPath = `${outDir}/${filePrefix}-${profile.name}${suffix}.json`;
+                    const lhr = await runWorkerPass(url, port || chrome.port, outputPath,
+                        { tracer, tid: tid + run, flags: profileFlags(profile) });
+                    if (lhr) {
+                        lhrs.push(lhr);
+                        reportPaths.set(lhr, outputPath);
+                    }
+                }
+                const lhr = pickMedianRun(lhrs);
+                results[i] = {
+                    profile,
+                    lhr,
+                    runs: runs > 1 ? lhrs.map(summarizeRun) : null,
+                    reportPath: reportPaths.get(lhr) || null
+                };
+            }
+        } finally {
+            lighthouseWorker?.close();
+            if (chrome) await chrome.kill();
+        }
+    }
+    await Promise.all(Array.from({ length: workers }, worker));
+    return results;
+}
+
+// runProfileMatrix for one of the known pages.
+export async function runLighthouseProfiles(page, profiles, options = {}) {
+    const url = lighthouseUrl(page);
+    if (!url) {
+        console.log("❌ Invalid PAGE for Lighthouse");
+        return [];
+    }
+    return runProfileMatrix(url, profiles, { ...options, filePrefix: `lh-report-${page}` });
+}
+
+// The merged report's `profiles` block, keyed by profile name: its settings
+// plus the scores and metrics of its median pass (the full LHR stays on disk).
+export function summarizeProfiles(results) {
+    const profiles = {};
+    for (const { profile, lhr, runs, reportPath } of results) {
+        const { name, ...settings } = profile;
+        profiles[name] = lhr
+            ? { settings, ...summarizeRun(lhr), runs, report: reportPath }
+            : { settings, error: "Lighthouse failed" };
+    }
+    return profiles;
+}
+
+// The pass whose performance score is the median; it stands in as the
+// page's full report while the per-run summaries carry the spread.
+export function pickMedianRun(lhrs) {
+    if (!lhrs.length) return null;
+    const sorted = [...lhrs].sort(
+        (a, b) => (a.categories?.performance?.score ?? 0) - (b.categories?.performance?.score ?? 0)
+    );
+    return sorted[Math.floor((sorted.length - 1) / 2)];
+}
+
+// Keeps only what the Python side needs to aggregate one pass:
+// category scores, the weighted performance auditRefs and their metric audits.
+export function summarizeRun(lhr) {
+    const categories = {};
+    for (const [id, category] of Object.entries(lhr.categories || {})) {
+        categories[id] = { score: category.score };
+    }
+
+    const audits = {};
+    const weightedRefs = (lhr.categories?.performance?.auditRefs || []).filter(ref => ref.weight > 0);
+    if (categories.performance) {
+        categories.performance.auditRefs = weightedRefs.map(ref => ({ id: ref.id, weight: ref.weight }));
+    }
+    for (const ref of weightedRefs) {
+        const audit = lhr.audits?.[ref.id];
+        if (!audit) continue;
+        audits[ref.id] = {
+            title: audit.title,
+            score: audit.score,
+            numericValue: audit.numericValue,
+            numericUnit: audit.numericUnit,
+            displayValue: audit.displayValue
+        };
+    }
+
+    return { fetchTime: lhr.fetchTime, categories, audits };
+}
@@ -0,0 +1,15 @@
+import { createTracer } from "./pipeline-trace.js";
+import { runLighthouseOnPort, runSingleLighthouse } from "./lighthouse-runner.js";
+
+// Child process behind forkLighthouseWorker() (lighthouse-runner.js): runs one
+// Lighthouse pass per message, so passes that overlap in time never share a
+// Node process. The LHR is written to `outputPath` as usual; the reply only
+// says whether the pass worked and carries this process's trace events.
+process.on("message", async ({ id, url, port, outputPath, flags, tid, traced }) => {
+    const tracer = traced ? createTracer("lighthouse-worker") : null;
+    const options = { tracer, tid, flags };
+    const lhr = port
+        ? await runLighthouseOnPort(url, port, outputPath, options)
+        : await runSingleLighthouse(url, outputPath, options);
+    process.send({ id, ok: Boolean(lhr), events: tracer ? tracer.events : [] });
+});
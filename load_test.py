@@ -0,0 +1,465 @@
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import ssl
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from generate_report import format_latency, load_report
+from report_stream import resolve_report_path
+
+# The demo SPA's API buttons (test-home-lambdatest.js checks they exist) and the
+# FastAPI route each one calls. --endpoint NAME=PATH overrides or adds routes.
+ENDPOINTS = {
+    'Root': '/',
+    'Hello': '/hello',
+    'Data': '/data',
+    'Compute': '/compute',
+    'Items': '/items',
+}
+
+DEFAULT_BASE_URL = os.environ.get('API_BASE_URL', 'http://127.0.0.1:8000')
+
+# Percentiles reported per endpoint, in per mille; keys as they appear in the `load` block.
+PERCENTILES = (('p50', 500), ('p90', 900), ('p99', 990), ('p99_9', 999))
+
+
+# --- 1. Latency histogram ---
+
+class LatencyHistogram:
+    """
+    Log-linear latency buckets in the style of HdrHistogram. Values (in
+    microseconds) below 2**SUB_BUCKET_BITS are counted exactly; above that
+    every power of two is split into 2**(SUB_BUCKET_BITS - 1) buckets, so a
+    percentile is off by at most 0.4% however long the run, in constant memory.
+    """
+
+    SUB_BUCKET_BITS = 8
+
+    def __init__(self):
+        self.counts = Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        shift = value.bit_length() - self.SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return (shift << (self.SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+    def _value(self, index):
+        """
+        The midpoint of bucket `index`.
+        """
+        half = 1 << (self.SUB_BUCKET_BITS - 1)
+        if index < 2 * half:
+            return index
+        shift = index // half - 1
+        return ((index % half + half) << shift) + (1 << shift) // 2
+
+    def record(self, micros):
+        micros = max(int(micros), 0)
+        self.counts[self._index(micros)] += 1
+        self.count += 1
+        self.total += micros
+        self.min = micros if self.min is None else min(self.min, micros)
+        self.max = micros if self.max is None else max(self.max, micros)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def summary(self):
+        """
+        {'min', 'mean', 'p50', 'p90', 'p99', 'p99_9', 'max'} in ms, or None when empty.
+        """
+        if not self.count:
+            return None
+        summary = {'min': self.min / 1000, 'mean': self.total / self.count / 1000}
+        buckets = sorted(self.counts.items())
+        seen = 0
+        position = 0
+        for key, per_mille in PERCENTILES:
+            # Nearest-rank percentile, clamped to the exact extremes
+            rank = max(1, -(-self.count * per_mille // 1000))
+            while seen < rank:
+                index, count = buckets[position]
+                seen += count
+                position += 1
+            summary[key] = min(max(self._value(index), self.min), self.max) / 1000
+        summary['max'] = self.max / 1000
+        return summary
+
+
+# --- 2. Pooled HTTP/1.1 client ---
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections to one origin, at most `size` of them in
+    use at once. Idle connections are reused last-in first-out, so a steady
+    load runs over a handful of warm sockets instead of a handshake per call.
+    """
+
+    def __init__(self, base_url, size, timeout):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Not an http(s) URL: {base_url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.host_header = parts.netloc
+        self.base_path = parts.path.rstrip('/')
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _open(self):
+        self.opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+
+    async def _exchange(self, connection, path):
+        reader, writer = connection
+        writer.write((f"GET {self.base_path}{path} HTTP/1.1\r\nHost: {self.host_header}\r\n"
+                      "User-Agent: load_test.py\r\nAccept: */*\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server")
+        version, status = status_line.split(None, 2)[:2]
+        status = int(status)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        # The body is read in full (and discarded) so its transfer counts in the latency
+        keep_alive = version == b'HTTP/1.1' and headers.get('connection') != 'close'
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if not size:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                await reader.readexactly(size + 2)
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif status >= 200 and status not in (204, 304):
+            await reader.read()
+            keep_alive = False
+        return status, keep_alive
+
+    async def get(self, path):
+        """
+        GETs `path` (relative to the base URL) and returns the status code.
+        """
+        async with self._slots:
+            reused = bool(self._idle)
+            connection = self._idle.pop() if reused else await self._open()
+            try:
+                try:
+                    status, keep_alive = await asyncio.wait_for(self._exchange(connection, path), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if not reused:
+                        raise
+                    # The server dropped the idle socket; a GET is safe to retry once
+                    connection[1].close()
+                    connection = await self._open()
+                    status, keep_alive = await asyncio.wait_for(self._exchange(connection, path), self.timeout)
+            except BaseException:
+                connection[1].close()
+                raise
+            if keep_alive:
+                self._idle.append(connection)
+            else:
+                connection[1].close()
+            return status
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+# --- 3. Load generator ---
+
+def _rate(part, whole):
+    return part / whole if whole else 0.0
+
+
+def _endpoint_result(name, path, histogram, errors, elapsed):
+    requests = histogram.count + sum(errors.values())
+    return {
+        'name': name,
+        'path': path,
+        'requests': requests,
+        'errors': sum(errors.values()),
+        'error_rate': _rate(sum(errors.values()), requests),
+        'throughput_rps': _rate(requests, elapsed),
+        'latency_ms': histogram.summary(),
+        'error_reasons': dict(errors.most_common()),
+    }
+
+
+async def run_load(base_url, endpoints=None, duration=10.0, concurrency=10, rps=0, timeout=10.0):
+    """
+    Drives `endpoints` ({name: path}) round-robin for `duration` seconds and
+    returns the `load` block of the merged report.
+
+    With rps=0 the run is closed-loop: `concurrency` workers each send their
+    next request as soon as the last one finishes. With rps > 0 requests are
+    started on a fixed schedule and timed from when they were due, so time
+    spent queueing behind a slow server counts (no coordinated omission).
+    """
+    endpoints = dict(endpoints or ENDPOINTS)
+    names = list(endpoints)
+    histograms = {name: LatencyHistogram() for name in names}
+    errors = {name: Counter() for name in names}
+    pool = ConnectionPool(base_url, concurrency, timeout)
+    loop = asyncio.get_running_loop()
+    started_at = datetime.now(timezone.utc)
+    start = loop.time()
+    deadline = start + duration
+
+    async def call(name, due):
+        try:
+            status = await pool.get(endpoints[name])
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            errors[name][type(e).__name__] += 1
+            return
+        if status >= 400:
+            errors[name][f"HTTP {status}"] += 1
+            return
+        histograms[name].record((loop.time() - due) * 1_000_000)
+
+    sent = 0
+    try:
+        if rps > 0:
+            in_flight = {}
+            while start + sent / rps < deadline:
+                due = start + sent / rps
+                if due > loop.time():
+                    await asyncio.sleep(due - loop.time())
+                name = names[sent % len(names)]
+                task = asyncio.create_task(call(name, due))
+                in_flight[task] = name
+                task.add_done_callback(in_flight.pop)
+                sent += 1
+            if in_flight:
+                await asyncio.wait(list(in_flight), timeout=timeout)
+            # Still waiting for a connection or a response when the run ended
+            unfinished = list(in_flight.items())
+            for task, name in unfinished:
+                task.cancel()
+                errors[name]['unfinished'] += 1
+            await asyncio.gather(*(task for task, _ in unfinished), return_exceptions=True)
+        else:
+            async def worker():
+                nonlocal sent
+                while loop.time() < deadline:
+                    name = names[sent % len(names)]
+                    sent += 1
+                    await call(name, loop.time())
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        pool.close()
+    elapsed = loop.time() - start
+
+    overall = LatencyHistogram()
+    for histogram in histograms.values():
+        overall.merge(histogram)
+    results = [_endpoint_result(name, endpoints[name], histograms[name], errors[name], elapsed) for name in names]
+    requests = sum(result['requests'] for result in results)
+    error_count = sum(result['errors'] for result in results)
+    return {
+        'target': base_url,
+        'started_at': started_at.isoformat().replace('+00:00', 'Z'),
+        'mode': 'open' if rps > 0 else 'closed',
+        'rps_target': rps or None,
+        'concurrency': concurrency,
+        'duration_s': elapsed,
+        'connections_opened': pool.opened,
+        'requests': requests,
+        'errors': error_count,
+        'error_rate': _rate(error_count, requests),
+        'throughput_rps': _rate(requests, elapsed),
+        'latency_ms': overall.summary(),
+        'endpoints': results,
+    }
+
+
+# --- 4. Local stub server ---
+
+def _stub_payload(path):
+    if path == '/':
+        return {'message': 'Welcome to the Simple FastAPI backend'}
+    if path == '/hello':
+        return {'message': 'Hello, World!'}
+    if path == '/data':
+        return {'data': [{'id': i, 'value': i * 10} for i in range(20)]}
+    if path == '/compute':
+        return {'result': sum(i * i for i in range(10_000))}
+    if path == '/items':
+        return {'items': [{'id': i, 'name': f"Item {i}"} for i in range(50)]}
+    return None
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open, so the client's pooling is exercised
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every response
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def do_GET(self):
+        payload = _stub_payload(urlsplit(self.path).path.rstrip('/') or '/')
+        if self.delay:
+            time.sleep(self.delay)
+        body = json.dumps(payload if payload is not None else {'detail': 'Not Found'}).encode('utf-8')
+        self.send_response(200 if payload is not None else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host='127.0.0.1', port=0, delay_ms=0):
+    """
+    Serves canned JSON for the default ENDPOINTS on a background thread, for
+    offline CI. Returns (server, base_url); call server.shutdown() when done.
+    """
+    handler = type('StubHandler', (_StubHandler,), {'delay': delay_ms / 1000})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# --- 5. Merged report ---
+
+def merge_into_report(path, load):
+    """
+    Adds `load` to the merged report at `path` (or its .gz/.zst copy),
+    rewriting it in the same encoding.
+    """
+    path = resolve_report_path(path)
+    report = load_report(path)
+    report['load'] = load
+    body = json.dumps(report, indent=2).encode('utf-8')
+    if path.endswith('.gz'):
+        body = gzip.compress(body)
+    elif path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(f"{path} is zstd-compressed; install the 'zstandard' package to update it")
+        body = zstandard.ZstdCompressor().compress(body)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(body)
+    os.replace(temp_path, path)
+    return path
+
+
+def print_summary(load):
+    print(f"{load['requests']:,} requests in {load['duration_s']:.1f}s "
+          f"({load['throughput_rps']:,.1f} req/s, {load['error_rate']:.2%} errors, "
+          f"{load['connections_opened']} connections)")
+    for result in load['endpoints'] + [dict(load, name='All')]:
+        latency = result['latency_ms'] or {}
+        print(f"  {result['name']:<10} " + '  '.join(
+            f"{key.replace('_', '.')} {format_latency(latency.get(key))}" for key, _ in PERCENTILES)
+            + f"  errors {result['errors']:,}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the demo app's API endpoints.")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL,
+                        help="API origin (default: $API_BASE_URL or http://127.0.0.1:8000)")
+    parser.add_argument('--endpoint', action='append', default=[], metavar='NAME=PATH',
+                        help="Add or override an endpoint (repeatable)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run")
+    parser.add_argument('--concurrency', type=int, default=10, help="Connections / requests in flight")
+    parser.add_argument('--rps', type=float, default=0,
+                        help="Target requests per second; 0 sends as fast as the concurrency allows")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument('--stub', action='store_true',
+                        help="Start a local stub server and test it instead of --base-url (offline CI)")
+    parser.add_argument('--stub-delay-ms', type=float, default=0, help="Latency the stub adds to each response")
+    parser.add_argument('--json', metavar='PATH', default='lighthouse/load-report.json',
+                        help="Where to write the results as JSON")
+    parser.add_argument('--merge', metavar='PATH',
+                        help="Merged report to add the results to as its `load` block")
+    parser.add_argument('--max-error-rate', type=float,
+                        help="Exit with 1 when the error rate (0-1) is above this")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    endpoints = dict(ENDPOINTS)
+    for entry in args.endpoint:
+        name, sep, path = entry.partition('=')
+        if not sep or not path.startswith('/'):
+            print(f"Invalid --endpoint {entry!r}: expected NAME=/path")
+            return 2
+        endpoints[name] = path
+
+    server = None
+    base_url = args.base_url
+    if args.stub:
+        server, base_url = start_stub_server(delay_ms=args.stub_delay_ms)
+        print(f"Stub server listening on {base_url}")
+    try:
+        print(f"Load testing {base_url} for {args.duration:g}s "
+              f"({args.concurrency} connections, {f'{args.rps:g} req/s' if args.rps else 'closed loop'})...")
+        load = asyncio.run(run_load(base_url, endpoints, args.duration, args.concurrency, args.rps, args.timeout))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    print_summary(load)
+    os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(load, f, indent=2)
+    print(f"Load report saved: {args.json}")
+    if args.merge:
+        try:
+            print(f"Added the load block to {merge_into_report(args.merge, load)}")
+        except (OSError, ValueError) as e:
+            print(f"Error updating {args.merge}: {e}")
+            return 2
+
+    if args.max_error_rate is not None and load['error_rate'] > args.max_error_rate:
+        print(f"Error rate {load['error_rate']:.2%} is above {args.max_error_rate:.2%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,39 +4,96 @@ console.log("DEBUG process.env.PAGE =", process.env.PAGE);
 
 import { runLoginTest } from "./test-login-lambdatest.js";
 import { runHomeTest } from "./test-home-lambdatest.js";
-import { runLighthouse } from "./lighthouse-runner.js";
+import { runLighthouse, runLighthouseProfiles, runLighthouseRuns, pickMedianRun, summarizeProfiles, summarizeRun } from "./lighthouse-runner.js";
 import { mergeReports } from "./merge-reports.js";
+import { launchSharedChrome } from "./chrome-session.js";
+import { createTracer } from "./pipeline-trace.js";
+import { loadProfiles, parseProfileList } from "./throttling-profiles.js";
 
 const PAGE = process.env.PAGE;
+// Lighthouse passes per page and how many Chrome instances may run them at once
+const LH_RUNS = Math.max(1, Number(process.env.LH_RUNS) || 1);
+const LH_PARALLEL = Math.max(1, Number(process.env.LH_PARALLEL) || 1);
+// Launch Chrome once and share it between the Selenium and Lighthouse phases
+const SHARE_CHROME = ["1", "true"].includes(String(process.env.SHARE_CHROME).toLowerCase());
+// Throttling/emulation profiles to run Lighthouse under, e.g. "desktop,mobile-slow-4g"
+const LH_PROFILES = loadProfiles(parseProfileList(process.env.LH_PROFILES));
 
 console.log(`🚀 Starting Execution for PAGE=${PAGE}`);
 
 async function main() {
     let seleniumResult = null;
     let lighthouseJson = null;
+    let sharedChrome = null;
+    const timings = { sharedChrome: SHARE_CHROME };
+    // Every phase is also a span in the pipeline trace (lighthouse/trace-<page>.json)
+    const tracer = createTracer(`main-runner ${PAGE}`);
+    const timed = async (phase, fn) => {
+        const start = Date.now();
+        try {
+            return await tracer.span(phase, fn);
+        } finally {
+            timings[`${phase}Ms`] = Date.now() - start;
+        }
+    };
 
-    // -----------------------------
-    // 1️⃣ Run Selenium for this page
-    // -----------------------------
-    if (PAGE === "login") {
-        seleniumResult = await runLoginTest();
-    } else if (PAGE === "home") {
-        seleniumResult = await runHomeTest();
-    } else {
+    if (!["login", "home"].includes(PAGE)) {
         console.log("❌ Invalid PAGE value. Must be login or home.");
         return;
     }
 
-    // -------------------------------------
-    // 2️⃣ Run Lighthouse for this same page
-    // -------------------------------------
-    lighthouseJson = await runLighthouse(PAGE);
+    try {
+        if (SHARE_CHROME) {
+            sharedChrome = await timed("chromeLaunch", launchSharedChrome);
+            console.log(`🌐 Shared Chrome on ${sharedChrome.debuggerAddress}`);
+        }
+        const debuggerAddress = sharedChrome?.debuggerAddress;
+        const port = sharedChrome?.port;
 
-    // -----------------------------------------------------
-    // 3️⃣ Merge Selenium + Lighthouse into final JSON report
-    // -----------------------------------------------------
-    console.log(`🔄 Merging reports for: ${PAGE}`);
-    mergeReports(PAGE, seleniumResult, lighthouseJson);
+        // -----------------------------
+        // 1️⃣ Run Selenium for this page
+        // -----------------------------
+        seleniumResult = await timed("selenium", () =>
+            PAGE === "login" ? runLoginTest({ debuggerAddress, tracer }) : runHomeTest({ debuggerAddress, tracer }));
+
+        // -------------------------------------
+        // 2️⃣ Run Lighthouse for this same page
+        // -------------------------------------
+        let lighthouseRuns = null;
+        let profileResults = null;
+        await timed("lighthouse", async () => {
+            if (LH_PROFILES.length) {
+                // The first profile's median pass stands in as the page's report
+                profileResults = await runLighthouseProfiles(PAGE, LH_PROFILES,
+                    { runs: LH_RUNS, parallel: LH_PARALLEL, port, tracer });
+                lighthouseJson = profileResults[0]?.lhr || null;
+                lighthouseRuns = profileResults[0]?.runs || null;
+            } else if (LH_RUNS > 1) {
+                const lhrs = await runLighthouseRuns(PAGE, { runs: LH_RUNS, parallel: LH_PARALLEL, port, tracer });
+                lighthouseJson = pickMedianRun(lhrs);
+                lighthouseRuns = lhrs.map(summarizeRun);
+            } else {
+                lighthouseJson = await runLighthouse(PAGE, { port, tracer });
+            }
+        });
+
+        // -----------------------------------------------------
+        // 3️⃣ Merge Selenium + Lighthouse into final JSON report
+        // -----------------------------------------------------
+        console.log(`🔄 Merging reports for: ${PAGE}`);
+        console.log("⏱ Phase timings (ms):", timings);
+        // Compact merged reports point back at the full LHR written by runLighthouse
+        const fullReportPath = profileResults
+            ? profileResults[0]?.reportPath || null
+            : LH_RUNS > 1 ? null : `lighthouse/lh-report-${PAGE}.json`;
+        const profiles = profileResults ? summarizeProfiles(profileResults) : null;
+        const { passed } = mergeReports(PAGE, seleniumResult, lighthouseJson, lighthouseRuns,
+            { timings, tracer, fullReportPath, profiles, exitOnFail: false });
+        tracer.write(`lighthouse/trace-${PAGE}.json`);
+        if (!passed) process.exitCode = 1;   // ← FAIL THE JOB, once the trace is written
+    } finally {
+        if (sharedChrome) await sharedChrome.kill();
+    }
 }
 
 main();
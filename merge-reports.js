@@ -1,37 +1,230 @@
 import fs from "fs";
+import zlib from "zlib";
+import { spanOrRun } from "./pipeline-trace.js";
 
-export function mergeReports(page, seleniumResult, lighthouseJson) {
+function median(values) {
+  const sorted = [...values].sort((a, b) => a - b);
+  const mid = Math.floor(sorted.length / 2);
+  return sorted.length % 2 ? sorted[mid] : (sorted[mid - 1] + sorted[mid]) / 2;
+}
+
+const DIAGNOSTIC_PASS_SCORE = 0.9;
+
+// Same default gate as generate_report.py (MIN_PASS_SCORE); both honour the env override.
+const MIN_PASS_SCORE = Number(process.env.MIN_PASS_SCORE) || 90;
+
+// Audit tables behind the dashboard's trace deep dive (audit_details.py), kept
+// even when passing: audit id -> the item field rows are ranked by, largest first.
+const DEEP_DIVE_ITEMS = {
+  "bootup-time": "total",
+  "mainthread-work-breakdown": "duration",
+  "long-tasks": "duration",
+  "render-blocking-resources": "wastedMs",
+  "network-requests": "transferSize",
+  "layout-shifts": "score",
+  "layout-shift-elements": "score"
+};
+// Kept with their details whole: a request tree, a list of small sub-tables
+// and the per-type byte totals budgets.py checks.
+const DETAILS_KEPT_WHOLE = new Set(["critical-request-chains", "largest-contentful-paint-element", "resource-summary"]);
+// budgets.py sums every request per type and origin, so network-requests keeps
+// all of its rows, cut down to these fields. `entity` (Lighthouse 12+) names
+// who served the request; budgets.py classifies third parties by it.
+const REQUEST_FIELDS = ["url", "resourceType", "transferSize", "networkRequestTime", "networkEndTime", "entity"];
+const DEEP_DIVE_TOP_K = 10;
+
+// The k items with the largest numeric `field`, largest first. A k-sized
+// min-heap means long tables (hundreds of requests) are never sorted whole.
+export function topItems(items, field, k = DEEP_DIVE_TOP_K) {
+  const rank = item => (typeof item?.[field] === "number" ? item[field] : -Infinity);
+  const heap = [];
+  const swap = (i, j) => { [heap[i], heap[j]] = [heap[j], heap[i]]; };
+  const siftDown = i => {
+    for (;;) {
+      const left = 2 * i + 1, right = left + 1;
+      let least = i;
+      if (left < heap.length && heap[left].rank < heap[least].rank) least = left;
+      if (right < heap.length && heap[right].rank < heap[least].rank) least = right;
+      if (least === i) return;
+      swap(i, least);
+      i = least;
+    }
+  };
+  for (const item of items) {
+    const entry = { rank: rank(item), item };
+    if (heap.length < k) {
+      heap.push(entry);
+      for (let i = heap.length - 1; i > 0 && heap[(i - 1) >> 1].rank > heap[i].rank; i = (i - 1) >> 1) {
+        swap(i, (i - 1) >> 1);
+      }
+    } else if (k > 0 && entry.rank > heap[0].rank) {
+      heap[0] = entry;
+      siftDown(0);
+    }
+  }
+  return heap.sort((a, b) => b.rank - a.rank).map(entry => entry.item);
+}
+
+// Keeps only what generate_report.py reads from an LHR: category scores,
+// the performance auditRefs, the weighted metric audits, the score and
+// value of every other performance audit (failing ones with the head of
+// their item table) and the top rows of the deep-dive tables and what
+// budgets.py sums. The full LHR stays on disk at `fullReportPath`.
+export function compactLighthouse(lhr, fullReportPath = null) {
+  const categories = {};
+  for (const [id, category] of Object.entries(lhr.categories || {})) {
+    categories[id] = { id, title: category.title, score: category.score };
+  }
+
+  const perfRefs = lhr.categories?.performance?.auditRefs || [];
+  if (categories.performance) {
+    categories.performance.auditRefs = perfRefs.map(ref => ({ id: ref.id, weight: ref.weight, group: ref.group }));
+  }
+
+  const audits = {};
+  const deepDiveIds = [...Object.keys(DEEP_DIVE_ITEMS), ...DETAILS_KEPT_WHOLE];
+  const weights = new Map(perfRefs.map(ref => [ref.id, ref.weight]));
+  for (const id of new Set([...weights.keys(), ...deepDiveIds])) {
+    const audit = lhr.audits?.[id];
+    if (!audit) continue;
+    const isMetric = weights.get(id) > 0;
+    const isFailing = audit.score !== null && audit.score !== undefined && audit.score < DIAGNOSTIC_PASS_SCORE;
+    const isDeepDive = id in DEEP_DIVE_ITEMS || DETAILS_KEPT_WHOLE.has(id);
+    // Every performance audit keeps its score and numericValue (baselines and
+    // budget timings read passing ones too); only these keep their details.
+    // server-response-time also tells the reader which URL was tested.
+    const keepsDetails = isMetric || isFailing || isDeepDive || id === "server-response-time";
+
+    const slim = {
+      id: audit.id,
+      title: audit.title,
+      description: audit.description,
+      score: audit.score,
+      scoreDisplayMode: audit.scoreDisplayMode,
+      numericValue: audit.numericValue,
+      numericUnit: audit.numericUnit,
+      displayValue: audit.displayValue
+    };
+    const items = audit.details?.items;
+    if (DETAILS_KEPT_WHOLE.has(id)) {
+      slim.details = audit.details;
+    } else if (id === "network-requests" && Array.isArray(items)) {
+      slim.details = {
+        type: audit.details.type,
+        items: items.map(item => Object.fromEntries(REQUEST_FIELDS.filter(field => field in item).map(field => [field, item[field]])))
+      };
+    } else if (!isMetric && keepsDetails && Array.isArray(items)) {
+      const kept = id in DEEP_DIVE_ITEMS ? topItems(items, DEEP_DIVE_ITEMS[id]) : items.slice(0, 1);
+      slim.details = { type: audit.details.type, items: kept };
+      if (items.length > kept.length) slim.details.itemCount = items.length;
+    }
+    audits[id] = slim;
+  }
+
+  return {
+    lighthouseVersion: lhr.lighthouseVersion,
+    requestedUrl: lhr.requestedUrl,
+    finalUrl: lhr.finalUrl,
+    finalDisplayedUrl: lhr.finalDisplayedUrl,
+    fetchTime: lhr.fetchTime,
+    categories,
+    audits,
+    // Which entity is first party, and the origins each entity serves from
+    entities: lhr.entities?.map(({ name, isFirstParty, origins }) => ({ name, isFirstParty, origins })),
+    fullReport: fullReportPath
+  };
+}
+
+// Serializes the merged report and compresses it if asked to.
+// Returns { path, body } with the file extension matching the encoding.
+function encodeMerged(final, basePath, format, compress) {
+  const json = format === "compact" ? JSON.stringify(final) : JSON.stringify(final, null, 2);
+  if (compress === "zstd") {
+    if (typeof zlib.zstdCompressSync === "function") {
+      return { path: `${basePath}.zst`, body: zlib.zstdCompressSync(json) };
+    }
+    console.log("⚠ zstd is not available in this Node version, using gzip");
+    compress = "gzip";
+  }
+  if (compress === "gzip") {
+    return { path: `${basePath}.gz`, body: zlib.gzipSync(json) };
+  }
+  return { path: basePath, body: json };
+}
+
+// Writes `<outDir>/merged-report.json` and returns { outputPath, passed }.
+// format: "full" embeds the whole LHR, "compact" only what the dashboard reads.
+// compress: "gzip" or "zstd" writes merged-report.json.gz / .zst instead.
+// With exitOnFail (the default for single-page runs) a low score ends the process.
+// A `tracer` (pipeline-trace.js) times the merge itself and its spans so far are
+// embedded as `trace`, which generate_report.py shows as the pipeline timing.
+export function mergeReports(page, seleniumResult, lighthouseJson, lighthouseRuns = null,
+                             { outDir = "lighthouse", threshold = MIN_PASS_SCORE, exitOnFail = true, timings = null, tracer = null,
+                               format = process.env.MERGED_FORMAT || "full",
+                               compress = process.env.MERGED_COMPRESS || "",
+                               fullReportPath = null, profiles = null } = {}) {
   const final = {
     page: page || "unknown",
     mergedAt: new Date().toISOString(),
     selenium: seleniumResult || { status: "missing" },
     lighthouse: lighthouseJson || { note: "Lighthouse report missing" }
   };
+  if (format === "compact" && lighthouseJson) {
+    final.lighthouse = spanOrRun(tracer, "compact lhr", () => compactLighthouse(lighthouseJson, fullReportPath));
+  }
+  if (timings) {
+    // Per-phase wall-clock durations in ms
+    final.timings = timings;
+  }
+  if (lighthouseRuns?.length) {
+    // Per-pass summaries; generate_report.py aggregates them
+    final.lighthouseRuns = lighthouseRuns;
+  }
+  if (profiles && Object.keys(profiles).length) {
+    // Per throttling profile summaries (summarizeProfiles); `lighthouse` is the first profile's
+    final.profiles = profiles;
+  }
 
   // -------------------------------
   // ⭐ THRESHOLD CHECK EXAMPLE ⭐
   // -------------------------------
-  // Example: Fail job if Lighthouse Performance < 80
-  const performanceScore = final?.lighthouse?.categories?.performance?.score;
+  // Example: Fail job if Lighthouse Performance < threshold (MIN_PASS_SCORE, 90 by default)
+  // With several passes, gate on the median instead of a single noisy sample
+  const runScores = (final.lighthouseRuns || [])
+    .map(run => run?.categories?.performance?.score)
+    .filter(score => typeof score === "number");
+  const performanceScore = runScores.length
+    ? median(runScores)
+    : final?.lighthouse?.categories?.performance?.score;
 
+  let passed = true;
   if (performanceScore !== undefined) {
     const perfPercent = performanceScore * 100;
-    const threshold = 80;
 
     if (perfPercent < threshold) {
       console.error(`❌ Performance score too low: ${perfPercent} < ${threshold}`);
-      process.exit(1);   // ← FAIL THE JOB
+      passed = false;
+      if (exitOnFail) process.exit(1);   // ← FAIL THE JOB
     } else {
       console.log(`✔ Performance score OK: ${perfPercent} ≥ ${threshold}`);
     }
   }
   // -------------------------------
 
-  const outDir = "lighthouse";
-  if (!fs.existsSync(outDir)) fs.mkdirSync(outDir);
+  if (!fs.existsSync(outDir)) fs.mkdirSync(outDir, { recursive: true });
 
-  const outputPath = `${outDir}/merged-report.json`;
-  fs.writeFileSync(outputPath, JSON.stringify(final, null, 2));
+  const basePath = `${outDir}/merged-report.json`;
+  if (tracer) {
+    // Spans up to here; encoding and writing the report cannot time themselves into it
+    final.trace = [...tracer.events];
+  }
+  const { path: outputPath, body } = spanOrRun(tracer, "encode merged", () => encodeMerged(final, basePath, format, compress));
+  // Remove copies in other encodings so readers never pick up a stale one
+  for (const stale of [basePath, `${basePath}.gz`, `${basePath}.zst`]) {
+    if (stale !== outputPath && fs.existsSync(stale)) fs.unlinkSync(stale);
+  }
+  spanOrRun(tracer, "write merged", () => fs.writeFileSync(outputPath, body));
 
   console.log(`✓ Combined report saved → ${outputPath}`);
+  return { outputPath, passed };
 }
@@ -0,0 +1,181 @@
+import dotenv from "dotenv";
+dotenv.config();
+
+import fs from "fs";
+import os from "os";
+import chromeLauncher from "chrome-launcher";
+
+import { runLoginTest } from "./test-login-lambdatest.js";
+import { runHomeTest } from "./test-home-lambdatest.js";
+import { forkLighthouseWorker, runLighthouseOnPort, runProfileMatrix, pickMedianRun, summarizeProfiles, summarizeRun } from "./lighthouse-runner.js";
+import { mergeReports } from "./merge-reports.js";
+import { createTracer } from "./pipeline-trace.js";
+import { loadProfiles, parseProfileList, profileParallelism } from "./throttling-profiles.js";
+
+// Manifest: JSON array of { name, url, flow, profiles } (or plain URL strings)
+const MANIFEST = process.argv[2] || process.env.PAGES_MANIFEST || "pages.json";
+// How many pages (and Chrome instances) are processed at once
+const CONCURRENCY = Math.max(1, Number(process.env.CONCURRENCY) || Math.min(os.cpus().length, 4));
+const LH_RUNS = Math.max(1, Number(process.env.LH_RUNS) || 1);
+const OUT_DIR = process.env.OUT_DIR || "lighthouse/pages";
+// Let Selenium flows attach to the worker's Chrome instead of launching their own
+const SHARE_CHROME = ["1", "true"].includes(String(process.env.SHARE_CHROME).toLowerCase());
+// Default throttling profiles for every page; a manifest entry's `profiles` list overrides them
+const LH_PROFILES = parseProfileList(process.env.LH_PROFILES);
+
+// Selenium user flows a manifest entry can ask for
+const FLOWS = {
+    login: runLoginTest,
+    home: runHomeTest
+};
+
+function slugify(url) {
+    return url.replace(/^https?:\/\//, "").replace(/[^a-zA-Z0-9]+/g, "-").replace(/^-|-$/g, "") || "page";
+}
+
+function loadManifest(file) {
+    const entries = JSON.parse(fs.readFileSync(file, "utf-8"));
+    const pages = entries.map(entry => {
+        const page = typeof entry === "string" ? { url: entry } : { ...entry };
+        page.name = page.name || slugify(page.url);
+        if (page.flow && !FLOWS[page.flow]) {
+            throw new Error(`Unknown flow "${page.flow}" for page ${page.name}`);
+        }
+        // Resolved up front so a typo fails the job before any Chrome starts
+        page.profiles = loadProfiles(page.profiles || LH_PROFILES);
+        return page;
+    });
+    const names = new Set();
+    for (const page of pages) {
+        if (names.has(page.name)) throw new Error(`Duplicate page name in manifest: ${page.name}`);
+        names.add(page.name);
+    }
+    return pages;
+}
+
+// `runPass` runs one Lighthouse pass (runLighthouseOnPort's signature): in
+// this process, or in the worker's forked Lighthouse process.
+async function runPage(page, chromePort, runPass = runLighthouseOnPort) {
+    const started = Date.now();
+    const pageDir = `${OUT_DIR}/${page.name}`;
+    const tracer = createTracer(`multi-page-runner ${page.name}`);
+
+    // 1️⃣ Selenium flow (optional)
+    // The worker's Chrome already has a debugging port, so the flow can attach to it
+    const seleniumStart = Date.now();
+    const seleniumResult = page.flow
+        ? await tracer.span("selenium", () =>
+            FLOWS[page.flow]({ debuggerAddress: SHARE_CHROME ? `127.0.0.1:${chromePort}` : undefined, tracer }))
+        : { status: "skipped", page: page.name };
+    const timings = { sharedChrome: SHARE_CHROME, seleniumMs: Date.now() - seleniumStart };
+
+    // 2️⃣ Lighthouse on this worker's Chrome
+    const lighthouseStart = Date.now();
+    let lighthouseJson = null;
+    let lighthouseRuns = null;
+    let fullReportPath = null;
+    let profiles = null;
+    await tracer.span("lighthouse", async () => {
+        if (page.profiles.length) {
+            // With one profile at a time the worker's own Chrome runs them all
+            const parallel = profileParallelism(page.profiles.length, CONCURRENCY);
+            const results = await runProfileMatrix(page.url, page.profiles,
+                { outDir: pageDir, runs: LH_RUNS, parallel, port: parallel > 1 ? undefined : chromePort, tracer, runPass });
+            // The first profile's median pass stands in as the page's report
+            lighthouseJson = results[0]?.lhr || null;
+            lighthouseRuns = results[0]?.runs || null;
+            fullReportPath = results[0]?.reportPath || null;
+            profiles = summarizeProfiles(results);
+            return;
+        }
+        const lhrs = [];
+        const lhrPaths = new Map();
+        for (let i = 0; i < LH_RUNS; i++) {
+            const outputPath = LH_RUNS > 1 ? `${pageDir}/lh-report-run${i + 1}.json` : `${pageDir}/lh-report.json`;
+            const lhr = await runPass(page.url, chromePort, outputPath, { tracer, tid: i + 1 });
+            if (lhr) {
+                lhrs.push(lhr);
+                lhrPaths.set(lhr, outputPath);
+            }
+        }
+        lighthouseJson = LH_RUNS > 1 ? pickMedianRun(lhrs) : lhrs[0] || null;
+        lighthouseRuns = LH_RUNS > 1 ? lhrs.map(summarizeRun) : null;
+        fullReportPath = lhrPaths.get(lighthouseJson) || null;
+    });
+    timings.lighthouseMs = Date.now() - lighthouseStart;
+
+    // 3️⃣ Merge
+    const { outputPath, passed } = mergeReports(page.name, seleniumResult, lighthouseJson, lighthouseRuns,
+        { outDir: pageDir, exitOnFail: false, timings, tracer, fullReportPath, profiles });
+    tracer.write(`${pageDir}/trace.json`);
+
+    return {
+        name: page.name,
+        url: page.url,
+        flow: page.flow || null,
+        selenium: seleniumResult?.status || "missing",
+        performance: lighthouseJson?.categories?.performance?.score ?? null,
+        profiles: profiles && Object.fromEntries(Object.entries(profiles)
+            .map(([name, profile]) => [name, profile.categories?.performance?.score ?? null])),
+        passed: passed && Boolean(lighthouseJson),
+        report: outputPath,
+        seconds: (Date.now() - started) / 1000
+    };
+}
+
+// Each worker owns one Chrome for its whole lifetime and pulls pages off a
+// shared queue, so Chrome start-up is paid once per worker, not per page.
+// With more than one worker, each also drives Lighthouse from its own child
+// process (forkLighthouseWorker), since concurrent passes cannot share one.
+async function worker(queue, results, forked) {
+    let chrome = null;
+    const lighthouseWorker = forked ? forkLighthouseWorker() : null;
+    try {
+        while (queue.length) {
+            const page = queue.shift();
+            if (!chrome) chrome = await chromeLauncher.launch({ chromeFlags: ["--headless"] });
+            console.log(`🚀 [${page.name}] ${page.url}`);
+            try {
+                results.push(await runPage(page, chrome.port, lighthouseWorker?.run));
+            } catch (err) {
+                console.log(`❌ [${page.name}] failed:`, err);
+                results.push({ name: page.name, url: page.url, passed: false, error: err.message });
+                // Chrome may be unusable after a crash; start a fresh one for the next page
+                await chrome.kill();
+                chrome = null;
+            }
+        }
+    } finally {
+        lighthouseWorker?.close();
+        if (chrome) await chrome.kill();
+    }
+}
+
+async function main() {
+    const pages = loadManifest(MANIFEST);
+    console.log(`📋 ${pages.length} pages from ${MANIFEST}, concurrency=${CONCURRENCY}`);
+
+    const started = Date.now();
+    const queue = [...pages];
+    const results = [];
+    const workers = Math.min(CONCURRENCY, pages.length);
+    await Promise.all(Array.from({ length: workers }, () => worker(queue, results, workers > 1)));
+
+    // Index in manifest order, whatever order the pages finished in
+    const order = new Map(pages.map((page, i) => [page.name, i]));
+    results.sort((a, b) => order.get(a.name) - order.get(b.name));
+
+    const index = {
+        generatedAt: new Date().toISOString(),
+        concurrency: CONCURRENCY,
+        seconds: (Date.now() - started) / 1000,
+        pages: results
+    };
+    if (!fs.existsSync(OUT_DIR)) fs.mkdirSync(OUT_DIR, { recursive: true });
+    fs.writeFileSync(`${OUT_DIR}/index.json`, JSON.stringify(index, null, 2));
+    console.log(`✓ ${results.length} pages in ${index.seconds.toFixed(1)}s → ${OUT_DIR}/index.json`);
+
+    if (results.some(result => !result.passed)) process.exitCode = 1;
+}
+
+main();
@@ -0,0 +1,73 @@
+import fs from "fs";
+import path from "path";
+
+// Wall-clock microseconds; the same clock pipeline_trace.py uses, so Node
+// and Python spans line up in one trace.
+export function nowMicros() {
+  return Math.round((performance.timeOrigin + performance.now()) * 1000);
+}
+
+// Collects timing spans as Chrome trace events ("X" complete events), which
+// chrome://tracing and Perfetto open directly.
+export function createTracer(processName = "node-runner") {
+  const pid = process.pid;
+  const events = [{ name: "process_name", ph: "M", pid, tid: 0, args: { name: processName } }];
+
+  function record(name, ts, { cat = "node", tid = 0, args } = {}) {
+    const event = { name, cat, ph: "X", ts, dur: nowMicros() - ts, pid, tid };
+    if (args) event.args = args;
+    events.push(event);
+  }
+
+  // Times fn(), sync or async, and returns (or resolves to) what it returns.
+  function span(name, fn, opts = {}) {
+    const ts = nowMicros();
+    let result;
+    try {
+      result = fn();
+    } catch (err) {
+      record(name, ts, opts);
+      throw err;
+    }
+    if (result && typeof result.then === "function") {
+      return result.finally(() => record(name, ts, opts));
+    }
+    record(name, ts, opts);
+    return result;
+  }
+
+  // Lighthouse's own measures (lhr.timing.entries) as spans on their own track.
+  function addLighthouseTiming(lhr, { tid = 1 } = {}) {
+    for (const entry of lhr?.timing?.entries || []) {
+      if (entry.entryType !== "measure") continue;
+      events.push({
+        name: entry.name,
+        cat: "lighthouse",
+        ph: "X",
+        ts: Math.round((performance.timeOrigin + entry.startTime) * 1000),
+        dur: Math.round(entry.duration * 1000),
+        pid,
+        tid
+      });
+    }
+  }
+
+  // Events recorded by another tracer, e.g. a forked Lighthouse worker's; they
+  // keep that process's pid, so the trace shows them as their own process.
+  function addEvents(more) {
+    events.push(...more);
+  }
+
+  function write(filePath) {
+    fs.mkdirSync(path.dirname(filePath), { recursive: true });
+    fs.writeFileSync(filePath, JSON.stringify({ traceEvents: events, displayTimeUnit: "ms" }));
+    console.log(`🧭 Pipeline trace saved → ${filePath}`);
+  }
+
+  return { events, span, addLighthouseTiming, addEvents, write };
+}
+
+// tracer.span(...) when tracing, otherwise just fn().
+export function spanOrRun(tracer, name, fn, opts) {
+  return tracer ? tracer.span(name, fn, opts) : fn();
+}
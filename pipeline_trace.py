@@ -0,0 +1,85 @@
+import contextlib
+import json
+import os
+import time
+
+# Lighthouse's own measures are kept in the trace file, but only its
+# runner-level phases (gather, audit, report) are listed in the dashboard.
+LIGHTHOUSE_PHASE_PREFIX = 'lh:runner:'
+
+
+def now_micros():
+    """
+    Wall-clock microseconds; the same clock pipeline-trace.js uses, so Node
+    and Python spans line up in one trace.
+    """
+    return time.time_ns() // 1000
+
+
+class Tracer:
+    """
+    Collects timing spans as Chrome trace events ("X" complete events), which
+    chrome://tracing and Perfetto open directly.
+    """
+
+    def __init__(self, process_name='generate_report'):
+        self.pid = os.getpid()
+        self.events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0,
+                        'args': {'name': process_name}}]
+
+    @contextlib.contextmanager
+    def span(self, name, cat='python', **args):
+        ts = now_micros()
+        try:
+            yield
+        finally:
+            event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': ts, 'dur': now_micros() - ts,
+                     'pid': self.pid, 'tid': 0}
+            if args:
+                event['args'] = args
+            self.events.append(event)
+
+
+def maybe_span(tracer, name, **args):
+    """
+    tracer.span(...) when tracing, otherwise a no-op context.
+    """
+    return tracer.span(name, **args) if tracer else contextlib.nullcontext()
+
+
+def write_trace(path, events):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def timing_rows(events):
+    """
+    Phase-level spans of a trace for the dashboard, in start order, each with
+    its offset from the first span and its nesting depth on its own track.
+    """
+    spans = [event for event in events
+             if event.get('ph') == 'X' and
+             (event.get('cat') != 'lighthouse' or event['name'].startswith(LIGHTHOUSE_PHASE_PREFIX))]
+    if not spans:
+        return []
+    # Parents first when two spans start together
+    spans.sort(key=lambda event: (event['ts'], -event['dur']))
+    origin = spans[0]['ts']
+    end = max(event['ts'] + event['dur'] for event in spans)
+
+    rows = []
+    open_spans = {}  # (pid, tid) -> end times of enclosing spans
+    for event in spans:
+        stack = open_spans.setdefault((event['pid'], event.get('tid', 0)), [])
+        while stack and stack[-1] <= event['ts']:
+            stack.pop()
+        rows.append({
+            'name': event['name'],
+            'cat': event.get('cat', ''),
+            'depth': len(stack),
+            'start_ms': (event['ts'] - origin) / 1000,
+            'duration_ms': event['dur'] / 1000,
+            'total_ms': (end - origin) / 1000,
+        })
+        stack.append(event['ts'] + event['dur'])
+    return rows
@@ -0,0 +1,92 @@
+from run_stats import describe
+
+# Metric audits shown per profile, in dashboard order.
+PROFILE_METRICS = (
+    'first-contentful-paint',
+    'largest-contentful-paint',
+    'total-blocking-time',
+    'cumulative-layout-shift',
+    'speed-index',
+)
+
+CATEGORY_KEYS = (('performance', 'performance'), ('accessibility', 'accessibility'),
+                 ('best-practices', 'best_practices'), ('seo', 'seo'))
+
+
+def _score(categories, category_id):
+    score = (categories.get(category_id) or {}).get('score')
+    return round(score * 100) if isinstance(score, (int, float)) else None
+
+
+def _profile_row(name, profile):
+    categories = profile.get('categories') or {}
+    audits = profile.get('audits') or {}
+    runs = [run for run in profile.get('runs') or [] if isinstance(run, dict)]
+    row = {
+        'name': name,
+        'settings': profile.get('settings') or {},
+        'error': profile.get('error'),
+        'scores': {key: _score(categories, category_id) for category_id, key in CATEGORY_KEYS},
+        'metrics': {},
+        'runs': len(runs) or (0 if profile.get('error') else 1),
+        'report': profile.get('report'),
+    }
+    if len(runs) > 1:
+        # Decide on the median over the passes, like the page's own result
+        stats = describe([_score(run.get('categories') or {}, 'performance') for run in runs])
+        if stats:
+            row['scores']['performance'] = stats['median']
+    for audit_id in PROFILE_METRICS:
+        audit = audits.get(audit_id)
+        if isinstance(audit, dict):
+            row['metrics'][audit_id] = {
+                'title': audit.get('title', audit_id),
+                'display_value': audit.get('displayValue', 'N/A'),
+                'score': audit.get('score'),
+                'numeric_value': audit.get('numericValue'),
+                'numeric_unit': audit.get('numericUnit'),
+            }
+    return row
+
+
+def extract_profiles(profiles):
+    """
+    The merged report's `profiles` block (see summarizeProfiles in
+    lighthouse-runner.js) as a list in run order, or None without one.
+    """
+    if not isinstance(profiles, dict) or not profiles:
+        return None
+    return [_profile_row(name, profile) for name, profile in profiles.items() if isinstance(profile, dict)]
+
+
+def describe_profile(settings):
+    """
+    One-line summary of a profile's settings, e.g.
+    "mobile, simulated, 150 ms RTT, 1,638 Kbps, 4x CPU".
+    """
+    parts = [settings.get('formFactor', '?')]
+    method = settings.get('method', 'simulate')
+    parts.append({'simulate': 'simulated', 'devtools': 'devtools', 'provided': 'no throttling'}.get(method, method))
+    if method != 'provided':
+        if settings.get('rttMs'):
+            parts.append(f"{settings['rttMs']:g} ms RTT")
+        if settings.get('throughputKbps'):
+            parts.append(f"{settings['throughputKbps']:,.0f} Kbps")
+        if (settings.get('cpuSlowdownMultiplier') or 1) != 1:
+            parts.append(f"{settings['cpuSlowdownMultiplier']:g}x CPU")
+    return ', '.join(parts)
+
+
+def profile_grid(rows):
+    """
+    Page x profile performance scores from (page, {profile: score}) pairs.
+    Returns (profile names in first-seen order, [(page, [score or None, ...])]),
+    with only the pages that have profiles.
+    """
+    names = []
+    for _, scores in rows:
+        for name in scores or {}:
+            if name not in names:
+                names.append(name)
+    grid = [(page, [scores.get(name) for name in names]) for page, scores in rows if scores]
+    return names, grid
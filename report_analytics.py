@@ -0,0 +1,277 @@
+import argparse
+import json
+import math
+import operator
+import os
+import time
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import compress
+
+from batch_report import DEFAULT_PATTERN, find_inputs
+from generate_report import load_report, report_page_url
+from run_stats import describe
+
+# Same rule as extract_report_data: a diagnostic fails below this score.
+DIAGNOSTIC_FAIL_BELOW = 0.9
+
+NAN = float('nan')
+
+
+class AuditTable:
+    """
+    Columnar audits x reports table. Row i is audit `audit_ids[audit[i]]`
+    of report `reports[report[i]]`; missing scores and numeric values are NaN.
+    Every column is a typed array, so aggregations run as C-level passes
+    (map/compress/Counter) instead of per-report dict walks.
+    """
+
+    def __init__(self):
+        self.reports = []  # {'source', 'page_url', 'merged_at'} per report
+        self.audit_ids = []
+        self.titles = []
+        self._codes = {}
+        self.report = array('l')
+        self.audit = array('l')
+        self.score = array('d')
+        self.numeric = array('d')
+        self.weight = array('d')
+        self.contribution = array('d')
+        # 1 for weighted performance metrics / unweighted performance audits
+        self.weighted = array('b')
+        self.diagnostic = array('b')
+
+    def __len__(self):
+        return len(self.audit)
+
+    def audit_code(self, audit_id, title=None):
+        code = self._codes.get(audit_id)
+        if code is None:
+            code = self._codes[audit_id] = len(self.audit_ids)
+            self.audit_ids.append(audit_id)
+            self.titles.append(title or audit_id)
+        return code
+
+    def add_report(self, columns):
+        """
+        Appends the rows report_columns() produced for one report.
+        """
+        report_index = len(self.reports)
+        self.reports.append(columns['meta'])
+        self.report.extend([report_index] * len(columns['ids']))
+        self.audit.extend(map(self.audit_code, columns['ids'], columns['titles']))
+        self.score.extend(columns['score'])
+        self.numeric.extend(columns['numeric'])
+        self.weight.extend(columns['weight'])
+        self.contribution.extend(columns['contribution'])
+        self.weighted.extend(columns['weighted'])
+        self.diagnostic.extend(columns['diagnostic'])
+
+    def mask_for(self, audit_id):
+        code = self._codes.get(audit_id)
+        if code is None:
+            return [False] * len(self)
+        return list(map(code.__eq__, self.audit))
+
+
+def report_columns(data, source=''):
+    """
+    Flattens one merged report into per-audit column lists.
+    """
+    lighthouse = data.get('lighthouse', {})
+    audits = lighthouse.get('audits', {})
+    refs = lighthouse.get('categories', {}).get('performance', {}).get('auditRefs', [])
+    weights = {ref['id']: ref.get('weight', 0) for ref in refs}
+
+    # Weighted metrics missing from the audits still count, with a zero score
+    ids = list(audits) + [audit_id for audit_id, weight in weights.items() if weight > 0 and audit_id not in audits]
+    rows = [audits.get(audit_id) or {} for audit_id in ids]
+    scores = [row.get('score') for row in rows]
+    numerics = [row.get('numericValue') for row in rows]
+    row_weights = [weights.get(audit_id, 0) for audit_id in ids]
+
+    # One comprehension per column: much cheaper than eight appends per row
+    columns = {
+        'meta': {'source': source, 'page_url': report_page_url(lighthouse), 'merged_at': data.get('mergedAt')},
+        'ids': ids,
+        'titles': [row.get('title', audit_id) for audit_id, row in zip(ids, rows)],
+        'score': [NAN if score is None else score for score in scores],
+        'numeric': [value if isinstance(value, (int, float)) else NAN for value in numerics],
+        'weight': row_weights,
+        'contribution': [(score or 0) * weight for score, weight in zip(scores, row_weights)],
+        'weighted': [weight > 0 for weight in row_weights],
+        'diagnostic': [audit_id in weights and weight <= 0 for audit_id, weight in zip(ids, row_weights)],
+    }
+    return columns
+
+
+def _load_columns(job):
+    path, stream = job
+    try:
+        return report_columns(load_report(path, stream=stream), source=path), None
+    except Exception as e:
+        return None, f"{path}: {type(e).__name__}: {e}"
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+
+def load_table(paths, stream=False, workers=None, since=None):
+    """
+    Bulk-loads merged reports into one AuditTable; parsing fans out over a
+    process pool. With `since` (an aware datetime), older reports are left
+    out. Returns (table, errors).
+    """
+    jobs = [(path, stream) for path in paths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        results = [_load_columns(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_load_columns, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    table = AuditTable()
+    errors = []
+    for columns, error in results:
+        if error:
+            errors.append(error)
+            continue
+        merged_at = columns['meta']['merged_at']
+        if since and (not merged_at or _parse_time(merged_at) < since):
+            continue
+        table.add_report(columns)
+    return table, errors
+
+
+# --- Aggregations ---
+
+def failing_diagnostics(table, top=None):
+    """
+    Diagnostic audits by how often they fail: fail count, the number of
+    reports that ran the audit, and the failure rate.
+    """
+    failing = map(operator.and_, table.diagnostic, map(DIAGNOSTIC_FAIL_BELOW.__gt__, table.score))
+    fails = Counter(compress(table.audit, failing))
+    seen = Counter(compress(table.audit, table.diagnostic))
+    ranked = sorted(fails.items(), key=lambda item: (-item[1], table.audit_ids[item[0]]))
+    return [{
+        'id': table.audit_ids[code],
+        'title': table.titles[code],
+        'fail_count': count,
+        'reports': seen[code],
+        'fail_rate': count / seen[code],
+    } for code, count in ranked[:top]]
+
+
+def metric_distribution(table, audit_id):
+    """
+    describe() of one audit's numericValue per page URL.
+    """
+    mask = table.mask_for(audit_id)
+    groups = defaultdict(list)
+    for report_index, value in zip(compress(table.report, mask), compress(table.numeric, mask)):
+        if not math.isnan(value):
+            groups[table.reports[report_index]['page_url']].append(value)
+    return {page_url: describe(values) for page_url, values in sorted(groups.items())}
+
+
+def contribution_share(table):
+    """
+    Per weighted metric: mean weight, mean score contribution and its share
+    of all contributed points across the table.
+    """
+    totals = defaultdict(float)
+    weights = defaultdict(float)
+    counts = Counter()
+    for code, weight, contribution in zip(compress(table.audit, table.weighted),
+                                          compress(table.weight, table.weighted),
+                                          compress(table.contribution, table.weighted)):
+        totals[code] += contribution
+        weights[code] += weight
+        counts[code] += 1
+    grand_total = sum(totals.values())
+    return [{
+        'id': table.audit_ids[code],
+        'title': table.titles[code],
+        'mean_weight': weights[code] / counts[code],
+        'mean_contribution': totals[code] / counts[code],
+        'share': totals[code] / grand_total if grand_total else 0.0,
+    } for code in sorted(totals, key=lambda code: -weights[code])]
+
+
+def summarize_table(table, metrics=('largest-contentful-paint',), top=10):
+    return {
+        'reports': len(table.reports),
+        'rows': len(table),
+        'failing_diagnostics': failing_diagnostics(table, top=top),
+        'contribution_share': contribution_share(table),
+        'distributions': {audit_id: metric_distribution(table, audit_id) for audit_id in metrics},
+    }
+
+
+def print_summary(summary):
+    print(f"\nMost frequently failing diagnostics (top {len(summary['failing_diagnostics'])}):")
+    print(f"  {'fails':>7} {'reports':>7} {'rate':>6}  audit")
+    for row in summary['failing_diagnostics']:
+        print(f"  {row['fail_count']:7d} {row['reports']:7d} {row['fail_rate']:6.1%}  {row['id']}")
+
+    print("\nContribution share per metric:")
+    print(f"  {'weight':>6} {'mean pts':>8} {'share':>6}  metric")
+    for row in summary['contribution_share']:
+        print(f"  {row['mean_weight']:6.1f} {row['mean_contribution']:8.2f} {row['share']:6.1%}  {row['id']}")
+
+    for audit_id, pages in summary['distributions'].items():
+        print(f"\n{audit_id} numericValue per page:")
+        print(f"  {'n':>5} {'median':>10} {'p75':>10} {'p95':>10}  page")
+        for page_url, stats in pages.items():
+            print(f"  {stats['n']:5d} {stats['median']:10.1f} {stats['p75']:10.1f} {stats['p95']:10.1f}  {page_url}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet-level analytics over many merged reports.")
+    parser.add_argument('source', help="Directory, glob or single merged report")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN,
+                        help="File pattern used when SOURCE is a directory")
+    parser.add_argument('--since', help="Only reports merged at or after this ISO date, e.g. 2025-06-01")
+    parser.add_argument('--metric', action='append',
+                        help="Audit whose numericValue distribution to show (repeatable; default LCP)")
+    parser.add_argument('--top', type=int, default=10, help="How many failing diagnostics to list")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--stream', action='store_true', help="Stream each input instead of loading it whole")
+    parser.add_argument('--json', metavar='PATH', help="Also write the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    _, inputs = find_inputs(args.source, args.pattern)
+    if not inputs:
+        print(f"No reports found in {args.source}")
+        return 1
+
+    since = None
+    if args.since:
+        since = datetime.fromisoformat(args.since)
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+    start = time.perf_counter()
+    table, errors = load_table(inputs, stream=args.stream, workers=args.workers, since=since)
+    print(f"Loaded {len(table.reports)} reports ({len(table):,} audit rows) in {time.perf_counter() - start:.2f}s")
+    for error in errors:
+        print(f"  failed {error}")
+
+    summary = summarize_table(table, metrics=args.metric or ('largest-contentful-paint',), top=args.top)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary saved: {args.json}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+import functools
+import math
+import re
+
+# Offline dashboards replace the Tailwind CDN, Chart.js and Google Fonts with
+# a purged stylesheet and inline SVG charts, so a report renders with no network.
+
+# --- 1. Utility stylesheet ---
+# The Tailwind v3 utilities the dashboards use, in Tailwind's own emit order
+# (later rules must win over earlier ones, e.g. border-b-4 over border).
+
+PALETTE = {
+    'white': '#ffffff',
+    'gray-50': '#f9fafb', 'gray-100': '#f3f4f6', 'gray-200': '#e5e7eb', 'gray-400': '#9ca3af',
+    'gray-500': '#6b7280', 'gray-600': '#4b5563', 'gray-700': '#374151', 'gray-800': '#1f2937',
+    'gray-900': '#111827',
+    'indigo-50': '#eef2ff', 'indigo-500': '#6366f1', 'indigo-600': '#4f46e5', 'indigo-700': '#4338ca',
+    'green-100': '#dcfce7', 'green-500': '#22c55e', 'green-600': '#16a34a', 'green-700': '#15803d',
+    'amber-100': '#fef3c7', 'amber-500': '#f59e0b', 'amber-600': '#d97706', 'amber-700': '#b45309',
+    'red-100': '#fee2e2', 'red-500': '#ef4444', 'red-600': '#dc2626', 'red-700': '#b91c1c',
+}
+
+SPACING = {'0': '0px', '1': '0.25rem', '2': '0.5rem', '3': '0.75rem', '4': '1rem',
+           '6': '1.5rem', '8': '2rem', '10': '2.5rem', '12': '3rem'}
+
+FONT_SIZES = {'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'lg': ('1.125rem', '1.75rem'),
+              'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'), '3xl': ('1.875rem', '2.25rem'),
+              '4xl': ('2.25rem', '2.5rem')}
+
+_DIVIDE_CHILDREN = '>:not([hidden])~:not([hidden])'
+
+
+def _utility_rules():
+    """
+    Builds the ordered {class: (selector_suffix, declarations)} table.
+    """
+    rules = {}
+
+    def add(name, declarations, suffix=''):
+        rules[name] = (suffix, declarations)
+
+    add('relative', 'position:relative')
+    add('absolute', 'position:absolute')
+    add('top-0', 'top:0px')
+    add('mx-auto', 'margin-left:auto;margin-right:auto')
+    for key, size in SPACING.items():
+        add(f'my-{key}', f'margin-top:{size};margin-bottom:{size}')
+    for key, size in SPACING.items():
+        add(f'mb-{key}', f'margin-bottom:{size}')
+        add(f'mt-{key}', f'margin-top:{size}')
+    add('block', 'display:block')
+    add('inline-block', 'display:inline-block')
+    add('flex', 'display:flex')
+    add('table', 'display:table')
+    add('grid', 'display:grid')
+    add('hidden', 'display:none')
+    add('h-2', 'height:0.5rem')
+    add('h-full', 'height:100%')
+    add('w-1/3', 'width:33.333333%')
+    add('min-w-full', 'min-width:100%')
+    add('max-w-7xl', 'max-width:80rem')
+    add('cursor-pointer', 'cursor:pointer')
+    for columns in (1, 2, 3, 4):
+        add(f'grid-cols-{columns}', f'grid-template-columns:repeat({columns},minmax(0,1fr))')
+    add('flex-col', 'flex-direction:column')
+    add('items-center', 'align-items:center')
+    for key, size in SPACING.items():
+        add(f'gap-{key}', f'gap:{size}')
+    add('divide-y', 'border-top-width:1px;border-bottom-width:0', _DIVIDE_CHILDREN)
+    for name, color in PALETTE.items():
+        add(f'divide-{name}', f'border-color:{color}', _DIVIDE_CHILDREN)
+    add('overflow-hidden', 'overflow:hidden')
+    add('overflow-x-auto', 'overflow-x:auto')
+    add('whitespace-nowrap', 'white-space:nowrap')
+    add('break-all', 'word-break:break-all')
+    add('rounded', 'border-radius:0.25rem')
+    add('rounded-lg', 'border-radius:0.5rem')
+    add('rounded-xl', 'border-radius:0.75rem')
+    add('rounded-full', 'border-radius:9999px')
+    add('border', 'border-width:1px')
+    add('border-b', 'border-bottom-width:1px')
+    add('border-b-4', 'border-bottom-width:4px')
+    add('border-t-4', 'border-top-width:4px')
+    for name, color in PALETTE.items():
+        add(f'border-{name}', f'border-color:{color}')
+    for name, color in PALETTE.items():
+        add(f'bg-{name}', f'background-color:{color}')
+    for key, size in SPACING.items():
+        add(f'p-{key}', f'padding:{size}')
+    for key, size in SPACING.items():
+        add(f'px-{key}', f'padding-left:{size};padding-right:{size}')
+        add(f'py-{key}', f'padding-top:{size};padding-bottom:{size}')
+    for key, size in SPACING.items():
+        add(f'pb-{key}', f'padding-bottom:{size}')
+    add('text-left', 'text-align:left')
+    add('text-center', 'text-align:center')
+    add('text-right', 'text-align:right')
+    add('font-mono', 'font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,monospace')
+    for key, (size, line_height) in FONT_SIZES.items():
+        add(f'text-{key}', f'font-size:{size};line-height:{line_height}')
+    add('font-normal', 'font-weight:400')
+    add('font-medium', 'font-weight:500')
+    add('font-semibold', 'font-weight:600')
+    add('font-bold', 'font-weight:700')
+    add('font-extrabold', 'font-weight:800')
+    add('uppercase', 'text-transform:uppercase')
+    add('normal-case', 'text-transform:none')
+    add('tracking-wider', 'letter-spacing:0.05em')
+    for name, color in PALETTE.items():
+        add(f'text-{name}', f'color:{color}')
+    add('underline', 'text-decoration-line:underline')
+    add('shadow-md', 'box-shadow:0 4px 6px -1px rgb(0 0 0 / 0.1),0 2px 4px -2px rgb(0 0 0 / 0.1)')
+    add('shadow-lg', 'box-shadow:0 10px 15px -3px rgb(0 0 0 / 0.1),0 4px 6px -4px rgb(0 0 0 / 0.1)')
+    return rules
+
+
+UTILITY_RULES = _utility_rules()
+
+# Variant prefix -> (pseudo-class, media query); emitted after the plain utilities.
+VARIANTS = {
+    'hover': (':hover', None),
+    'sm': ('', '(min-width:640px)'),
+    'md': ('', '(min-width:768px)'),
+}
+
+# Trimmed Tailwind preflight: the resets the utilities above assume.
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}"
+    "html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4}"
+    "body{margin:0;line-height:inherit}"
+    "h1,h2,h3,p,hr{margin:0}"
+    "h1,h2,h3{font-size:inherit;font-weight:inherit}"
+    "hr{height:0;color:inherit;border-top-width:1px}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    "ul{list-style:none;margin:0;padding:0}"
+    "svg,canvas{display:block;vertical-align:middle}"
+)
+
+# Inter when installed locally, otherwise the platform UI font; no web font fetch.
+OFFLINE_FONT_CSS = "body { font-family: 'Inter', ui-sans-serif, system-ui, -apple-system, 'Segoe UI', Roboto, sans-serif; }"
+
+# Placeholder the page is rendered with; replaced by the purged stylesheet.
+STYLESHEET_MARK = '<!-- offline-stylesheet -->'
+
+_CLASS_ATTR_RE = re.compile(r'class="([^"]*)"')
+
+
+def _selector(name):
+    return '.' + name.replace(':', '\\:').replace('/', '\\/')
+
+
+def used_classes(page):
+    """
+    Returns the set of class names appearing in class="..." attributes.
+    """
+    # Most attributes repeat row after row; split each distinct one only once
+    return frozenset(' '.join(set(_CLASS_ATTR_RE.findall(page))).split())
+
+
+@functools.lru_cache(maxsize=64)
+def purged_stylesheet(classes):
+    """
+    Builds the CSS for exactly the utilities in `classes` (a frozenset).
+    Reports from the same template share a class set, so after the first
+    report this is a cache hit.
+    """
+    plain = []
+    variants = {prefix: [] for prefix in VARIANTS}
+    for name in classes:
+        prefix, _, base = name.rpartition(':')
+        if prefix in VARIANTS and base in UTILITY_RULES:
+            variants[prefix].append((name, base))
+        elif not prefix and name in UTILITY_RULES:
+            plain.append(name)
+
+    order = {name: i for i, name in enumerate(UTILITY_RULES)}
+    css = [PREFLIGHT]
+    for name in sorted(plain, key=order.get):
+        suffix, declarations = UTILITY_RULES[name]
+        css.append(f"{_selector(name)}{suffix}{{{declarations}}}")
+    for prefix, (pseudo, media) in VARIANTS.items():
+        for name, base in sorted(variants[prefix], key=lambda item: order[item[1]]):
+            suffix, declarations = UTILITY_RULES[base]
+            rule = f"{_selector(name)}{pseudo}{suffix}{{{declarations}}}"
+            css.append(f"@media {media}{{{rule}}}" if media else rule)
+    return '\n'.join(css)
+
+
+def inline_stylesheet(page, extra_classes=frozenset()):
+    """
+    Replaces STYLESHEET_MARK in a rendered page with its purged stylesheet.
+    `extra_classes` covers class names a page script assembles at runtime.
+    """
+    stylesheet = purged_stylesheet(used_classes(page) | extra_classes)
+    return page.replace(STYLESHEET_MARK, f"<style>\n{stylesheet}\n    </style>", 1)
+
+
+# --- 2. Doughnut charts ---
+
+@functools.lru_cache(maxsize=1024)
+def doughnut_svg(score, color_hex, cutout=0.8, track_hex='#e9ecef'):
+    """
+    A 0-100 score as a static SVG doughnut, drawn like the Chart.js version:
+    clockwise from 12 o'clock, `cutout` being the inner/outer radius ratio.
+    """
+    score = min(max(score, 0), 100)
+    stroke = 50 * (1 - cutout)
+    radius = 50 - stroke / 2
+    circumference = 2 * math.pi * radius
+    arc = ''
+    if score > 0:
+        arc = (f'<circle cx="50" cy="50" r="{radius:g}" fill="none" stroke="{color_hex}" '
+               f'stroke-width="{stroke:g}" stroke-dasharray="{circumference * score / 100:.2f} {circumference:.2f}" '
+               f'transform="rotate(-90 50 50)"/>')
+    return (f'<svg viewBox="0 0 100 100" width="100%" height="100%" role="img" aria-label="Score {score} of 100">'
+            f'<circle cx="50" cy="50" r="{radius:g}" fill="none" stroke="{track_hex}" stroke-width="{stroke:g}"/>'
+            f'{arc}</svg>')
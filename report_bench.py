@@ -0,0 +1,392 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from batch_report import find_inputs
+from generate_report import EXTRACTOR_VERSION, extract_report_data, generate_html_report, load_report
+from report_analytics import AuditTable, report_columns, summarize_table
+from report_stream import stream_report
+from run_stats import describe
+from synthetic_report import format_size, parse_size, report_of_size, write_report
+
+PIPELINE_FORMAT = 'report-pipeline-bench'
+PIPELINE_VERSION = 1
+PIPELINE_STAGES = ('load', 'extract', 'render', 'write')
+DEFAULT_SIZES = '100KB,1MB,10MB,50MB'
+
+# A stage slower than the compared run by more than this fraction is a regression,
+# unless the difference is under the absolute floor (timer noise on fast stages)
+DEFAULT_MAX_SLOWDOWN = 0.25
+MIN_REGRESSION_SECONDS = 0.002
+
+
+def _measure(func, repeat):
+    """
+    Runs `func` `repeat` times and returns (result, best_seconds, peak_bytes).
+    Peak memory is traced on a separate run so it does not skew the timings.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+
+# Escaped quotes and backslashes in skipped (i18n, screenshot, long item tails)
+# and kept values; every chunk size must split them somewhere.
+_ESCAPE_PROBE = json.dumps({
+    'page': 'home',
+    'lighthouse': {
+        'finalUrl': 'https://example.com/?q="x"',
+        'i18n': {'rendererFormattedStrings': {'a': 'q"r \\ "quoted"', 'b': 'caf\u00e9\n'}},
+        'fullPageScreenshot': {'screenshot': {'data': 'data:"\\' * 8}},
+        'audits': {
+            'dom-size': {'id': 'dom-size', 'description': 'Say "no" [Learn more](x)', 'details': {'items': [
+                {'node': {'snippet': f'<div class="row-{i}">\\'}} for i in range(30)]}},
+            'final-screenshot': {'details': {'data': 'x"\\' * 20}},
+        },
+    },
+})
+
+
+def stream_chunk_sweep(text=_ESCAPE_PROBE):
+    """
+    Chunk sizes (1 up to len(text)) at which streaming `text` fails or
+    differs from a single-chunk read; empty when all agree.
+    """
+    expected = stream_report(io.StringIO(text), chunk_size=len(text) + 1)
+    failures = []
+    for chunk_size in range(1, len(text) + 1):
+        try:
+            if stream_report(io.StringIO(text), chunk_size=chunk_size) != expected:
+                failures.append(chunk_size)
+        except ValueError:
+            failures.append(chunk_size)
+    return failures
+
+
+def bench_stream(path, repeat=3):
+    """
+    Compares json.load + extract against streaming + extract on one report.
+    """
+    full, full_time, full_peak = _measure(
+        lambda: extract_report_data(load_report(path)), repeat)
+    streamed, stream_time, stream_peak = _measure(
+        lambda: extract_report_data(load_report(path, stream=True)), repeat)
+
+    sweep_failures = stream_chunk_sweep()
+    return {
+        'input': path,
+        'identical': full == streamed and not sweep_failures,
+        'chunk_sweep_failures': sweep_failures,
+        'full': {'seconds': full_time, 'peak_bytes': full_peak},
+        'stream': {'seconds': stream_time, 'peak_bytes': stream_peak},
+    }
+
+
+def bench_render(path, number=1000, repeat=5, golden=None, offline=False):
+    """
+    Measures generate_html_report throughput on one extracted report and,
+    when a golden HTML file is given, checks the output is byte-identical.
+    """
+    report_data = extract_report_data(load_report(path))
+    html_content = generate_html_report(report_data, offline=offline)
+    timings = timeit.repeat(lambda: generate_html_report(report_data, offline=offline), number=number, repeat=repeat)
+
+    result = {
+        'input': path,
+        'reports_per_sec': number / min(timings),
+        'html_bytes': len(html_content.encode('utf-8')),
+    }
+    if golden:
+        with open(golden, 'r', encoding='utf-8', newline='') as f:
+            result['matches_golden'] = f.read() == html_content
+    return result
+
+
+def _loop_aggregates(datas, metric):
+    """
+    The same fleet questions answered the per-report way, one
+    extract_report_data() dict at a time.
+    """
+    fails = Counter()
+    contributions = defaultdict(float)
+    values = defaultdict(list)
+    for data in datas:
+        report_data = extract_report_data(data)
+        for diag in report_data['diagnostics']:
+            fails[diag['id']] += 1
+        for m in report_data['metrics']:
+            contributions[m['id']] += m['contribution']
+            if m['id'] == metric and m['numeric_value'] is not None:
+                values[report_data['page_url']].append(m['numeric_value'])
+    distribution = {page_url: describe(v) for page_url, v in sorted(values.items())}
+    return fails, contributions, distribution
+
+
+def _build_table(datas):
+    table = AuditTable()
+    for data in datas:
+        table.add_report(report_columns(data))
+    return table
+
+
+def _table_aggregates(table, metric):
+    summary = summarize_table(table, metrics=(metric,), top=None)
+    fails = Counter({row['id']: row['fail_count'] for row in summary['failing_diagnostics']})
+    return fails, summary['distributions'][metric]
+
+
+def bench_analytics(paths, repeat=3, metric='largest-contentful-paint'):
+    """
+    Compares looping extract_report_data over N loaded reports with building
+    the columnar AuditTable once and aggregating it. Parsing is excluded:
+    both sides start from the same loaded dicts.
+    """
+    datas = [load_report(path) for path in paths]
+    (loop_fails, _, loop_dist), loop_time, _ = _measure(lambda: _loop_aggregates(datas, metric), repeat)
+    table, build_time, _ = _measure(lambda: _build_table(datas), repeat)
+    (table_fails, table_dist), query_time, _ = _measure(lambda: _table_aggregates(table, metric), repeat)
+    return {
+        'reports': len(datas),
+        'rows': len(table),
+        'identical': loop_fails == table_fails and loop_dist == table_dist,
+        'loop': {'seconds': loop_time},
+        'build': {'seconds': build_time},
+        'query': {'seconds': query_time},
+    }
+
+
+def _peak_rss_bytes():
+    """
+    This process's peak resident set size, or None where getrusage is missing.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _pipeline_worker(job):
+    """
+    Times load / extract / render / write on one input, best of `repeat`.
+    Runs in a fresh process so the peak RSS belongs to this input alone.
+    """
+    path, output_path, repeat, stream, offline = job
+    rss_before = _peak_rss_bytes()
+    best = dict.fromkeys(PIPELINE_STAGES)
+    totals = []
+    html_content = None
+    for _ in range(repeat):
+        times = {}
+        start = time.perf_counter()
+        data = load_report(path, stream=stream)
+        times['load'] = time.perf_counter() - start
+        start = time.perf_counter()
+        report_data = extract_report_data(data)
+        times['extract'] = time.perf_counter() - start
+        start = time.perf_counter()
+        html_content = generate_html_report(report_data, offline=offline)
+        times['render'] = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        times['write'] = time.perf_counter() - start
+        del data
+        totals.append(sum(times.values()))
+        for stage, seconds in times.items():
+            best[stage] = seconds if best[stage] is None else min(best[stage], seconds)
+    return {
+        'stages': {stage: {'seconds': seconds} for stage, seconds in best.items()},
+        'total_seconds': min(totals),
+        'reports_per_sec': 1 / min(totals),
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'start_rss_bytes': rss_before,
+        'html_bytes': len(html_content.encode('utf-8')),
+        'validation': report_data['validation']['status'],
+    }
+
+
+def bench_pipeline(sizes, seed=0, repeat=3, stream=False, offline=False, work_dir=None):
+    """
+    Generates a synthetic report per target size (see synthetic_report.py)
+    and measures the reporter end to end on it, each size in its own process.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = work_dir or temp_dir
+        os.makedirs(work_dir, exist_ok=True)
+        context = multiprocessing.get_context('spawn')
+        for size in sizes:
+            report, params = report_of_size(size, seed=seed)
+            if params['bytes'] > size * 1.02:
+                print(f"Note: {format_size(size)} is too small for the generator; "
+                      f"benchmarking a {format_size(params['bytes'])} report")
+            path = os.path.join(work_dir, f"merged-report-{format_size(size)}.json")
+            input_bytes = write_report(report, path)
+            del report
+            job = (path, os.path.join(work_dir, f"dashboard-{format_size(size)}.html"), repeat, stream, offline)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(_pipeline_worker, job).result()
+            results.append({'size': format_size(size), 'target_bytes': size, 'input_bytes': input_bytes,
+                            'generator': params, **result})
+    return {
+        'format': PIPELINE_FORMAT,
+        'version': PIPELINE_VERSION,
+        'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'extractor_version': EXTRACTOR_VERSION,
+        'options': {'seed': seed, 'repeat': repeat, 'stream': stream, 'offline': offline},
+        'results': results,
+    }
+
+
+def compare_pipeline(current, previous, max_slowdown=DEFAULT_MAX_SLOWDOWN):
+    """
+    ["10MB render: 41.2 ms -> 63.0 ms (+53%)", ...] for every stage of every
+    size present in both runs that slowed down by more than `max_slowdown`.
+    """
+    before = {result['size']: result for result in previous.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        old = before.get(result['size'])
+        if not old:
+            continue
+        for stage in PIPELINE_STAGES:
+            new_seconds = result['stages'][stage]['seconds']
+            old_seconds = (old.get('stages', {}).get(stage) or {}).get('seconds')
+            if not old_seconds or new_seconds - old_seconds < MIN_REGRESSION_SECONDS:
+                continue
+            if new_seconds > old_seconds * (1 + max_slowdown):
+                regressions.append(f"{result['size']} {stage}: {old_seconds * 1000:.1f} ms -> "
+                                   f"{new_seconds * 1000:.1f} ms (+{new_seconds / old_seconds - 1:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the report pipeline.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stream_parser = subparsers.add_parser('stream', help="Full load vs streaming extraction")
+    stream_parser.add_argument('input', nargs='?', default='lighthouse/merged-report.json')
+    stream_parser.add_argument('--repeat', type=int, default=3)
+
+    render_parser = subparsers.add_parser('render', help="HTML render throughput (reports/sec)")
+    render_parser.add_argument('input', nargs='?', default='lighthouse/merged-report.json')
+    render_parser.add_argument('--number', type=int, default=1000, help="Renders per timing sample")
+    render_parser.add_argument('--repeat', type=int, default=5)
+    render_parser.add_argument('--offline', action='store_true', help="Render the self-contained variant")
+    render_parser.add_argument('--golden', help="Expected HTML; the run fails if the output differs")
+
+    analytics_parser = subparsers.add_parser('analytics', help="extract_report_data loop vs columnar AuditTable")
+    analytics_parser.add_argument('source', help="Directory, glob or single merged report")
+    analytics_parser.add_argument('--repeat', type=int, default=3)
+
+    pipeline_parser = subparsers.add_parser(
+        'pipeline', help="Load/extract/render/write latency and peak RSS on synthetic reports by size")
+    pipeline_parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated input sizes")
+    pipeline_parser.add_argument('--seed', type=int, default=0)
+    pipeline_parser.add_argument('--repeat', type=int, default=3)
+    pipeline_parser.add_argument('--stream', action='store_true', help="Stream each input instead of loading it whole")
+    pipeline_parser.add_argument('--offline', action='store_true', help="Render the self-contained variant")
+    pipeline_parser.add_argument('--work-dir', help="Keep the generated inputs and dashboards here")
+    pipeline_parser.add_argument('--json', metavar='PATH', help="Write the results as JSON")
+    pipeline_parser.add_argument('--compare', metavar='PATH', help="Earlier --json output; slower stages fail the run")
+    pipeline_parser.add_argument('--max-slowdown', type=float, default=DEFAULT_MAX_SLOWDOWN)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'stream':
+        result = bench_stream(args.input, repeat=args.repeat)
+        print(json.dumps(result, indent=2))
+        for mode in ('full', 'stream'):
+            stats = result[mode]
+            print(f"{mode:>6}: {stats['seconds'] * 1000:8.1f} ms, peak {stats['peak_bytes'] / 1e6:8.1f} MB")
+        if result['chunk_sweep_failures']:
+            print(f"Error: streaming escaped strings fails at chunk sizes {result['chunk_sweep_failures'][:20]}")
+            return 1
+        if not result['identical']:
+            print("Error: streamed extraction differs from the full load")
+            return 1
+    elif args.command == 'render':
+        result = bench_render(args.input, number=args.number, repeat=args.repeat, golden=args.golden,
+                              offline=args.offline)
+        print(f"render: {result['reports_per_sec']:,.0f} reports/sec ({result['html_bytes']:,} bytes each)")
+        if result.get('matches_golden') is False:
+            print(f"Error: output differs from {args.golden}")
+            return 1
+    elif args.command == 'analytics':
+        _, paths = find_inputs(args.source)
+        result = bench_analytics(paths, repeat=args.repeat)
+        print(f"{result['reports']} reports, {result['rows']:,} audit rows")
+        labels = {'loop': 'extract loop + aggregate', 'build': 'AuditTable build', 'query': 'AuditTable aggregate'}
+        for mode, label in labels.items():
+            seconds = result[mode]['seconds']
+            print(f"{label:>24}: {seconds * 1000:8.1f} ms ({result['reports'] / seconds:,.0f} reports/sec)")
+        if not result['identical']:
+            print("Error: AuditTable aggregates differ from the extract_report_data loop")
+            return 1
+    elif args.command == 'pipeline':
+        sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+        previous = None
+        if args.compare:
+            try:
+                with open(args.compare, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading {args.compare}: {e}")
+                return 2
+            # Timings are only comparable for the same inputs and code paths
+            options = {'seed': args.seed, 'stream': args.stream, 'offline': args.offline}
+            if any(previous.get('options', {}).get(key) != value for key, value in options.items()):
+                print(f"Error: {args.compare} was run with different options ({previous.get('options')})")
+                return 2
+        result = bench_pipeline(sizes, seed=args.seed, repeat=args.repeat, stream=args.stream,
+                                offline=args.offline, work_dir=args.work_dir)
+        print(f"{'size':>8} {'load':>10} {'extract':>10} {'render':>10} {'write':>10} {'reports/s':>10} {'peak RSS':>10}")
+        for row in result['results']:
+            stages = ' '.join(f"{row['stages'][stage]['seconds'] * 1000:8.1f}ms" for stage in PIPELINE_STAGES)
+            rss = f"{row['peak_rss_bytes'] / 1e6:8.1f}MB" if row['peak_rss_bytes'] else f"{'N/A':>10}"
+            print(f"{row['size']:>8} {stages} {row['reports_per_sec']:10.1f} {rss}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+            print(f"Benchmark results saved: {args.json}")
+        if previous is not None:
+            regressions = compare_pipeline(result, previous, max_slowdown=args.max_slowdown)
+            if regressions:
+                print(f"Slower than {args.compare}:")
+                for line in regressions:
+                    print(f"  {line}")
+                return 1
+            print(f"No stage slower than {args.compare} by more than {args.max_slowdown:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,275 @@
+import argparse
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from batch_report import DEFAULT_PATTERN, find_inputs, output_name, output_names
+from generate_report import (EXTRACTOR_VERSION, MIN_PASS_SCORE, decision_score, extract_report_data, get_score_color_text,
+                             load_report)
+from profile_matrix import profile_grid
+from report_assets import OFFLINE_FONT_CSS, STYLESHEET_MARK, inline_stylesheet
+from report_templates import (DEEP_DIVE_CELL, DEEP_DIVE_ROW, INDEX_HEADER, INDEX_PAGE, INDEX_SCRIPT, PROFILE_HEADER,
+                              PROFILE_SECTION)
+
+INDEX_FORMAT = 'lighthouse-report-index'
+INDEX_VERSION = 2
+
+MANIFEST_NAME = 'index.json'
+HTML_NAME = 'index.html'
+SHARD_DIR = 'shards'
+
+# (column, title) in the order rows are embedded in the page; see INDEX_SCRIPT.
+# 'performance' is the category score and equals total_score, the sum of the
+# weighted metric contributions; 'result' is decided like the single dashboard.
+INDEX_COLUMNS = [
+    ('page_url', 'Page'),
+    ('execution_time', 'Generated'),
+    ('performance', 'Performance'),
+    ('accessibility', 'Accessibility'),
+    ('best_practices', 'Best Practices'),
+    ('seo', 'SEO'),
+    ('total_score', 'Total Score'),
+    ('result', 'Result'),
+]
+
+# Classes only ever assembled in INDEX_SCRIPT, which the stylesheet purge cannot see.
+SCRIPT_CLASSES = frozenset(get_score_color_text(score) for score in (0, 50, 90))
+
+
+def shard_key(input_path, root):
+    """
+    Stable per-input key, also the shard file stem, e.g. home__merged-report.
+    """
+    return output_name(input_path, root)[:-len('.html')]
+
+
+def index_row(report_data):
+    """
+    The few fields of extract_report_data() output the index table needs.
+    """
+    scores = report_data['scores']
+    return {
+        'page_url': report_data['page_url'],
+        'execution_time': report_data['execution_time'],
+        'performance': scores['performance'],
+        'accessibility': scores['accessibility'],
+        'best_practices': scores['best_practices'],
+        'seo': scores['seo'],
+        'total_score': report_data['total_score'],
+        'decision_score': decision_score(report_data),
+        # Performance score per throttling profile, for the page x profile grid
+        'profiles': {profile['name']: profile['scores']['performance'] for profile in report_data.get('profiles') or []},
+    }
+
+
+def build_shard(job):
+    """
+    Extracts one report and writes its detail shard.
+    Runs in a worker process; never raises so one bad file cannot stop the update.
+    """
+    input_path, shard_path, stream = job
+    result = {'input': input_path, 'row': None, 'error': None}
+    try:
+        report_data = extract_report_data(load_report(input_path, stream=stream))
+        with open(shard_path, 'w', encoding='utf-8') as f:
+            json.dump(report_data, f, separators=(',', ':'))
+        result['row'] = index_row(report_data)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if manifest.get('format') != INDEX_FORMAT or manifest.get('version') != INDEX_VERSION:
+        # Unknown layout: rebuild everything rather than misread it
+        return {}
+    if manifest.get('extractor_version') != EXTRACTOR_VERSION:
+        # Shards hold extract_report_data() output: an older extractor's are stale
+        return {}
+    return manifest['entries']
+
+
+def write_manifest(entries, output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'format': INDEX_FORMAT, 'version': INDEX_VERSION, 'extractor_version': EXTRACTOR_VERSION,
+                   'entries': entries}, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _remove_shard(shard_dir, key):
+    try:
+        os.remove(os.path.join(shard_dir, key + '.json'))
+    except FileNotFoundError:
+        pass
+
+
+def update_index(inputs, root, output_dir, workers=None, stream=False, prune=True):
+    """
+    Brings the shards and manifest in `output_dir` up to date with `inputs`.
+    Only new or changed inputs (by size and mtime) are extracted again, and
+    all of them after an EXTRACTOR_VERSION change; with `prune`, entries
+    whose input is gone are dropped along with their shard. An input that
+    fails loses its entry and its shard. Raises ValueError when two inputs
+    share a shard key.
+    Returns (entries, stats).
+    """
+    output_names(inputs, root)
+    shard_dir = os.path.join(output_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    entries = load_manifest(output_dir)
+
+    stale = []
+    current_keys = set()
+    for path in inputs:
+        key = shard_key(path, root)
+        current_keys.add(key)
+        st = os.stat(path)
+        entry = entries.get(key)
+        if (entry and entry['source'] == path and entry['size'] == st.st_size and
+                entry['mtime_ns'] == st.st_mtime_ns):
+            continue
+        stale.append((key, path, st))
+
+    jobs = [(path, os.path.join(shard_dir, key + '.json'), stream) for key, path, _ in stale]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        results = [build_shard(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(build_shard, jobs, chunksize=chunksize))
+
+    failed = []
+    for (key, path, st), result in zip(stale, results):
+        if result['error']:
+            failed.append(result)
+            entries.pop(key, None)
+            # Neither a previous version's shard nor a half-written one may outlive the entry
+            _remove_shard(shard_dir, key)
+            continue
+        entries[key] = {'source': path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'row': result['row']}
+
+    removed = 0
+    if prune:
+        for key in [key for key in entries if key not in current_keys]:
+            del entries[key]
+            removed += 1
+            _remove_shard(shard_dir, key)
+
+    write_manifest(entries, output_dir)
+    stats = {
+        'total': len(entries),
+        'updated': len(stale) - len(failed),
+        'unchanged': len(inputs) - len(stale),
+        'removed': removed,
+        'failed': failed,
+    }
+    return entries, stats
+
+
+def profile_grid_html(entries):
+    """
+    Page x profile performance score grid, or "" when no report has profiles.
+    """
+    names, grid = profile_grid([(entry['row']['page_url'], entry['row'].get('profiles')) for entry in entries.values()])
+    if not grid:
+        return ""
+    rows = []
+    for page_url, scores in grid:
+        cells = [('font-medium text-gray-900 break-all', html.escape(page_url))]
+        for score in scores:
+            cells.append(('text-gray-500', 'N/A') if score is None else
+                         (f"{get_score_color_text(score)} font-bold", f"{score:g}"))
+        rows.append(DEEP_DIVE_ROW.render(''.join(DEEP_DIVE_CELL.render(cell_class, value) for cell_class, value in cells)))
+    return PROFILE_SECTION.render(
+        description="Performance score of each page under each throttling profile. A column that is red across "
+                    "pages points at the condition behind a regression.",
+        corner='Page',
+        headers=''.join(PROFILE_HEADER.render(html.escape(name), '') for name in names),
+        rows=''.join(rows),
+    )
+
+
+def generate_index_html(entries, min_pass_score=MIN_PASS_SCORE):
+    """
+    Renders the sortable index page. Rows are embedded as JSON arrays (the
+    key followed by INDEX_COLUMNS); detail stays in the shards.
+    """
+    rows = []
+    pass_count = 0
+    for key, entry in entries.items():
+        row = entry['row']
+        result = 'PASS' if row['decision_score'] >= min_pass_score else 'FAIL'
+        pass_count += result == 'PASS'
+        rows.append([key] + [result if column == 'result' else row[column] for column, _ in INDEX_COLUMNS])
+
+    # "</" would end the <script> element early
+    rows_json = json.dumps(rows, separators=(',', ':')).replace('</', '<\\/')
+    page = INDEX_PAGE.render(
+        head_assets=STYLESHEET_MARK,
+        font_css=OFFLINE_FONT_CSS,
+        report_count=len(rows),
+        pass_count=pass_count,
+        fail_count=len(rows) - pass_count,
+        min_pass_score=min_pass_score,
+        generated=datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
+        headers=''.join(INDEX_HEADER.render(column, title) for column, title in INDEX_COLUMNS),
+        rows_json=rows_json,
+        profile_grid_html=profile_grid_html(entries),
+        index_script=INDEX_SCRIPT,
+    )
+    return inline_stylesheet(page, SCRIPT_CLASSES)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the multi-report index dashboard.")
+    parser.add_argument('source', help="Directory, glob or single merged report")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN,
+                        help="File pattern used when SOURCE is a directory")
+    parser.add_argument('--output-dir', default='dashboards/index',
+                        help="Where index.html, index.json and shards/ are written")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--min-pass-score', type=int, default=MIN_PASS_SCORE)
+    parser.add_argument('--stream', action='store_true', help="Stream each input instead of loading it whole")
+    parser.add_argument('--keep-missing', action='store_true',
+                        help="Keep index entries whose input file no longer matches SOURCE")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root, inputs = find_inputs(args.source, args.pattern)
+
+    start = time.perf_counter()
+    try:
+        entries, stats = update_index(inputs, root, args.output_dir, workers=args.workers,
+                                      stream=args.stream, prune=not args.keep_missing)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    html_path = os.path.join(args.output_dir, HTML_NAME)
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(generate_index_html(entries, min_pass_score=args.min_pass_score))
+    elapsed = time.perf_counter() - start
+
+    print(f"Index of {stats['total']} reports: {stats['updated']} updated, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed ({elapsed:.2f}s)")
+    for failure in stats['failed']:
+        print(f"  failed {failure['input']}: {failure['error']}")
+    print(f"Index written: {html_path}")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
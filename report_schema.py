@@ -0,0 +1,220 @@
+import argparse
+import json
+from datetime import datetime
+
+# Input classes, from best to worst. Only missing-lighthouse cannot be rendered.
+STATUS_OK = 'ok'
+STATUS_PARTIAL = 'partial'
+STATUS_SELENIUM_FAILED = 'selenium-failed'
+STATUS_MISSING_LIGHTHOUSE = 'missing-lighthouse'
+STATUSES = (STATUS_OK, STATUS_PARTIAL, STATUS_SELENIUM_FAILED, STATUS_MISSING_LIGHTHOUSE)
+
+NUMBER = (int, float)
+
+# (dotted path, allowed types, required). A missing or mistyped required path
+# leaves no usable Lighthouse report; any other makes the file partial. A null
+# category score means Lighthouse failed to score it, so it counts as mistyped.
+REPORT_SCHEMA = (
+    ('lighthouse', dict, True),
+    ('lighthouse.categories', dict, True),
+    ('lighthouse.categories.performance', dict, True),
+    ('lighthouse.categories.performance.auditRefs', list, True),
+    ('lighthouse.categories.performance.score', NUMBER, False),
+    ('lighthouse.categories.accessibility.score', NUMBER, False),
+    ('lighthouse.categories.best-practices.score', NUMBER, False),
+    ('lighthouse.categories.seo.score', NUMBER, False),
+    ('lighthouse.audits', dict, True),
+    ('mergedAt', str, False),
+    ('page', str, False),
+    ('selenium', dict, False),
+    ('selenium.status', str, False),
+)
+
+# The tested URL, best first; an older LHR only has it in its audits.
+URL_PATHS = (('lighthouse', 'finalUrl'), ('lighthouse', 'requestedUrl'))
+
+_TYPE_NAMES = {dict: 'object', list: 'array', str: 'string', int: 'number', float: 'number',
+               bool: 'boolean', type(None): 'null'}
+
+
+def _type_name(types):
+    types = types if isinstance(types, tuple) else (types,)
+    return ' or '.join(dict.fromkeys(_TYPE_NAMES.get(t, t.__name__) for t in types))
+
+
+class ReportSchemaError(ValueError):
+    """
+    A merged report with no usable Lighthouse data; `validation` says why.
+    """
+
+    def __init__(self, validation):
+        self.validation = validation
+        super().__init__(describe_validation(validation))
+
+
+class ReportValidator:
+    """
+    Checks the shape of merged reports against a schema compiled once into a
+    tree of (key, path, types, required, children) nodes, so validating a
+    file is a single walk of a few dict lookups whatever its size.
+    """
+
+    def __init__(self, schema):
+        root = {}
+        for path, types, required in schema:
+            node = {'children': root}
+            keys = path.split('.')
+            for depth, key in enumerate(keys):
+                # Intermediate keys must be objects and inherit their leaves' severity
+                node = node['children'].setdefault(key, {
+                    'path': '.'.join(keys[:depth + 1]), 'types': dict, 'required': False, 'children': {}})
+                node['required'] = node['required'] or required
+            node['types'] = types
+        self.nodes = self._freeze(root)
+
+    def _freeze(self, nodes):
+        return tuple((key, node['path'], node['types'], node['required'], self._freeze(node['children']))
+                     for key, node in nodes.items())
+
+    def _walk(self, value, nodes, problems):
+        for key, path, types, required, children in nodes:
+            child = value.get(key, problems)
+            if child is problems:
+                problems.append((path, required, 'missing'))
+            elif not isinstance(child, types):
+                problems.append((path, required, f"expected {_type_name(types)}, got {_type_name(type(child))}"))
+            elif children:
+                self._walk(child, children, problems)
+
+    def problems(self, data):
+        """
+        [(path, required, reason)] for every schema path `data` does not satisfy.
+        """
+        if not isinstance(data, dict):
+            return [('(root)', True, f"expected object, got {_type_name(type(data))}")]
+        problems = []
+        self._walk(data, self.nodes, problems)
+        return problems
+
+
+VALIDATOR = ReportValidator(REPORT_SCHEMA)
+
+
+def report_url(lighthouse):
+    """
+    The LHR's finalUrl, else its requestedUrl, else None.
+    """
+    for _, key in URL_PATHS:
+        url = lighthouse.get(key) if isinstance(lighthouse, dict) else None
+        if isinstance(url, str) and url:
+            return url
+    return None
+
+
+def is_timestamp(value):
+    """
+    True for an ISO 8601 string such as mergedAt or the LHR's fetchTime.
+    """
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return False
+    return True
+
+
+def validate_report(data, validator=VALIDATOR):
+    """
+    Classifies one merged report as ok, partial, selenium-failed or
+    missing-lighthouse and lists the exact paths behind that:
+    {'status', 'rejected', 'missing': [path], 'mistyped': ['path: reason']}.
+    """
+    problems = validator.problems(data)
+    if not any(required for _, required, _ in problems):
+        lighthouse = data['lighthouse']
+        audits = lighthouse['audits']
+        for i, ref in enumerate(lighthouse['categories']['performance']['auditRefs']):
+            if not isinstance(ref, dict) or not isinstance(ref.get('id'), str):
+                problems.append((f"lighthouse.categories.performance.auditRefs.{i}", True, "expected an object with an id"))
+            elif not isinstance(ref.get('weight', 0), NUMBER):
+                problems.append((f"lighthouse.categories.performance.auditRefs.{i}.weight", True,
+                                 f"expected number, got {_type_name(type(ref['weight']))}"))
+            elif (ref.get('weight') or 0) > 0 and not isinstance(audits.get(ref['id']), dict):
+                # A weighted metric without its audit would count as a zero score
+                problems.append((f"lighthouse.audits.{ref['id']}", False, 'missing'))
+        for audit_id, audit in audits.items():
+            if not isinstance(audit, dict):
+                problems.append((f"lighthouse.audits.{audit_id}", False, f"expected object, got {_type_name(type(audit))}"))
+        if report_url(lighthouse) is None:
+            problems.append(('.'.join(URL_PATHS[0]), False, 'missing'))
+        if isinstance(data.get('mergedAt'), str) and not is_timestamp(data['mergedAt']):
+            problems.append(('mergedAt', False, 'expected an ISO 8601 timestamp'))
+
+    if any(required for _, required, _ in problems):
+        status = STATUS_MISSING_LIGHTHOUSE
+    elif (data.get('selenium') or {}).get('status') == 'failed':
+        status = STATUS_SELENIUM_FAILED
+    elif problems:
+        status = STATUS_PARTIAL
+    else:
+        status = STATUS_OK
+    return {
+        'status': status,
+        'rejected': status == STATUS_MISSING_LIGHTHOUSE,
+        'missing': [path for path, _, reason in problems if reason == 'missing'],
+        'mistyped': [f"{path}: {reason}" for path, _, reason in problems if reason != 'missing'],
+    }
+
+
+def describe_validation(validation):
+    """
+    One line for logs, e.g. "missing-lighthouse; missing lighthouse.audits".
+    """
+    parts = [validation['status']]
+    if validation['missing']:
+        parts.append(f"missing {', '.join(validation['missing'])}")
+    if validation['mistyped']:
+        parts.append('; '.join(validation['mistyped']))
+    return '; '.join(parts)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and classify merged reports before rendering them.")
+    parser.add_argument('source', help="Directory, glob or single merged report")
+    parser.add_argument('--pattern', help="File pattern used when SOURCE is a directory")
+    parser.add_argument('--stream', action='store_true', help="Stream each input instead of loading it whole")
+    parser.add_argument('--json', metavar='PATH', help="Write the per-file classification as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    # Imported here: batch_report and generate_report build on this module
+    from batch_report import DEFAULT_PATTERN, find_inputs
+    from generate_report import load_report
+
+    args = parse_args(argv)
+    _, inputs = find_inputs(args.source, args.pattern or DEFAULT_PATTERN)
+    results = []
+    counts = dict.fromkeys(STATUSES, 0)
+    for path in inputs:
+        try:
+            validation = validate_report(load_report(path, stream=args.stream))
+        except (OSError, ValueError) as e:
+            validation = {'status': STATUS_MISSING_LIGHTHOUSE, 'rejected': True, 'missing': [],
+                          'mistyped': [f"(file): {type(e).__name__}: {e}"]}
+        counts[validation['status']] += 1
+        results.append({'input': path, **validation})
+        if validation['status'] != STATUS_OK:
+            print(f"{path}: {describe_validation(validation)}")
+
+    print(', '.join(f"{count} {status}" for status, count in counts.items()) + f" ({len(inputs)} files)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'counts': counts, 'results': results}, f, indent=2)
+        print(f"Validation results saved: {args.json}")
+    return 1 if counts[STATUS_MISSING_LIGHTHOUSE] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,569 @@
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import json
+import os
+import select
+import struct
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from batch_report import DEFAULT_PATTERN, find_inputs
+from generate_report import MIN_PASS_SCORE, extract_report_data, generate_html_report, load_report
+from load_test import LatencyHistogram
+from report_index import generate_index_html, index_row, shard_key
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Quiet period after the last change to a file before it is re-rendered, so a
+# report written in several chunks (or by several shards in a row) renders once
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_CACHE_ENTRIES = 128
+DEFAULT_HTML_CACHE_MB = 256
+
+
+# --- 1. Watching the output directory ---
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# A finished write (close or rename into place) or a removal. IN_MODIFY is left
+# out: it fires per write() and would hand over half-written reports.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """
+    Recursive directory watch over inotify(7), through libc with ctypes.
+    wait() returns the paths that changed, or None when the kernel queue
+    overflowed and the caller must rescan.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, root):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        for directory, _, _ in os.walk(root):
+            self._watch(directory)
+
+    def _watch(self, directory):
+        wd = self._add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        buffer = os.read(self._fd, 64 * 1024)
+        changed = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            name = os.fsdecode(buffer[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b'\0'))
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files can land before the new directory is watched: report them too
+                    for sub, _, files in os.walk(path):
+                        self._watch(sub)
+                        changed.extend(os.path.join(sub, f) for f in files)
+                continue
+            changed.append(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Fallback for platforms or filesystems without inotify: compares
+    (size, mtime) snapshots of the tree every `interval` seconds.
+    """
+
+    name = 'polling'
+
+    def __init__(self, root, interval=DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = [path for path, stat in snapshot.items() if self._snapshot.get(path) != stat]
+        changed.extend(path for path in self._snapshot if path not in snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(root, poll_interval=DEFAULT_POLL_INTERVAL, polling=False):
+    """
+    An InotifyWatcher for `root`, or a PollingWatcher when inotify is
+    unavailable (not Linux, no libc, or out of watches) or `polling` is set.
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {poll_interval:g}s")
+    return PollingWatcher(root, poll_interval)
+
+
+# --- 2. In-memory LRU cache ---
+
+class LRUCache:
+    """
+    Thread-safe LRU mapping bounded by entry count and, optionally, by the
+    total of weigh(value) (e.g. HTML length).
+    """
+
+    def __init__(self, max_entries, max_weight=None, weigh=None):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.weigh = weigh or (lambda value: 0)
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._items:
+                self.weight -= self.weigh(self._items.pop(key))
+            self._items[key] = value
+            self.weight += self.weigh(value)
+            while len(self._items) > self.max_entries or (
+                    self.max_weight is not None and self.weight > self.max_weight and len(self._items) > 1):
+                _, evicted = self._items.popitem(last=False)
+                self.weight -= self.weigh(evicted)
+                self.evicted += 1
+
+    def discard(self, predicate):
+        """
+        Drops every entry whose key matches `predicate`.
+        """
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self.weight -= self.weigh(self._items.pop(key))
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._items), 'weight': self.weight, 'hits': self.hits,
+                    'misses': self.misses, 'evicted': self.evicted}
+
+
+# --- 3. Report service ---
+
+class ReportService:
+    """
+    Keeps the dashboards for every merged report under `root` rendered.
+    Changed files are queued by the watcher and re-rendered by one worker
+    thread after `debounce` seconds without further changes; requests are
+    answered from the LRU caches, rendering on a miss.
+    """
+
+    def __init__(self, root, pattern=DEFAULT_PATTERN, min_pass_score=MIN_PASS_SCORE, offline=False,
+                 stream=False, debounce=DEFAULT_DEBOUNCE, cache_entries=DEFAULT_CACHE_ENTRIES,
+                 html_cache_bytes=DEFAULT_HTML_CACHE_MB * 1024 * 1024, output_dir=None):
+        self.root = root
+        self.pattern = pattern
+        # Events are matched on the file name, against the pattern's last component
+        self.name_pattern = pattern.replace(os.sep, '/').rsplit('/', 1)[-1]
+        self.min_pass_score = min_pass_score
+        self.offline = offline
+        self.stream = stream
+        self.debounce = debounce
+        self.output_dir = output_dir
+        # Both caches are keyed by (path, size, mtime_ns): a rewritten file misses
+        self.data_cache = LRUCache(cache_entries)
+        self.html_cache = LRUCache(cache_entries, html_cache_bytes, weigh=len)
+        self.entries = {}
+        self.renders = 0
+        self.render_errors = 0
+        self.render_latency = LatencyHistogram()
+        self.request_latency = {}
+        self.started = time.time()
+        self.watcher_name = None
+        self._index_html = None
+        # Bumped on every entry change; an index rendered across a bump is not cached
+        self._generation = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopped = False
+
+    def matches(self, path):
+        return fnmatch.fnmatch(os.path.basename(path), self.name_pattern)
+
+    def rescan(self):
+        """
+        Queues every matching file, and every known one that has gone.
+        """
+        _, inputs = find_inputs(self.root, self.pattern)
+        with self._lock:
+            known = {entry['source'] for entry in self.entries.values()}
+        self.schedule(set(inputs) | known, delay=0)
+
+    def schedule(self, paths, delay=None):
+        delay = self.debounce if delay is None else delay
+        due = time.monotonic() + delay
+        with self._wakeup:
+            for path in paths:
+                if self.matches(path):
+                    # Every new event pushes the render back: only the settled file is read
+                    self._pending[path] = due
+            self._wakeup.notify()
+
+    def _source_key(self, path):
+        st = os.stat(path)
+        return (path, st.st_size, st.st_mtime_ns)
+
+    def extract(self, source_key):
+        report_data = self.data_cache.get(source_key)
+        if report_data is None:
+            report_data = extract_report_data(load_report(source_key[0], stream=self.stream))
+            self.data_cache.put(source_key, report_data)
+        return report_data
+
+    def render(self, source_key):
+        page = self.html_cache.get(source_key)
+        if page is None:
+            start = time.perf_counter()
+            page = generate_html_report(self.extract(source_key), min_pass_score=self.min_pass_score,
+                                        offline=self.offline)
+            self.html_cache.put(source_key, page)
+            with self._lock:
+                self.renders += 1
+                self.render_latency.record((time.perf_counter() - start) * 1e6)
+        return page
+
+    def refresh(self, path):
+        """
+        Re-extracts and re-renders one input, or forgets it once deleted.
+        """
+        key = shard_key(path, self.root)
+        try:
+            source_key = self._source_key(path)
+        except FileNotFoundError:
+            with self._lock:
+                if self.entries.pop(key, None):
+                    self._index_html = None
+                    self._generation += 1
+            self.data_cache.discard(lambda cached: cached[0] == path)
+            self.html_cache.discard(lambda cached: cached[0] == path)
+            print(f"Removed {key}")
+            return
+        entry = {'source': path, 'source_key': source_key, 'row': None, 'status': None, 'error': None}
+        try:
+            report_data = self.extract(source_key)
+            page = self.render(source_key)
+            entry['row'] = index_row(report_data)
+            entry['status'] = report_data['validation']['status']
+            if self.output_dir:
+                output_path = os.path.join(self.output_dir, key + '.html')
+                with open(output_path + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(page)
+                os.replace(output_path + '.tmp', output_path)
+        except Exception as e:
+            # A report still being written fails to parse; its next event retries it.
+            # Anything else a bad input raises must not kill the worker thread either.
+            entry['error'] = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self.render_errors += 1
+        # Stale versions of this file can no longer be requested
+        self.data_cache.discard(lambda cached: cached[0] == path and cached != source_key)
+        self.html_cache.discard(lambda cached: cached[0] == path and cached != source_key)
+        with self._lock:
+            self.entries[key] = entry
+            self._index_html = None
+            self._generation += 1
+        print(f"{'Failed' if entry['error'] else 'Rendered'} {key}" + (f": {entry['error']}" if entry['error'] else ''))
+
+    def run_worker(self):
+        """
+        Renders queued inputs once their debounce period has passed.
+        """
+        while True:
+            with self._wakeup:
+                while not self._stopped:
+                    now = time.monotonic()
+                    due = [path for path, at in self._pending.items() if at <= now]
+                    if due:
+                        break
+                    timeout = min(self._pending.values()) - now if self._pending else None
+                    self._wakeup.wait(timeout)
+                if self._stopped:
+                    return
+                for path in due:
+                    del self._pending[path]
+            for path in sorted(due):
+                self.refresh(path)
+
+    def stop(self):
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+
+    # Request handlers: each returns (status, content type, body bytes)
+
+    def index_page(self):
+        with self._lock:
+            page = self._index_html
+            generation = self._generation
+            entries = {key: entry for key, entry in sorted(self.entries.items()) if entry['row']}
+        if page is None:
+            page = generate_index_html(entries, min_pass_score=self.min_pass_score).encode('utf-8')
+            with self._lock:
+                # A refresh during the render made this page stale: serve it, don't keep it
+                if self._generation == generation:
+                    self._index_html = page
+        return 200, 'text/html; charset=utf-8', page
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None or entry['error']:
+            return None
+        return entry
+
+    def _from_source(self, key, respond):
+        """
+        respond(source_key) for a rendered entry; None (404) when the entry or
+        its file is gone, a 500 response when extracting or rendering fails.
+        """
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        try:
+            return respond(entry['source_key'])
+        except FileNotFoundError:
+            # Deleted since the last refresh; the watcher will drop the entry
+            return None
+        except Exception as e:
+            with self._lock:
+                self.render_errors += 1
+            return error_response(e)
+
+    def dashboard(self, key):
+        return self._from_source(key, lambda source_key: (
+            200, 'text/html; charset=utf-8', self.render(source_key).encode('utf-8')))
+
+    def shard(self, key):
+        return self._from_source(key, lambda source_key: (
+            200, 'application/json', json.dumps(self.extract(source_key), separators=(',', ':')).encode('utf-8')))
+
+    def report_list(self):
+        with self._lock:
+            reports = {key: {'source': entry['source'], 'status': entry['status'], 'error': entry['error'],
+                             'dashboard': None if entry['error'] else f"/reports/{key}.html"}
+                       for key, entry in sorted(self.entries.items())}
+        return 200, 'application/json', json.dumps(reports, indent=2).encode('utf-8')
+
+    def record_request(self, route, micros):
+        with self._lock:
+            if route not in self.request_latency:
+                self.request_latency[route] = LatencyHistogram()
+            self.request_latency[route].record(micros)
+
+    def metrics(self):
+        with self._lock:
+            metrics = {
+                'uptime_s': round(time.time() - self.started, 1),
+                'watcher': self.watcher_name,
+                'reports': len(self.entries),
+                'failed': sum(1 for entry in self.entries.values() if entry['error']),
+                'pending': len(self._pending),
+                'renders': self.renders,
+                'render_errors': self.render_errors,
+                'render_ms': self.render_latency.summary(),
+                'requests': {route: {'count': histogram.count, 'latency_ms': histogram.summary()}
+                             for route, histogram in sorted(self.request_latency.items())},
+            }
+        metrics['data_cache'] = self.data_cache.stats()
+        metrics['html_cache'] = self.html_cache.stats()
+        return 200, 'application/json', json.dumps(metrics, indent=2).encode('utf-8')
+
+
+# --- 4. HTTP endpoint ---
+
+def error_response(error):
+    return 500, 'text/plain; charset=utf-8', f"{type(error).__name__}: {error}\n".encode('utf-8')
+
+
+def route_request(service, path):
+    """
+    (route label, response or None for 404) for one request path.
+    """
+    path = unquote(urlsplit(path).path)
+    if path in ('/', '/index.html'):
+        return 'index', service.index_page()
+    if path == '/metrics':
+        return 'metrics', service.metrics()
+    if path == '/reports/':
+        return 'reports', service.report_list()
+    if path == '/healthz':
+        return 'healthz', (200, 'text/plain', b'ok\n')
+    for prefix, suffix, route, handler in (('/reports/', '.html', 'dashboard', service.dashboard),
+                                           ('/shards/', '.json', 'shard', service.shard)):
+        if path.startswith(prefix) and path.endswith(suffix):
+            return route, handler(path[len(prefix):-len(suffix)])
+    return 'not_found', None
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; see load_test._StubHandler
+    disable_nagle_algorithm = True
+    service = None
+
+    def do_GET(self):
+        start = time.perf_counter()
+        try:
+            route, response = route_request(self.service, self.path)
+        except Exception as e:
+            # Answer rather than drop the connection; handlers catch what they expect
+            route, response = 'error', error_response(e)
+        status, content_type, body = response or (404, 'text/plain', b'Not Found\n')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            self.service.record_request(route, (time.perf_counter() - start) * 1e6)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Serves `service` on a background thread; returns (server, base URL).
+    """
+    handler = type('ServiceHandler', (_ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Watch a directory of merged reports and serve their dashboards from memory.")
+    parser.add_argument('source', nargs='?', default='lighthouse', help="Directory to watch (default: lighthouse)")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="Merged report file pattern")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help="Seconds without changes before a file is re-rendered")
+    parser.add_argument('--poll', action='store_true', help="Poll instead of using inotify")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument('--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES,
+                        help="Reports kept extracted and rendered in memory")
+    parser.add_argument('--html-cache-mb', type=int, default=DEFAULT_HTML_CACHE_MB)
+    parser.add_argument('--output-dir', help="Also write each dashboard here as <key>.html when it is rendered")
+    parser.add_argument('--min-pass-score', type=int, default=MIN_PASS_SCORE)
+    parser.add_argument('--offline', action='store_true', help="Render self-contained dashboards")
+    parser.add_argument('--stream', action='store_true', help="Stream each input instead of loading it whole")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.source):
+        print(f"Error: {args.source} is not a directory")
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    service = ReportService(args.source, args.pattern, min_pass_score=args.min_pass_score, offline=args.offline,
+                            stream=args.stream, debounce=args.debounce, cache_entries=args.cache_entries,
+                            html_cache_bytes=args.html_cache_mb * 1024 * 1024, output_dir=args.output_dir)
+    # Watch before the first scan so nothing written in between is missed
+    watcher = open_watcher(args.source, args.poll_interval, polling=args.poll)
+    service.watcher_name = watcher.name
+    service.rescan()
+    server, url = start_server(service, args.host, args.port)
+    print(f"Serving dashboards for {args.source} on {url}/ ({watcher.name}); metrics at {url}/metrics")
+    threading.Thread(target=service.run_worker, daemon=True).start()
+
+    try:
+        while True:
+            changed = watcher.wait(1.0)
+            if changed is None:
+                print("Watch queue overflowed; rescanning")
+                service.rescan()
+            elif changed:
+                service.schedule(changed)
+    except KeyboardInterrupt:
+        print("Stopping")
+    finally:
+        service.stop()
+        server.shutdown()
+        watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,372 @@
+import gzip
+import heapq
+import io
+import json
+import os
+import re
+
+from audit_details import RANKED_ITEMS, RequestTotals, rank_key
+
+
+# Size of each text chunk pulled from the input file while scanning.
+CHUNK_SIZE = 1 << 16
+
+# Number of `details.items` rows kept per audit; the rest are only counted.
+# Audits in audit_details.RANKED_ITEMS keep their top rows instead of the first.
+MAX_ITEMS = 20
+
+# Top-level Lighthouse keys that are never needed for the dashboard.
+# `entities` is kept: it is small and tells resource_usage who is first party.
+SKIPPED_LHR_KEYS = {'i18n', 'fullPageScreenshot', 'stackPacks'}
+
+# Audits whose details are image blobs (or treemaps): only the item count is kept.
+BLOB_AUDITS = {'screenshot-thumbnails', 'final-screenshot', 'full-page-screenshot', 'script-treemap-data'}
+
+# Audit whose rows are also summed into `details.requestTotals` as they stream past.
+TOTALED_AUDIT = 'network-requests'
+
+# Audit id -> the one field its rows past max_items keep. Every row stays, so
+# resource_usage still sees each third-party entity name and no itemCount is set.
+SLIM_TAIL_AUDITS = {'third-party-summary': 'entity'}
+
+_NON_WHITESPACE_RE = re.compile(r'[^ \t\n\r]')
+_STRING_STOP_RE = re.compile(r'["\\]')
+_STRUCTURAL_RE = re.compile(r'["{}\[\]]')
+_SCALAR_END_RE = re.compile(r'[,}\]\s]')
+
+
+class _Scanner:
+    """
+    Minimal pull scanner over a JSON text stream.
+    Values can be skipped without being decoded, so large strings and
+    arrays never have to be held in memory at once.
+    """
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._mark = None  # Start of the value being captured, if any
+
+    def _fill(self):
+        """
+        Reads the next chunk, dropping text that is no longer needed.
+        Returns False at end of input.
+        """
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            return False
+        # _pos may sit past the buffer (an escape split across chunks); keep the overshoot
+        keep = min(self._pos, len(self._buf)) if self._mark is None else self._mark
+        self._buf = self._buf[keep:] + chunk
+        self._pos -= keep
+        if self._mark is not None:
+            self._mark = 0
+        return True
+
+    def _error(self, message):
+        return ValueError(f"{message} near: {self._buf[self._pos:self._pos + 40]!r}")
+
+    def peek(self):
+        """
+        Returns the next non-whitespace character without consuming it ('' at EOF).
+        """
+        while True:
+            match = _NON_WHITESPACE_RE.search(self._buf, self._pos)
+            if match:
+                self._pos = match.start()
+                return self._buf[self._pos]
+            self._pos = len(self._buf)
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"Expected {char!r}")
+        self._pos += 1
+
+    def _skip_string(self):
+        self._pos += 1  # Opening quote
+        while True:
+            match = _STRING_STOP_RE.search(self._buf, self._pos)
+            if not match:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise self._error("Unterminated string")
+                continue
+            if match.group() == '"':
+                self._pos = match.end()
+                return
+            # Backslash: skip the escaped character as well
+            self._pos = match.end() + 1
+            while self._pos > len(self._buf):
+                if not self._fill():
+                    raise self._error("Unterminated string")
+
+    def _skip_container(self):
+        depth = 0
+        while True:
+            match = _STRUCTURAL_RE.search(self._buf, self._pos)
+            if not match:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise self._error("Unterminated container")
+                continue
+            char = match.group()
+            if char == '"':
+                self._pos = match.start()
+                self._skip_string()
+                continue
+            depth += 1 if char in '{[' else -1
+            self._pos = match.end()
+            if depth == 0:
+                return
+
+    def _skip_scalar(self):
+        while True:
+            match = _SCALAR_END_RE.search(self._buf, self._pos)
+            if match:
+                self._pos = match.start()
+                return
+            self._pos = len(self._buf)
+            if not self._fill():
+                return
+
+    def skip_value(self):
+        """
+        Consumes the next value without decoding it.
+        """
+        char = self.peek()
+        if char == '"':
+            self._skip_string()
+        elif char in ('{', '['):
+            self._skip_container()
+        elif char:
+            self._skip_scalar()
+        else:
+            raise self._error("Unexpected end of input")
+
+    def read_value(self):
+        """
+        Consumes and decodes the next value.
+        """
+        self.peek()
+        self._mark = self._pos
+        try:
+            self.skip_value()
+            return json.loads(self._buf[self._mark:self._pos])
+        finally:
+            self._mark = None
+
+    def iter_object(self):
+        """
+        Yields the keys of the object at the cursor.
+        The caller must consume (read or skip) each value before resuming.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("Expected object key")
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise self._error("Expected ',' or '}'")
+
+    def iter_array(self):
+        """
+        Yields once per element of the array at the cursor.
+        The caller must consume each element before resuming.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise self._error("Expected ',' or ']'")
+
+
+def _read_items(scanner, max_items, totals=None, tail_field=None):
+    """
+    Reads a `details.items` array, keeping only the first `max_items` rows.
+    Every row is decoded and added to `totals` when one is given; with a
+    `tail_field`, later rows are kept as well but cut down to that field.
+    Returns (items, total_count).
+    """
+    items = []
+    count = 0
+    for _ in scanner.iter_array():
+        if count < max_items or totals is not None or tail_field:
+            item = scanner.read_value()
+            if totals is not None:
+                totals.add(item)
+            if count < max_items:
+                items.append(item)
+            elif tail_field:
+                items.append({tail_field: item.get(tail_field)} if isinstance(item, dict) else item)
+        else:
+            scanner.skip_value()
+        count += 1
+    return items, count
+
+
+def _read_ranked_items(scanner, max_items, field, totals=None):
+    """
+    Like _read_items, but keeps the `max_items` rows with the largest `field`
+    (largest first) on a bounded heap as the array streams past.
+    """
+    count = 0
+
+    def rows():
+        nonlocal count
+        for _ in scanner.iter_array():
+            count += 1
+            item = scanner.read_value()
+            if totals is not None:
+                totals.add(item)
+            yield item
+
+    items = heapq.nlargest(max_items, rows(), key=rank_key(field))
+    return items, count
+
+
+def _read_details(scanner, max_items, blob, rank_field=None, totals=None, tail_field=None):
+    details = {}
+    for key in scanner.iter_object():
+        if key == 'items' and rank_field and max_items:
+            items, count = _read_ranked_items(scanner, max_items, rank_field, totals)
+            details['items'] = items
+            if count > len(items):
+                details['itemCount'] = count
+        elif key == 'items':
+            items, count = _read_items(scanner, 0 if blob else max_items, totals, tail_field)
+            details['items'] = items
+            if count > len(items):
+                # extract_report_data reports the real row count from here
+                details['itemCount'] = count
+        elif blob and key != 'type':
+            scanner.skip_value()
+        else:
+            details[key] = scanner.read_value()
+    if totals is not None and 'itemCount' in details:
+        # audit_details.resource_usage sums these instead of the rows kept
+        details['requestTotals'] = totals.summary()
+    return details
+
+
+def _read_audits(scanner, max_items):
+    audits = {}
+    for audit_id in scanner.iter_object():
+        if scanner.peek() != '{':
+            audits[audit_id] = scanner.read_value()
+            continue
+        audit = {}
+        for key in scanner.iter_object():
+            if key == 'details' and scanner.peek() == '{':
+                totals = RequestTotals() if audit_id == TOTALED_AUDIT else None
+                audit[key] = _read_details(scanner, max_items, audit_id in BLOB_AUDITS, RANKED_ITEMS.get(audit_id),
+                                           totals, SLIM_TAIL_AUDITS.get(audit_id))
+            else:
+                audit[key] = scanner.read_value()
+        audits[audit_id] = audit
+    return audits
+
+
+def _read_lighthouse(scanner, max_items):
+    lighthouse = {}
+    for key in scanner.iter_object():
+        if key in SKIPPED_LHR_KEYS:
+            scanner.skip_value()
+        elif key == 'audits' and scanner.peek() == '{':
+            lighthouse[key] = _read_audits(scanner, max_items)
+        else:
+            lighthouse[key] = scanner.read_value()
+    return lighthouse
+
+
+def stream_report(fp, max_items=MAX_ITEMS, chunk_size=CHUNK_SIZE):
+    """
+    Reads a merged report from an open text file without loading it whole.
+    Screenshot blobs, i18n strings and the tail of long `details.items`
+    arrays are skipped as they stream past (network-requests rows are summed
+    first), so the returned dict is a slim copy of the report that
+    extract_report_data processes identically.
+    """
+    scanner = _Scanner(fp, chunk_size)
+    if scanner.peek() != '{':
+        # Not an object: nothing to stream, let json decide what it is
+        return scanner.read_value()
+
+    report = {}
+    for key in scanner.iter_object():
+        if key == 'lighthouse' and scanner.peek() == '{':
+            report[key] = _read_lighthouse(scanner, max_items)
+        else:
+            report[key] = scanner.read_value()
+    return report
+
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Encoded variants merge-reports.js may have written instead of the plain file.
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+
+def resolve_report_path(path):
+    """
+    Returns `path`, or its .gz/.zst sibling when only a compressed copy exists.
+    """
+    if os.path.exists(path):
+        return path
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+
+def open_report_text(path):
+    """
+    Opens a merged report as UTF-8 text, decompressing gzip or zstd
+    transparently (detected from the file's magic bytes, not its name).
+    """
+    path = resolve_report_path(path)
+    with open(path, 'rb') as raw:
+        magic = raw.read(4)
+    if magic.startswith(_GZIP_MAGIC):
+        # gzip.open owns its file, so closing the text wrapper closes it too
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if magic == _ZSTD_MAGIC:
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(f"{path} is zstd-compressed; install the 'zstandard' package to read it")
+        raw = open(path, 'rb')
+        try:
+            return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding='utf-8')
+        except BaseException:
+            raw.close()
+            raise
+    return open(path, 'r', encoding='utf-8')
+
+
+def stream_report_file(path, max_items=MAX_ITEMS, chunk_size=CHUNK_SIZE):
+    """
+    Opens `path` (plain, gzip or zstd) and returns stream_report() of its contents.
+    """
+    with open_report_text(path) as f:
+        return stream_report(f, max_items=max_items, chunk_size=chunk_size)
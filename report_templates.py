@@ -0,0 +1,785 @@
+import functools
+import string
+
+
+class CompiledTemplate:
+    """
+    A str.format-style template compiled once into a Python function.
+    The literal markup is parsed a single time and turned into one f-string
+    expression, so rendering costs the same as a hand-written f-string.
+    """
+
+    def __init__(self, source):
+        self.fields = []
+        pieces = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            pieces.append(literal.replace('{', '{{').replace('}', '}}'))
+            if field is None:
+                continue
+            if spec or conversion or not field.isidentifier():
+                raise ValueError(f"Only plain {{name}} fields are supported in templates: {{{field}}}")
+            pieces.append('{' + field + '}')
+            if field not in self.fields:
+                self.fields.append(field)
+
+        # Fields may be passed by keyword or, in hot loops, positionally in field order
+        code = f"def render({', '.join(self.fields)}):\n    return f{''.join(pieces)!r}\n"
+        if not self.fields:
+            code = f"def render():\n    return {''.join(pieces)!r}\n"
+        namespace = {}
+        exec(compile(code, '<report template>', 'exec'), namespace)
+        self.render = namespace['render']
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(source):
+    """
+    Returns the CompiledTemplate for `source`, parsing it only on first use.
+    """
+    return CompiledTemplate(source)
+
+
+# --- Row and section fragments ---
+
+METRIC_ROW = compile_template("""
+        <tr class="hover:bg-gray-50">
+            <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{title}</td>
+            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{display_value}</td>
+            <td class="px-6 py-4 whitespace-nowrap text-sm font-semibold {color_class}">{score}</td>
+            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{weight}%</td>
+            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-700">{contribution}</td>{baseline_cell}
+        </tr>
+        """)
+
+TOTAL_ROW = compile_template("""
+    <tr class="bg-indigo-50 font-bold">
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-indigo-700" colspan="3">FINAL CALCULATED SCORE</td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-indigo-700">{total_weight}%</td>
+        <td class="px-6 py-4 whitespace-nowrap text-lg {perf_color_text}">{perf_score}</td>{total_baseline_cell}
+    </tr>
+    """)
+
+DIAGNOSTIC_ROW = compile_template("""
+            <tr class="hover:bg-gray-50">
+                <td class="px-6 py-4 text-sm font-medium text-gray-800">{title}</td>
+                <td class="px-6 py-4">
+                    <span class="{badge_class}">
+                        {status_label}
+                    </span>
+                </td>
+                <td class="px-6 py-4 text-sm text-gray-600">{details_text}</td>{baseline_cell}
+            </tr>
+            """)
+
+DIAGNOSTICS_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Key Performance Diagnostics</h2>
+            <p class="text-gray-600 mb-4">
+                These audits do not directly contribute to the Performance score but highlight critical opportunities for improvement.
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Diagnostic Audit
+                            </th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Result
+                            </th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Details
+                            </th>{baseline_th}
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">
+                        {rows}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+RUN_STATS_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Multi-Run Statistics</h2>
+            <p class="text-gray-600 mb-4">
+                Aggregated over {runs} Lighthouse runs. The final result uses the median performance score.
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Series</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Median</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">p75</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">p95</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Std Dev</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">95% CI (mean)</th>
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">
+                        {rows}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+PIPELINE_TIMING_ROW = compile_template("""
+                        <tr class="hover:bg-gray-50">
+                            <td class="px-6 py-2 whitespace-nowrap text-sm font-medium text-gray-900" style="padding-left: {indent}rem">{name}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-500">{cat}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{start}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm font-semibold text-gray-900">{duration}</td>
+                            <td class="px-6 py-2 w-1/3">
+                                <div class="relative h-2 bg-gray-100 rounded-full">
+                                    <div class="absolute top-0 h-2 bg-indigo-500 rounded-full" style="left: {left}%; width: {width}%"></div>
+                                </div>
+                            </td>
+                        </tr>""")
+
+PIPELINE_TIMING_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Pipeline Timing</h2>
+            <p class="text-gray-600 mb-4">
+                Where this run's {total} went, from Chrome launch to report generation. The complete trace,
+                including Lighthouse's per-audit measures, opens in chrome://tracing or Perfetto.
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Phase</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Source</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Start</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Duration</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Timeline</th>
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">
+                        {rows}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+BUDGET_ROW = compile_template("""
+                        <tr class="hover:bg-gray-50">
+                            <td class="px-6 py-2 text-sm font-medium text-gray-900 break-all">{label}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{limit}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm font-semibold {actual_class}">{actual}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{over}</td>
+                            <td class="px-6 py-2">
+                                <span class="{badge_class}">{status}</span>
+                            </td>
+                        </tr>""")
+
+BUDGET_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Performance Budgets</h2>
+            <p class="text-gray-600 mb-4">
+                {summary}
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Budget</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Limit</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Actual</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Over By</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Result</th>
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">
+                        {rows}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+TIMELINE_BAR = compile_template("""
+                                <div class="relative h-2 bg-gray-100 rounded-full">
+                                    <div class="absolute top-0 h-2 bg-indigo-500 rounded-full" style="left: {left}%; width: {width}%"></div>
+                                </div>""")
+
+DEEP_DIVE_HEADER = compile_template("""
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">{label}</th>""")
+
+DEEP_DIVE_CELL = compile_template("""
+                            <td class="px-6 py-2 text-sm {cell_class}">{value}</td>""")
+
+DEEP_DIVE_ROW = compile_template("""
+                        <tr class="hover:bg-gray-50">{cells}
+                        </tr>""")
+
+DEEP_DIVE_PANEL = compile_template("""
+            <details class="bg-white rounded-xl shadow-lg overflow-hidden"{open_attr}>
+                <summary class="px-6 py-4 cursor-pointer text-lg font-semibold text-gray-700">
+                    {title} <span class="text-sm font-medium text-gray-500">{summary}</span>
+                </summary>
+                <div class="overflow-x-auto">
+                    <table class="min-w-full divide-y divide-gray-200">
+                        <thead class="bg-indigo-50">
+                            <tr>{headers}
+                            </tr>
+                        </thead>
+                        <tbody class="divide-y divide-gray-100">
+                            {rows}
+                        </tbody>
+                    </table>
+                </div>
+            </details>""")
+
+DEEP_DIVE_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Trace Deep Dive</h2>
+            <p class="text-gray-600 mb-4">
+                The Lighthouse tables behind TBT, LCP and CLS, top {top_k} rows each. Panels for failing audits start expanded.
+            </p>
+            <div class="flex flex-col gap-4">
+                {panels}
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+FLOW_TABLE = compile_template("""
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <h3 class="px-6 py-4 text-lg font-semibold text-gray-700">{title}</h3>
+                <div class="overflow-x-auto">
+                    <table class="min-w-full divide-y divide-gray-200">
+                        <thead class="bg-indigo-50">
+                            <tr>{headers}
+                            </tr>
+                        </thead>
+                        <tbody class="divide-y divide-gray-100">
+                            {rows}
+                        </tbody>
+                    </table>
+                </div>
+            </div>""")
+
+PROFILE_HEADER = compile_template("""
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                {name}<span class="block font-normal normal-case text-gray-400">{settings}</span>
+                            </th>""")
+
+PROFILE_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Throttling Profiles</h2>
+            <p class="text-gray-600 mb-4">
+                {description}
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-x-auto">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">{corner}</th>{headers}
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">
+                        {rows}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+LOAD_ROW = compile_template("""
+                        <tr class="hover:bg-gray-50">
+                            <td class="px-6 py-2 whitespace-nowrap text-sm {name_class}">{name}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{requests}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm {error_class}">{error_rate}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{throughput}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm font-semibold text-gray-900">{p50}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{p90}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{p99}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{p99_9}</td>
+                            <td class="px-6 py-2 whitespace-nowrap text-sm text-gray-700">{max}</td>
+                        </tr>""")
+
+LOAD_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">API Load Test</h2>
+            <p class="text-gray-600 mb-4">
+                {summary}
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Endpoint</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Requests</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Errors</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Throughput</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">p50</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">p90</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">p99</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">p99.9</th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Max</th>
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">
+                        {rows}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+FLOW_SECTION = compile_template("""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-4 border-b pb-2">Interactive Flow Timings</h2>
+            <p class="text-gray-600 mb-4">
+                Field-style timings from the Selenium user flow ({summary}), next to the Lighthouse lab data above.
+                Web Vitals are colored by the good / needs-improvement / poor thresholds.
+            </p>
+            <div class="flex flex-col gap-4">
+                {tables}
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+        """)
+
+VALIDATION_SECTION = compile_template("""
+
+        <section class="mb-8 p-6 bg-amber-100 rounded-xl border-t-4 border-amber-500">
+            <h2 class="text-lg font-bold text-amber-700">Incomplete report: {status}</h2>
+            <p class="text-sm text-gray-700 mt-1">
+                {summary}
+            </p>
+            <p class="text-sm text-gray-700 font-mono break-all mt-2">{paths}</p>
+        </section>""")
+
+WEIGHTING_ITEM = compile_template("""
+        <li class="bg-gray-50 border border-gray-200 rounded-lg p-4 text-center">
+            <strong class="text-2xl font-bold text-indigo-600 block mb-1">{weight}%</strong>
+            <span class="text-gray-700">{title}</span>
+        </li>
+        """)
+
+
+# --- Online assets (Tailwind CDN, Chart.js and Google Fonts) ---
+# generate_html_report(offline=True) swaps these for report_assets.py output.
+
+ONLINE_HEAD_ASSETS = """<script src="https://cdn.tailwindcss.com"></script>
+    <script src="https://cdn.jsdelivr.net/npm/chart.js@3.7.1/dist/chart.min.js"></script>"""
+
+ONLINE_FONT_CSS = """/* Custom font from load_test_report.html */
+        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800&display=swap');
+        body { font-family: 'Inter', sans-serif; }"""
+
+# Chart.js draws into these canvases from CHART_SCRIPT
+ONLINE_CHARTS = {
+    'perf': '<canvas id="perfScoreChart"></canvas>',
+    'a11y': '<canvas id="a11yChart"></canvas>',
+    'bestp': '<canvas id="bestpChart"></canvas>',
+    'seo': '<canvas id="seoChart"></canvas>',
+}
+
+CHART_SCRIPT = compile_template("""<script>
+        // --- Chart Helper Function ---
+        // This function creates the small doughnut charts
+        function createDoughnutChart(chartId, score, scoreColor, cutout = '80%') {{
+            const data = {{
+                datasets: [{{
+                    data: [score, 100 - score],
+                    backgroundColor: [scoreColor, '#e9ecef'], // Use light gray for the remainder
+                    borderWidth: 0,
+                    borderRadius: 5
+                }}]
+            }};
+            const config = {{
+                type: 'doughnut',
+                data: data,
+                options: {{
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    cutout: cutout,
+                    plugins: {{
+                        legend: {{ display: false }},
+                        tooltip: {{ enabled: false }}
+                    }}
+                }}
+            }};
+            // Check if element exists before creating chart
+            const ctx = document.getElementById(chartId);
+            if (ctx) {{
+                new Chart(ctx.getContext('2d'), config);
+            }}
+        }}
+
+        // --- Render Charts ---
+        // Create the main performance chart
+        createDoughnutChart('perfScoreChart', {perf_score}, '{perf_color_hex}', '85%');
+
+        // Create the smaller charts for the "Additional Scores" section
+        createDoughnutChart('a11yChart', {a11y_score}, '{a11y_color_hex}');
+        createDoughnutChart('bestpChart', {bestp_score}, '{bestp_color_hex}');
+        createDoughnutChart('seoChart', {seo_score}, '{seo_color_hex}');
+    </script>""")
+
+
+# --- Full page ---
+# {{...}} escapes literal braces for CSS; {name} is a template field.
+# Styling is based on the provided HTML report samples
+REPORT_PAGE = compile_template("""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Lighthouse Performance Report</title>
+    {head_assets}
+    <style>
+        {font_css}
+
+        /* Styles for the main performance doughnut chart */
+        .chart-container-main {{
+            position: relative;
+            width: 200px;
+            height: 200px;
+        }}
+        .chart-score-main {{
+            position: absolute;
+            top: 50%;
+            left: 50%;
+            transform: translate(-50%, -50%);
+            font-size: 3.75rem; /* 60px */
+            font-weight: 800;
+        }}
+
+        /* Styles for the small doughnut charts */
+        .chart-container-sub {{
+            position: relative;
+            width: 120px; 
+            height: 120px;
+            margin: 0 auto 10px;
+        }}
+        .chart-score-sub {{
+            position: absolute;
+            top: 50%;
+            left: 50%;
+            transform: translate(-50%, -50%);
+            font-size: 1.875rem; /* 30px */
+            font-weight: 700;
+        }}
+        .weighting-list {{
+            list-style: none;
+            padding-left: 0;
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 15px;
+        }}
+    </style>
+</head>
+<body class="bg-gray-100 text-gray-800 p-4 sm:p-8">
+
+    <div class="max-w-7xl mx-auto">
+
+        <header class="mb-8 p-6 bg-white shadow-lg rounded-xl border-t-4 border-indigo-600">
+            <h1 class="text-3xl font-extrabold text-indigo-700">Lighthouse Performance Report</h1>
+            <p class="text-gray-500 mt-1 text-sm">
+                <strong>URL Tested:</strong> <a href="{page_url}" target="_blank" class="text-indigo-500 hover:underline">{page_url}</a> <br>
+                <strong>Generated on:</strong> {execution_time}
+            </p>
+        </header>{validation_html}
+
+        <div class="grid grid-cols-1 mb-10">
+            <div class="bg-white p-6 rounded-xl shadow-md border-b-4 border-indigo-500">
+
+                <div class="grid grid-cols-1 md:grid-cols-2 gap-0 items-center">
+
+                    <!-- Left Side: Doughnut Chart -->
+                    <div class="flex flex-col items-center">
+                        <p class="text-sm text-gray-500 font-semibold uppercase tracking-wider mb-2">Performance Quality Index (PQI)</p>
+                        <div class="chart-container-main">
+                            {perf_chart}
+                            <div class="chart-score-main {perf_color_text}">{perf_score}</div>
+                        </div>
+                    </div>
+
+                    <!-- Right Side: Min Score and Final Result -->
+                    <div class="flex flex-col items-center">
+                        <div class="text-center mb-6">
+                            <p class="text-sm text-gray-500 font-semibold uppercase tracking-wider">Min Score to Pass</p>
+                            <p class="text-4xl font-bold text-gray-700 mt-1">{min_pass_score}</p>
+                        </div>
+                        <div class="text-center">
+                            <p class="text-sm text-gray-500 font-semibold uppercase tracking-wider">Final Result</p>
+                            <p class="text-4xl font-bold {final_result_color} mt-1">{final_result}</p>{final_result_note}
+                        </div>
+                    </div>
+
+                </div>
+            </div>
+        </div>
+
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-6 border-b pb-2">Additional Scores</h2>
+            <div class="grid grid-cols-1 md:grid-cols-3 gap-6">
+
+                <div class="bg-white p-6 rounded-xl shadow-lg text-center border-b-4 {a11y_border}">
+                    <h3 class="text-lg font-semibold text-gray-600 mb-4">Accessibility</h3>
+                    <div class="chart-container-sub">
+                        {a11y_chart}
+                        <div class="chart-score-sub {a11y_color_text}">{a11y_score}</div>
+                    </div>
+                </div>
+
+                <div class="bg-white p-6 rounded-xl shadow-lg text-center border-b-4 {bestp_border}">
+                    <h3 class="text-lg font-semibold text-gray-600 mb-4">Best Practices</h3>
+                    <div class="chart-container-sub">
+                        {bestp_chart}
+                        <div class="chart-score-sub {bestp_color_text}">{bestp_score}</div>
+                    </div>
+                </div>
+
+                <div class="bg-white p-6 rounded-xl shadow-lg text-center border-b-4 {seo_border}">
+                    <h3 class="text-lg font-semibold text-gray-600 mb-4">SEO</h3>
+                    <div class="chart-container-sub">
+                        {seo_chart}
+                        <div class="chart-score-sub {seo_color_text}">{seo_score}</div>
+                    </div>
+                </div>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-6 border-b pb-2">Performance Score Breakdown</h2>
+            <p class="text-gray-600 mb-4">
+                The final performance score is a weighted average of key user-centric metrics. 
+                This table shows how each metric contributed to the final score.
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Metric
+                            </th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Measured Value
+                            </th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Score (0-100)
+                            </th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Weight
+                            </th>
+                            <th scope="col" class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
+                                Score Contribution
+                            </th>{baseline_th}
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">
+                        {metrics_rows_html}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
+        <hr class="my-8 border-gray-200">
+
+        {profiles_html}{flow_html}{load_html}{budget_html}{run_stats_html}{diagnostics_html}{deep_dive_html}{pipeline_timing_html}
+
+        <section>
+            <h2 class="text-2xl font-bold text-gray-700 mb-6 border-b pb-2">Score Weighting Scheme</h2>
+            <p class="text-gray-600 mb-4">This performance score was calculated using the Lighthouse 10 weighting:</p>
+            <ul class="weighting-list">
+                {weighting_html}
+            </ul>
+        </section>
+
+    </div>
+
+    {chart_script}
+
+</body>
+</html>
+    """)
+
+
+# --- Multi-report index (report_index.py) ---
+# Rows are embedded as compact JSON; per-page detail is fetched from shards/<key>.json on click.
+
+INDEX_SCRIPT = r"""
+        const COLUMNS = ['key', 'page_url', 'execution_time', 'performance', 'accessibility',
+                         'best_practices', 'seo', 'total_score', 'result'];
+        const rows = JSON.parse(document.getElementById('index-data').textContent);
+        const tbody = document.getElementById('index-rows');
+        const detail = document.getElementById('detail');
+        let sortColumn = 2, sortDescending = true, filterText = '';
+
+        function escapeHtml(value) {
+            return String(value).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+        }
+
+        function scoreClass(score) {
+            return score >= 90 ? 'text-green-600' : score >= 50 ? 'text-amber-600' : 'text-red-600';
+        }
+
+        function scoreCell(score) {
+            return `<td class="px-4 py-2 text-sm font-semibold ${scoreClass(score)}">${score}</td>`;
+        }
+
+        function renderRows() {
+            const needle = filterText.toLowerCase();
+            const visible = needle ? rows.filter(r => r[1].toLowerCase().includes(needle)) : rows;
+            visible.sort((a, b) => {
+                const x = a[sortColumn], y = b[sortColumn];
+                const order = x < y ? -1 : x > y ? 1 : 0;
+                return sortDescending ? -order : order;
+            });
+            // One innerHTML assignment keeps thousands of rows cheap to draw
+            tbody.innerHTML = visible.map(r => `<tr class="hover:bg-gray-50 cursor-pointer" data-key="${escapeHtml(r[0])}">
+                <td class="px-4 py-2 text-sm font-medium text-gray-900">${escapeHtml(r[1])}</td>
+                <td class="px-4 py-2 text-sm text-gray-600 whitespace-nowrap">${escapeHtml(r[2])}</td>
+                ${scoreCell(r[3])}${scoreCell(r[4])}${scoreCell(r[5])}${scoreCell(r[6])}${scoreCell(r[7])}
+                <td class="px-4 py-2 text-sm font-bold ${r[8] === 'PASS' ? 'text-green-600' : 'text-red-600'}">${r[8]}</td>
+            </tr>`).join('');
+            document.getElementById('shown-count').textContent = visible.length;
+        }
+
+        function renderDetail(data) {
+            const metrics = data.metrics.map(m => `<tr>
+                <td class="px-4 py-2 text-sm text-gray-900">${escapeHtml(m.title)}</td>
+                <td class="px-4 py-2 text-sm text-gray-700">${escapeHtml(m.display_value)}</td>
+                ${scoreCell(Math.round(m.score * 100))}
+                <td class="px-4 py-2 text-sm text-gray-700">${m.weight}%</td>
+            </tr>`).join('');
+            // details_text is already HTML-escaped by extract_report_data
+            const diagnostics = data.diagnostics.map(d => `<tr>
+                <td class="px-4 py-2 text-sm text-gray-900">${escapeHtml(d.title)}</td>
+                ${scoreCell(Math.round(d.score * 100))}
+                <td class="px-4 py-2 text-sm text-gray-600">${d.details_text}</td>
+            </tr>`).join('');
+            detail.innerHTML = `
+                <h2 class="text-2xl font-bold text-gray-700 mb-2">${escapeHtml(data.page_url)}</h2>
+                <p class="text-gray-500 text-sm mb-4">Generated on ${escapeHtml(data.execution_time)}</p>
+                <table class="min-w-full divide-y divide-gray-200 mb-6">
+                    <thead class="bg-indigo-50"><tr>
+                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Metric</th>
+                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Measured Value</th>
+                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Score</th>
+                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Weight</th>
+                    </tr></thead>
+                    <tbody class="divide-y divide-gray-100">${metrics}</tbody>
+                </table>
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50"><tr>
+                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Diagnostic</th>
+                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Score</th>
+                        <th class="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Details</th>
+                    </tr></thead>
+                    <tbody class="divide-y divide-gray-100">${diagnostics || '<tr><td class="px-4 py-2 text-sm text-gray-500">No failing diagnostics</td></tr>'}</tbody>
+                </table>`;
+            detail.classList.remove('hidden');
+            detail.scrollIntoView({behavior: 'smooth'});
+        }
+
+        tbody.addEventListener('click', event => {
+            const row = event.target.closest('tr[data-key]');
+            if (!row) return;
+            detail.innerHTML = '<p class="text-gray-500 text-sm">Loading...</p>';
+            detail.classList.remove('hidden');
+            fetch(`shards/${encodeURIComponent(row.dataset.key)}.json`)
+                .then(response => response.ok ? response.json() : Promise.reject(new Error(response.statusText)))
+                .then(renderDetail)
+                .catch(err => {
+                    detail.innerHTML = `<p class="text-red-600 text-sm">Could not load detail: ${escapeHtml(err.message)}.
+                        Browsers block fetch() from file:// pages; serve this directory over HTTP instead.</p>`;
+                });
+        });
+
+        document.querySelectorAll('th[data-column]').forEach(th => th.addEventListener('click', () => {
+            const column = COLUMNS.indexOf(th.dataset.column);
+            sortDescending = column === sortColumn ? !sortDescending : column >= 3;
+            sortColumn = column;
+            renderRows();
+        }));
+
+        document.getElementById('filter').addEventListener('input', event => {
+            filterText = event.target.value;
+            renderRows();
+        });
+
+        renderRows();
+"""
+
+INDEX_HEADER = compile_template("""
+                            <th scope="col" data-column="{column}" class="px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider cursor-pointer">{title}</th>""")
+
+INDEX_PAGE = compile_template("""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Lighthouse Report Index</title>
+    {head_assets}
+    <style>
+        {font_css}
+    </style>
+</head>
+<body class="bg-gray-100 text-gray-800 p-4 sm:p-8">
+
+    <div class="max-w-7xl mx-auto">
+
+        <header class="mb-8 p-6 bg-white shadow-lg rounded-xl border-t-4 border-indigo-600">
+            <h1 class="text-3xl font-extrabold text-indigo-700">Lighthouse Report Index</h1>
+            <p class="text-gray-500 mt-1 text-sm">
+                <strong>Reports:</strong> {report_count}
+                (<span class="text-green-600 font-semibold">{pass_count} PASS</span>,
+                <span class="text-red-600 font-semibold">{fail_count} FAIL</span>
+                at a minimum performance score of {min_pass_score}) <br>
+                <strong>Generated on:</strong> {generated}
+            </p>
+        </header>
+
+        <section class="mb-12">
+            <div class="flex items-center mb-4">
+                <input id="filter" type="search" placeholder="Filter by URL" class="border border-gray-200 rounded-lg px-3 py-2 text-sm">
+                <span class="text-gray-500 text-sm px-3"><span id="shown-count">{report_count}</span> shown; click a header to sort, a row for detail</span>
+            </div>
+            <div class="bg-white rounded-xl shadow-lg overflow-x-auto">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>{headers}
+                        </tr>
+                    </thead>
+                    <tbody id="index-rows" class="divide-y divide-gray-100"></tbody>
+                </table>
+            </div>
+        </section>
+{profile_grid_html}
+        <section id="detail" class="hidden mb-12 p-6 bg-white shadow-lg rounded-xl overflow-x-auto"></section>
+
+    </div>
+
+    <script type="application/json" id="index-data">{rows_json}</script>
+    <script>{index_script}</script>
+
+</body>
+</html>
+""")
@@ -0,0 +1,110 @@
+import math
+import statistics
+
+# Two-sided 95% Student-t critical values by degrees of freedom (1-30).
+_T_95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+# Category keys in merged reports -> keys used in extract_report_data()['scores'].
+_CATEGORY_KEYS = {
+    'performance': 'performance',
+    'accessibility': 'accessibility',
+    'best-practices': 'best_practices',
+    'seo': 'seo',
+}
+
+
+def percentile(sorted_values, pct):
+    """
+    Linear-interpolated percentile (0-100) of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def describe(values):
+    """
+    Summary statistics for one series of samples. The confidence interval is
+    the 95% Student-t interval of the mean; it collapses to the value itself
+    when there is a single sample.
+    """
+    values = sorted(v for v in values if v is not None)
+    n = len(values)
+    if not n:
+        return None
+    mean = statistics.fmean(values)
+    stddev = statistics.stdev(values) if n > 1 else 0.0
+    if n == 1:
+        t = 0.0
+    elif n - 1 <= len(_T_95):
+        t = _T_95[n - 2]
+    else:
+        t = 1.96  # Normal approximation for large samples
+    margin = t * stddev / math.sqrt(n)
+    return {
+        'n': n,
+        'mean': mean,
+        'median': statistics.median(values),
+        'p75': percentile(values, 75),
+        'p95': percentile(values, 95),
+        'stddev': stddev,
+        'ci_low': mean - margin,
+        'ci_high': mean + margin,
+    }
+
+
+def summarize_runs(runs):
+    """
+    Aggregates several Lighthouse passes of the same page.
+    `runs` are LHR-shaped dicts (full reports or the per-run summaries that
+    merge-reports.js stores under `lighthouseRuns`).
+
+    Returns {'runs': n, 'categories': {key: stats}, 'metrics': [...]} where
+    category stats are on the 0-100 scale and each weighted metric carries
+    stats for its numericValue, score (0-100) and contribution.
+    """
+    categories = {}
+    for lh_key, key in _CATEGORY_KEYS.items():
+        samples = [run.get('categories', {}).get(lh_key, {}).get('score') for run in runs]
+        # Rounded so float noise (0.91 * 100 = 91.00000000000001) cannot flip a threshold
+        stats = describe([round(s * 100, 4) for s in samples if s is not None])
+        if stats:
+            categories[key] = stats
+
+    # Weights and order come from the first pass that has them
+    weighted_refs = []
+    for run in runs:
+        refs = run.get('categories', {}).get('performance', {}).get('auditRefs', [])
+        weighted_refs = [ref for ref in refs if ref.get('weight', 0) > 0]
+        if weighted_refs:
+            break
+
+    metrics = []
+    for ref in weighted_refs:
+        audit_id = ref['id']
+        weight = ref['weight']
+        audits = [run.get('audits', {}).get(audit_id) for run in runs]
+        audits = [audit for audit in audits if audit]
+        if not audits:
+            continue
+        scores = [round((audit.get('score') or 0) * 100, 4) for audit in audits]
+        metrics.append({
+            'id': audit_id,
+            'title': audits[0].get('title', audit_id),
+            'weight': weight,
+            'numeric_unit': audits[0].get('numericUnit'),
+            'numeric_value': describe([audit.get('numericValue') for audit in audits]),
+            'score': describe(scores),
+            'contribution': describe([score * weight / 100 for score in scores]),
+        })
+
+    return {'runs': len(runs), 'categories': categories, 'metrics': metrics}
@@ -0,0 +1,339 @@
+import argparse
+import base64
+import gzip
+import json
+import random
+import re
+from datetime import datetime, timedelta, timezone
+
+# Deterministic merged reports shaped like merge-reports.js output around a
+# Lighthouse 12 LHR, for benchmarks and fixtures that must run offline.
+
+PAGE_URL = 'https://demoapp-ashen.vercel.app/'
+ORIGINS = (PAGE_URL.rstrip('/'), 'https://cdn.jsdelivr.net', 'https://fonts.gstatic.com',
+           'https://www.googletagmanager.com')
+
+# (id, title, weight, unit) for the Lighthouse 12 performance metrics
+METRICS = (
+    ('first-contentful-paint', 'First Contentful Paint', 10, 'millisecond'),
+    ('largest-contentful-paint', 'Largest Contentful Paint', 25, 'millisecond'),
+    ('total-blocking-time', 'Total Blocking Time', 30, 'millisecond'),
+    ('cumulative-layout-shift', 'Cumulative Layout Shift', 25, 'unitless'),
+    ('speed-index', 'Speed Index', 10, 'millisecond'),
+)
+
+# Performance diagnostics in a real report; further ones are numbered synthetic ids.
+# The first few hold the long tables (`items` rows each); the rest a handful of rows.
+DIAGNOSTICS = (
+    'network-requests', 'bootup-time', 'long-tasks', 'unused-javascript', 'uses-long-cache-ttl',
+    'mainthread-work-breakdown', 'render-blocking-resources', 'server-response-time', 'third-party-summary',
+    'resource-summary', 'critical-request-chains', 'largest-contentful-paint-element', 'layout-shifts',
+    'dom-size', 'font-display', 'unused-css-rules', 'uses-text-compression', 'uses-optimized-images',
+    'modern-image-formats', 'uses-responsive-images', 'offscreen-images', 'unminified-javascript',
+    'unminified-css', 'legacy-javascript', 'duplicated-javascript', 'total-byte-weight',
+    'efficient-animated-content', 'redirects', 'uses-rel-preconnect', 'prioritize-lcp-image',
+)
+LONG_TABLES = frozenset(DIAGNOSTICS[:5])
+
+DEFAULT_AUDITS = len(DIAGNOSTICS)
+DEFAULT_ITEMS = 50
+# Fewest rows per long table report_of_size() will fit: more than report_stream
+# keeps (MAX_ITEMS = 20), so every benchmarked size exercises its truncation.
+MIN_SIZED_ITEMS = 30
+# Fewest diagnostics report_of_size() will shrink a small target to: the long tables.
+MIN_SIZED_AUDITS = len(LONG_TABLES)
+DEFAULT_SCREENSHOT_BYTES = 64 * 1024
+DEFAULT_FAILING = 8
+
+MAIN_THREAD_GROUPS = (('scriptEvaluation', 'Script Evaluation'), ('styleLayout', 'Style & Layout'),
+                      ('paintCompositeRender', 'Rendering'), ('parseHTML', 'Parse HTML & CSS'),
+                      ('scriptParseCompile', 'Script Parsing & Compilation'), ('garbageCollection', 'Garbage Collection'),
+                      ('other', 'Other'))
+RESOURCE_TYPES = ('Script', 'Stylesheet', 'Image', 'Font', 'Fetch', 'Other')
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(text):
+    """
+    "100KB" / "1.5MB" / "2048" -> bytes (binary units).
+    """
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?B?)\s*', str(text).upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def format_size(size):
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= _SIZE_UNITS[unit]:
+            return f"{size / _SIZE_UNITS[unit]:.4g}{unit}"
+    return f"{size}B"
+
+
+def _metric_audit(rng, audit_id, title, unit):
+    if unit == 'unitless':
+        value = round(rng.uniform(0, 0.4), 3)
+        display = f"{value:.3f}"
+    else:
+        value = rng.uniform(50, 600) if audit_id == 'total-blocking-time' else rng.uniform(600, 6000)
+        display = f"{value:,.0f} ms" if audit_id == 'total-blocking-time' else f"{value / 1000:.1f} s"
+    return {
+        'id': audit_id, 'title': title,
+        'description': f"{title} marks a point in the page load. [Learn more](https://developer.chrome.com/docs/lighthouse/)",
+        'score': round(rng.random(), 2), 'scoreDisplayMode': 'numeric',
+        'numericValue': value, 'numericUnit': unit, 'displayValue': display,
+    }
+
+
+def _url(rng, index, extension='js'):
+    return f"{rng.choice(ORIGINS)}/assets/chunk-{index:05d}-{rng.getrandbits(32):08x}.{extension}"
+
+
+def _request_items(rng, count):
+    start = 0.0
+    items = [{'url': PAGE_URL, 'resourceType': 'Document', 'mimeType': 'text/html', 'statusCode': 200,
+              'protocol': 'h2', 'transferSize': rng.randint(2000, 20000), 'resourceSize': rng.randint(5000, 60000),
+              'networkRequestTime': 0.0, 'networkEndTime': rng.uniform(80, 600), 'priority': 'VeryHigh',
+              'entity': 'demoapp-ashen.vercel.app'}]
+    for i in range(1, count):
+        resource_type = rng.choice(RESOURCE_TYPES)
+        start += rng.uniform(0, 40)
+        items.append({
+            'url': _url(rng, i, {'Stylesheet': 'css', 'Image': 'webp', 'Font': 'woff2'}.get(resource_type, 'js')),
+            'resourceType': resource_type, 'mimeType': 'application/octet-stream', 'statusCode': 200, 'protocol': 'h2',
+            'transferSize': rng.randint(300, 250000), 'resourceSize': rng.randint(300, 900000),
+            'networkRequestTime': start, 'networkEndTime': start + rng.uniform(5, 900), 'priority': 'Low',
+            'entity': rng.choice(('demoapp-ashen.vercel.app', 'jsDelivr', 'Google Fonts', 'Google Tag Manager')),
+        })
+    return items
+
+
+def _table_items(rng, audit_id, count):
+    """
+    `count` rows in the shape of `audit_id`'s details table.
+    """
+    if audit_id == 'network-requests':
+        return _request_items(rng, count)
+    if audit_id == 'mainthread-work-breakdown':
+        return [{'group': group, 'groupLabel': label, 'duration': rng.uniform(20, 1500)}
+                for group, label in MAIN_THREAD_GROUPS]
+    if audit_id == 'resource-summary':
+        summary = [{'resourceType': key, 'label': key.title(), 'requestCount': rng.randint(1, 40),
+                    'transferSize': rng.randint(1000, 900000)} for key in ('script', 'stylesheet', 'image', 'font', 'document', 'other')]
+        summary.insert(0, {'resourceType': 'total', 'label': 'Total', 'requestCount': sum(r['requestCount'] for r in summary),
+                           'transferSize': sum(r['transferSize'] for r in summary)})
+        return summary
+    if audit_id == 'server-response-time':
+        return [{'url': PAGE_URL, 'responseTime': rng.uniform(80, 900)}]
+    if audit_id == 'long-tasks':
+        return [{'url': _url(rng, i), 'startTime': rng.uniform(0, 8000), 'duration': rng.uniform(50, 600)} for i in range(count)]
+    if audit_id == 'layout-shifts':
+        return [{'node': {'type': 'node', 'nodeLabel': f"Element {i}", 'selector': f"div.section-{i} > img",
+                          'snippet': f'<img src="hero-{i}.png">'},
+                 'score': round(rng.uniform(0, 0.2), 4),
+                 'subItems': {'type': 'subitems', 'items': [{'cause': 'Media element lacking an explicit size'}]}}
+                for i in range(count)]
+    return [{'url': _url(rng, i), 'total': rng.uniform(0, 900), 'scripting': rng.uniform(0, 600),
+             'scriptParseCompile': rng.uniform(0, 80), 'wastedBytes': rng.randint(0, 200000),
+             'totalBytes': rng.randint(1000, 400000), 'wastedMs': rng.uniform(0, 900),
+             'cacheLifetimeMs': rng.choice((0, 3600000, 86400000))} for i in range(count)]
+
+
+def _details(rng, audit_id, items):
+    if audit_id == 'critical-request-chains':
+        chain = {}
+        node = chain
+        start = 1.0
+        for depth in range(min(items, 8) or 1):
+            end = start + rng.uniform(0.05, 0.5)
+            node[f"R{depth}"] = {'request': {'url': _url(rng, depth, 'css'), 'startTime': start, 'endTime': end,
+                                             'transferSize': rng.randint(1000, 60000)}, 'children': {}}
+            node = node[f"R{depth}"]['children']
+            start = end
+        return {'type': 'criticalrequestchain', 'chains': chain,
+                'longestChain': {'duration': (start - 1.0) * 1000, 'length': min(items, 8) or 1,
+                                 'transferSize': rng.randint(10000, 200000)}}
+    if audit_id == 'largest-contentful-paint-element':
+        return {'type': 'list', 'items': [
+            {'type': 'table', 'items': [{'node': {'type': 'node', 'nodeLabel': 'Simple FastAPI UI',
+                                                  'selector': 'body > div#root > h1', 'snippet': '<h1 class="title">'}}]},
+            {'type': 'table', 'items': [{'phase': phase, 'timing': rng.uniform(0, 1500), 'percent': f"{rng.randint(0, 100)}%"}
+                                        for phase in ('TTFB', 'Load Delay', 'Load Time', 'Render Delay')]},
+        ]}
+    row_count = items if audit_id in LONG_TABLES else min(items, 5)
+    return {'type': 'table', 'headings': [{'key': 'url', 'valueType': 'url', 'label': 'URL'}],
+            'items': _table_items(rng, audit_id, row_count)}
+
+
+def _screenshot(rng, size):
+    """
+    A data: URL carrying `size` bytes of base64 noise, as incompressible as a JPEG.
+    """
+    raw = rng.randbytes(size * 3 // 4)
+    return 'data:image/jpeg;base64,' + base64.b64encode(raw).decode('ascii')
+
+
+def generate_report(seed=0, audits=DEFAULT_AUDITS, items=DEFAULT_ITEMS, screenshot_bytes=DEFAULT_SCREENSHOT_BYTES,
+                    failing=DEFAULT_FAILING, page='home'):
+    """
+    A merged report with `audits` performance diagnostics (beyond the five
+    weighted metrics), `items` rows in each long details table, a full-page
+    screenshot of about `screenshot_bytes` (plus a final screenshot and
+    filmstrip a quarter of that size each) and exactly `failing` diagnostics
+    scored below 0.9. The same arguments always give the same report.
+    """
+    if failing > audits:
+        raise ValueError(f"failing ({failing}) cannot exceed audits ({audits})")
+    rng = random.Random(seed)
+    lh_audits = {}
+    refs = []
+    for audit_id, title, weight, unit in METRICS:
+        lh_audits[audit_id] = _metric_audit(rng, audit_id, title, unit)
+        refs.append({'id': audit_id, 'weight': weight, 'group': 'metrics', 'acronym': ''.join(w[0] for w in title.split())})
+
+    diagnostic_ids = list(DIAGNOSTICS[:audits]) + [f"synthetic-diagnostic-{i}" for i in range(audits - len(DIAGNOSTICS))]
+    failing_ids = set(rng.sample(diagnostic_ids, failing))
+    for audit_id in diagnostic_ids:
+        if audit_id in failing_ids:
+            score = round(rng.uniform(0, 0.89), 2)
+        else:
+            # Passing audits, with some informative (unscored) ones like a real report
+            score = rng.choice((1, 1, 0.95, None))
+        audit = {
+            'id': audit_id, 'title': audit_id.replace('-', ' ').capitalize(),
+            'description': "Reduce the cost of this resource. [Learn more](https://developer.chrome.com/docs/lighthouse/)",
+            'score': score, 'scoreDisplayMode': 'informative' if score is None else 'metricSavings',
+            'details': _details(rng, audit_id, items),
+        }
+        if rng.random() < 0.6:
+            audit['displayValue'] = f"Potential savings of {rng.randint(1, 900)} KiB"
+            audit['numericValue'] = rng.uniform(0, 3000)
+            audit['numericUnit'] = 'millisecond'
+        lh_audits[audit_id] = audit
+        refs.append({'id': audit_id, 'weight': 0, 'group': 'diagnostics'})
+
+    # Screenshots dominate real report sizes; they are never rendered
+    lh_audits['final-screenshot'] = {
+        'id': 'final-screenshot', 'title': 'Final Screenshot', 'score': None, 'scoreDisplayMode': 'informative',
+        'details': {'type': 'screenshot', 'timing': 3000, 'timestamp': 1, 'data': _screenshot(rng, screenshot_bytes // 4)}}
+    lh_audits['screenshot-thumbnails'] = {
+        'id': 'screenshot-thumbnails', 'title': 'Screenshot Thumbnails', 'score': None, 'scoreDisplayMode': 'informative',
+        'details': {'type': 'filmstrip', 'scale': 3000, 'items': [
+            {'timing': 300 * (i + 1), 'timestamp': i, 'data': _screenshot(rng, screenshot_bytes // 40)} for i in range(10)]}}
+
+    fetch_time = datetime(2025, 6, 1, 12, tzinfo=timezone.utc) + timedelta(minutes=seed)
+    lhr = {
+        'lighthouseVersion': '12.8.2',
+        'requestedUrl': PAGE_URL,
+        'finalUrl': PAGE_URL,
+        'fetchTime': fetch_time.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        'categories': {
+            'performance': {'id': 'performance', 'title': 'Performance', 'score': round(rng.random(), 2), 'auditRefs': refs},
+            'accessibility': {'id': 'accessibility', 'title': 'Accessibility', 'score': round(rng.uniform(0.6, 1), 2), 'auditRefs': []},
+            'best-practices': {'id': 'best-practices', 'title': 'Best Practices', 'score': round(rng.uniform(0.6, 1), 2), 'auditRefs': []},
+            'seo': {'id': 'seo', 'title': 'SEO', 'score': round(rng.uniform(0.6, 1), 2), 'auditRefs': []},
+        },
+        'audits': lh_audits,
+        'fullPageScreenshot': {'screenshot': {'data': _screenshot(rng, screenshot_bytes), 'width': 412, 'height': 3000},
+                               'nodes': {}},
+        'i18n': {'rendererFormattedStrings': {f"string{i}": f"Formatted renderer string number {i}" for i in range(200)}},
+        'timing': {'total': rng.uniform(5000, 20000)},
+    }
+    merged_at = fetch_time + timedelta(seconds=5)
+    return {
+        'page': page,
+        'mergedAt': merged_at.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        'selenium': {'status': 'success', 'page': page},
+        'lighthouse': lhr,
+    }
+
+
+def dump_report(report):
+    # Indented like merge-reports.js writes it, so parse costs are realistic
+    return json.dumps(report, indent=2)
+
+
+def report_of_size(target_bytes, seed=0, audits=DEFAULT_AUDITS, failing=DEFAULT_FAILING, table_share=0.4):
+    """
+    (report, params) for a report that serializes to about `target_bytes`:
+    `table_share` of it in details rows, the rest in screenshots. Sizes are
+    fitted from two small probe reports, then corrected once. Tables keep at
+    least MIN_SIZED_ITEMS rows, so a small target shrinks the screenshots
+    first, then drops diagnostics (down to MIN_SIZED_AUDITS, with `failing`
+    capped to match) and may still be overshot; params records the `bytes`
+    and `table_share` actually reached next to the generate_report() arguments.
+    """
+    while audits > MIN_SIZED_AUDITS and len(dump_report(generate_report(
+            seed=seed, audits=audits, items=MIN_SIZED_ITEMS, failing=min(failing, audits), screenshot_bytes=0))) > target_bytes:
+        audits -= 1
+    failing = min(failing, audits)
+    probe = dict(seed=seed, audits=audits, failing=failing, screenshot_bytes=0)
+    base = len(dump_report(generate_report(items=10, **probe)))
+    per_item = max((len(dump_report(generate_report(items=110, **probe))) - base) / 100, 1)
+    fixed = base - 10 * per_item
+    items = max(int((target_bytes * table_share - fixed) / per_item), MIN_SIZED_ITEMS)
+    # Full-page screenshot plus the final one and filmstrip at a quarter each
+    screenshot_bytes = max(int((target_bytes - fixed - items * per_item) / 1.5), 0)
+    params = dict(seed=seed, audits=audits, items=items, screenshot_bytes=screenshot_bytes, failing=failing)
+    report = generate_report(**params)
+    error = target_bytes - len(dump_report(report))
+    if abs(error) > target_bytes * 0.02:
+        params['screenshot_bytes'] = max(int(screenshot_bytes + error / 1.5), 0)
+        report = generate_report(**params)
+    size = len(dump_report(report))
+    return report, dict(params, bytes=size, table_share=round(min((fixed + items * per_item) / size, 1), 3))
+
+
+def write_report(report, path):
+    """
+    Writes a report as merge-reports.js would, gzip-compressed for a .gz path.
+    """
+    body = dump_report(report).encode('utf-8')
+    if path.endswith('.gz'):
+        body = gzip.compress(body)
+    with open(path, 'wb') as f:
+        f.write(body)
+    return len(body)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic merged report.")
+    parser.add_argument('output', help="Output path (.json or .json.gz)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--size', help="Target serialized size, e.g. 100KB or 50MB (fits --items and --screenshot)")
+    parser.add_argument('--audits', type=int, default=DEFAULT_AUDITS, help="Performance diagnostic audits")
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEMS, help="Rows in each long details table")
+    parser.add_argument('--screenshot', default=format_size(DEFAULT_SCREENSHOT_BYTES),
+                        help="Full-page screenshot size, e.g. 64KB")
+    parser.add_argument('--failing', type=int, default=DEFAULT_FAILING, help="Diagnostics scored below 0.9")
+    parser.add_argument('--page', default='home')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        if args.size:
+            report, params = report_of_size(parse_size(args.size), seed=args.seed, audits=args.audits,
+                                            failing=args.failing)
+            report['page'] = report['selenium']['page'] = args.page
+        else:
+            params = dict(seed=args.seed, audits=args.audits, items=args.items,
+                          screenshot_bytes=parse_size(args.screenshot), failing=args.failing)
+            report = generate_report(page=args.page, **params)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    size = write_report(report, args.output)
+    print(f"Wrote {args.output}: {size:,} bytes (items={params['items']}, "
+          f"screenshot={format_size(params['screenshot_bytes'])}, audits={params['audits']}, failing={params['failing']})")
+    if args.size and params['bytes'] > parse_size(args.size) * 1.02:
+        print(f"Note: {args.size} is below the smallest report with {MIN_SIZED_AUDITS} diagnostics and "
+              f"{MIN_SIZED_ITEMS} rows per table; "
+              f"it is {format_size(params['bytes'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
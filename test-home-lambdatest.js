@@ -1,39 +1,50 @@
-import { Builder, By, until } from "selenium-webdriver";
-import chrome from "selenium-webdriver/chrome.js";
+import { By, until } from "selenium-webdriver";
+import { buildChromeDriver, isolateBrowserState } from "./chrome-session.js";
+import { spanOrRun } from "./pipeline-trace.js";
+import { createFlowRecorder } from "./flow-metrics.js";
 
+const SELENIUM = { cat: "selenium" };
 
-export async function runHomeTest() {
+export async function runHomeTest({ debuggerAddress, isolate = true, tracer = null } = {}) {
     console.log("🏠 Running Home Selenium Test...");
 
-    const driver = await new Builder()
-        .forBrowser("chrome")
-        .setChromeOptions(new chrome.Options().addArguments("--headless"))
-        .build();
+    // With a debuggerAddress the test attaches to a shared Chrome instead of launching one
+    const driver = await spanOrRun(tracer, "driver session", () => buildChromeDriver({ debuggerAddress }), SELENIUM);
+    // Step durations and in-page timings (Navigation/Paint Timing, LCP/CLS/INP)
+    const flow = createFlowRecorder(driver, { tracer });
+    await flow.install();
 
     try {
        // await driver.get("https://neda-supernormal-domenica.ngrok-free.dev/");
       //  await driver.findElement(By.xpath('button[contains(text(), 'Visit Site']')).click();
       //  await driver.get("https://neda-supernormal-domenica.ngrok-free.dev/");
-           await driver.get("https://demoapp-ashen.vercel.app/");
+           await flow.step("navigate", () => driver.get("https://demoapp-ashen.vercel.app/"));
+           await flow.snapshot("login page");
 
+            await flow.step("fill credentials", async () => {
             // 🔥 Correct selectors based on placeholder
             await driver.findElement(By.css('input[placeholder="Username"]')).sendKeys("admin");
             await driver.findElement(By.css('input[placeholder="Password"]')).sendKeys("password");
+            });
 
+            await flow.step("login redirect", async () => {
             await driver.findElement(By.css('button[type="submit"]')).click();
 
             // Wait for redirect (home page has title "Simple FastAPI UI")
             await driver.wait(until.elementLocated(By.css("h1")), 5000);
+            });
 
             console.log("✅ Login Test Passed");
         // Home page main heading <h1>Simple FastAPI UI</h1>
-        await driver.wait(until.elementLocated(By.xpath("//h1[contains(text(), 'Simple FastAPI UI')]")), 5000);
+        await flow.step("title visible", () =>
+            driver.wait(until.elementLocated(By.xpath("//h1[contains(text(), 'Simple FastAPI UI')]")), 5000));
 
             console.log("✔ Title found");
 
             // Expected button labels
             const expectedButtons = ["Root", "Hello", "Data", "Compute", "Items"];
 
+            await flow.step("all buttons present", async () => {
             for (let btnText of expectedButtons) {
               const buttonLocator = By.xpath(`//button[text()='${btnText}']`);
 
@@ -45,15 +56,19 @@ export async function runHomeTest() {
 
               console.log(`✔ Button found: ${btnText}`);
             }
+            });
+            await flow.snapshot("home page");
 
         console.log("✅ Home Page Validation Passed");
 
-        return { status: "success", page: "home" };
+        return { status: "success", page: "home", flow: flow.result() };
 
     } catch (error) {
         console.log("❌ Home Test Failed", error);
-        return { status: "failed", error: error.message };
+        return { status: "failed", error: error.message, flow: flow.result() };
     } finally {
+        if (debuggerAddress && isolate) await spanOrRun(tracer, "isolate state", () => isolateBrowserState(driver), SELENIUM);
+        // On an attached session chromedriver leaves the browser itself running
         await driver.quit();
     }
 }
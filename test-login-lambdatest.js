@@ -1,13 +1,18 @@
-import { Builder, By, until } from "selenium-webdriver";
-import chrome from "selenium-webdriver/chrome.js";
+import { By, until } from "selenium-webdriver";
+import { buildChromeDriver, isolateBrowserState } from "./chrome-session.js";
+import { spanOrRun } from "./pipeline-trace.js";
+import { createFlowRecorder } from "./flow-metrics.js";
 
-export async function runLoginTest() {
+const SELENIUM = { cat: "selenium" };
+
+export async function runLoginTest({ debuggerAddress, isolate = true, tracer = null } = {}) {
     console.log("🔐 Running Login Selenium Test...");
 
-    const driver = await new Builder()
-        .forBrowser("chrome")
-        .setChromeOptions(new chrome.Options().addArguments("--headless"))
-        .build();
+    // With a debuggerAddress the test attaches to a shared Chrome instead of launching one
+    const driver = await spanOrRun(tracer, "driver session", () => buildChromeDriver({ debuggerAddress }), SELENIUM);
+    // Step durations and in-page timings (Navigation/Paint Timing, LCP/CLS/INP)
+    const flow = createFlowRecorder(driver, { tracer });
+    await flow.install();
 
     try {
        /* await driver.get("https://neda-supernormal-domenica.ngrok-free.dev/");
@@ -15,24 +20,32 @@ export async function runLoginTest() {
         await driver.get("https://neda-supernormal-domenica.ngrok-free.dev/");*/
 
 
-        await driver.get("https://demoapp-ashen.vercel.app/login");
+        await flow.step("navigate", () => driver.get("https://demoapp-ashen.vercel.app/login"));
+        await flow.snapshot("login page");
 
-        // 🔥 Correct selectors based on placeholder
-        await driver.findElement(By.css('input[placeholder="Username"]')).sendKeys("admin");
-        await driver.findElement(By.css('input[placeholder="Password"]')).sendKeys("password");
+        await flow.step("fill credentials", async () => {
+            // 🔥 Correct selectors based on placeholder
+            await driver.findElement(By.css('input[placeholder="Username"]')).sendKeys("admin");
+            await driver.findElement(By.css('input[placeholder="Password"]')).sendKeys("password");
+        });
 
-        await driver.findElement(By.css('button[type="submit"]')).click();
+        await flow.step("login redirect", async () => {
+            await driver.findElement(By.css('button[type="submit"]')).click();
 
-        // Wait for redirect (home page has title "Simple FastAPI UI")
-        await driver.wait(until.elementLocated(By.css("h1")), 5000);
+            // Wait for redirect (home page has title "Simple FastAPI UI")
+            await driver.wait(until.elementLocated(By.css("h1")), 5000);
+        });
+        await flow.snapshot("after login");
 
         console.log("✅ Login Test Passed");
-        return { status: "success", page: "login" };
+        return { status: "success", page: "login", flow: flow.result() };
 
     } catch (error) {
         console.log("❌ Login Test Failed", error);
-        return { status: "failed", error: error.message };
+        return { status: "failed", error: error.message, flow: flow.result() };
     } finally {
+        if (debuggerAddress && isolate) await spanOrRun(tracer, "isolate state", () => isolateBrowserState(driver), SELENIUM);
+        // On an attached session chromedriver leaves the browser itself running
         await driver.quit();
     }
 }
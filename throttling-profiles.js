@@ -0,0 +1,92 @@
+import fs from "fs";
+import os from "os";
+import * as constants from "lighthouse/core/config/constants.js";
+
+// Devtools throttling applies per request, so like Lighthouse's own presets
+// the request latency and throughput are derived from the simulated values.
+const DEVTOOLS_RTT_FACTOR = 3.75;
+const DEVTOOLS_THROUGHPUT_FACTOR = 0.9;
+
+const FORM_FACTORS = ["mobile", "desktop"];
+// simulate: Lantern, Lighthouse's default; devtools: real throttling; provided: none
+const METHODS = ["simulate", "devtools", "provided"];
+
+// A profiles file (PROFILES_FILE, default profiles.json) adds custom entries
+// or overrides these. Network values are the simulated RTT and throughput.
+export const BUILTIN_PROFILES = {
+    "desktop": { formFactor: "desktop", method: "provided" },
+    // Lighthouse's default mobile preset
+    "mobile-slow-4g": {
+        formFactor: "mobile", method: "simulate",
+        rttMs: 150, throughputKbps: 1638.4, uploadThroughputKbps: 750, cpuSlowdownMultiplier: 4
+    },
+    "cpu-4x": { formFactor: "desktop", method: "devtools", cpuSlowdownMultiplier: 4 }
+};
+
+function validateProfile(name, profile) {
+    if (!FORM_FACTORS.includes(profile.formFactor)) {
+        throw new Error(`Profile "${name}": formFactor must be one of ${FORM_FACTORS.join(", ")}`);
+    }
+    const method = profile.method || "simulate";
+    if (!METHODS.includes(method)) {
+        throw new Error(`Profile "${name}": method must be one of ${METHODS.join(", ")}`);
+    }
+    for (const key of ["rttMs", "throughputKbps", "uploadThroughputKbps", "cpuSlowdownMultiplier"]) {
+        if (profile[key] !== undefined && !(typeof profile[key] === "number" && profile[key] >= 0)) {
+            throw new Error(`Profile "${name}": ${key} must be a non-negative number`);
+        }
+    }
+    // Lantern needs a network to simulate; "provided" or "devtools" run unthrottled
+    if (method === "simulate" && !(profile.rttMs > 0 && profile.throughputKbps > 0)) {
+        throw new Error(`Profile "${name}": simulated throttling needs rttMs and throughputKbps`);
+    }
+}
+
+// "desktop, mobile-slow-4g" -> ["desktop", "mobile-slow-4g"]
+export function parseProfileList(value) {
+    return String(value || "").split(",").map(name => name.trim()).filter(Boolean);
+}
+
+// Resolves profile names to [{ name, ...settings }], failing on unknown names.
+export function loadProfiles(names, file = process.env.PROFILES_FILE || "profiles.json") {
+    const custom = fs.existsSync(file) ? JSON.parse(fs.readFileSync(file, "utf-8")) : {};
+    const available = { ...BUILTIN_PROFILES, ...custom };
+    return names.map(name => {
+        const profile = available[name];
+        if (!profile) {
+            throw new Error(`Unknown throttling profile "${name}" (known: ${Object.keys(available).join(", ")})`);
+        }
+        validateProfile(name, profile);
+        return { name, method: "simulate", ...profile };
+    });
+}
+
+// Lighthouse flags (settings overrides) for one profile.
+export function profileFlags(profile) {
+    const mobile = profile.formFactor === "mobile";
+    const rttMs = profile.rttMs ?? 0;
+    const throughputKbps = profile.throughputKbps ?? 0;
+    return {
+        formFactor: profile.formFactor,
+        screenEmulation: mobile ? constants.screenEmulationMetrics.mobile : constants.screenEmulationMetrics.desktop,
+        emulatedUserAgent: mobile ? constants.userAgents.mobile : constants.userAgents.desktop,
+        throttlingMethod: profile.method,
+        throttling: {
+            rttMs,
+            throughputKbps,
+            requestLatencyMs: rttMs * DEVTOOLS_RTT_FACTOR,
+            downloadThroughputKbps: throughputKbps * DEVTOOLS_THROUGHPUT_FACTOR,
+            uploadThroughputKbps: (profile.uploadThroughputKbps ?? throughputKbps) * DEVTOOLS_THROUGHPUT_FACTOR,
+            cpuSlowdownMultiplier: profile.cpuSlowdownMultiplier ?? 1
+        }
+    };
+}
+
+// How many profiles may run at once. A Lighthouse pass keeps about two cores
+// busy, and contention skews its timings, so this is the cores per Chrome
+// left over after `sharedWith` other concurrent workers.
+export function profileParallelism(profileCount, sharedWith = 1) {
+    const fromEnv = Number(process.env.LH_PROFILE_PARALLEL);
+    const parallel = fromEnv || Math.floor(os.cpus().length / (2 * sharedWith));
+    return Math.max(1, Math.min(parallel, profileCount));
+}
@@ -0,0 +1,290 @@
+import argparse
+import html
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from generate_report import UNKNOWN_TIME, extract_report_data, get_score_color_text, load_report
+
+DEFAULT_DB = 'lighthouse/history.db'
+
+# Category keys as stored in extract_report_data()['scores'], with display titles.
+CATEGORIES = [
+    ('performance', 'Performance'),
+    ('accessibility', 'Accessibility'),
+    ('best_practices', 'Best Practices'),
+    ('seo', 'SEO'),
+]
+
+# Weighted metrics shown in the trend report, in display order.
+TREND_METRICS = [
+    ('largest-contentful-paint', 'LCP'),
+    ('total-blocking-time', 'TBT'),
+    ('cumulative-layout-shift', 'CLS'),
+    ('first-contentful-paint', 'FCP'),
+    ('speed-index', 'SI'),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    page_url TEXT NOT NULL,
+    merged_at TEXT NOT NULL,
+    run_id TEXT NOT NULL DEFAULT '',
+    total_score INTEGER,
+    performance INTEGER,
+    accessibility INTEGER,
+    best_practices INTEGER,
+    seo INTEGER,
+    UNIQUE (page_url, merged_at, run_id)
+);
+CREATE INDEX IF NOT EXISTS runs_page_time ON runs (page_url, merged_at);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_pk INTEGER NOT NULL REFERENCES runs (id),
+    metric_id TEXT NOT NULL,
+    title TEXT,
+    display_value TEXT,
+    numeric_value REAL,
+    score REAL,
+    weight REAL,
+    contribution REAL,
+    PRIMARY KEY (run_pk, metric_id)
+) WITHOUT ROWID;
+"""
+
+
+def open_store(path=DEFAULT_DB):
+    """
+    Opens (and if needed creates) the SQLite trend store.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def record_run(conn, report_data, run_id=''):
+    """
+    Appends one extracted report to the store.
+    Re-recording the same (page, time, run ID) is a no-op, so steps can be retried.
+    Returns True if a new run was stored. Raises ValueError for a report
+    without a run time, which could neither be ordered nor deduplicated.
+    """
+    if report_data['execution_time'] == UNKNOWN_TIME:
+        raise ValueError(f"no run time (mergedAt or lighthouse.fetchTime) for {report_data['page_url']}")
+    scores = report_data['scores']
+    with conn:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO runs (page_url, merged_at, run_id, total_score,"
+            " performance, accessibility, best_practices, seo) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (report_data['page_url'], report_data['execution_time'], run_id or '',
+             report_data['total_score'], scores.get('performance'), scores.get('accessibility'),
+             scores.get('best_practices'), scores.get('seo')))
+        if not cursor.rowcount:
+            return False
+        run_pk = cursor.lastrowid
+        conn.executemany(
+            "INSERT OR REPLACE INTO metrics (run_pk, metric_id, title, display_value, numeric_value,"
+            " score, weight, contribution) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_pk, m.get('id', m['title']), m['title'], m['display_value'], m.get('numeric_value'),
+              m['score'], m['weight'], m['contribution']) for m in report_data['metrics']])
+    return True
+
+
+def list_pages(conn):
+    return [row[0] for row in conn.execute("SELECT DISTINCT page_url FROM runs ORDER BY page_url")]
+
+
+def load_history(conn, page_url, limit=100):
+    """
+    Returns the most recent `limit` runs of one page, oldest first:
+    [{'merged_at', 'run_id', 'scores': {...}, 'metrics': {metric_id: {...}}}, ...]
+    """
+    rows = conn.execute(
+        "SELECT id, merged_at, run_id, performance, accessibility, best_practices, seo FROM runs"
+        " WHERE page_url = ? ORDER BY merged_at DESC LIMIT ?", (page_url, limit)).fetchall()
+    runs = {}
+    for run_pk, merged_at, run_id, *category_scores in reversed(rows):
+        runs[run_pk] = {
+            'merged_at': merged_at,
+            'run_id': run_id,
+            'scores': dict(zip([key for key, _ in CATEGORIES], category_scores)),
+            'metrics': {},
+        }
+    if not runs:
+        return []
+
+    placeholders = ','.join('?' * len(runs))
+    for run_pk, metric_id, display_value, numeric_value, score in conn.execute(
+            f"SELECT run_pk, metric_id, display_value, numeric_value, score FROM metrics"
+            f" WHERE run_pk IN ({placeholders})", list(runs)):
+        runs[run_pk]['metrics'][metric_id] = {
+            'display_value': display_value,
+            'numeric_value': numeric_value,
+            'score': score,
+        }
+    return list(runs.values())
+
+
+def render_sparkline(values, width=220, height=48, color='#4f46e5'):
+    """
+    Returns an inline SVG polyline for a series; None values are left as gaps.
+    """
+    points = [(i, v) for i, v in enumerate(values) if v is not None]
+    if not points:
+        return '<span class="text-gray-400 text-sm">no data</span>'
+    low = min(v for _, v in points)
+    high = max(v for _, v in points)
+    span = (high - low) or 1
+    step = width / max(len(values) - 1, 1)
+    coords = ' '.join(f"{i * step:.1f},{height - 4 - (v - low) / span * (height - 8):.1f}" for i, v in points)
+    last_x, last_y = coords.rsplit(' ', 1)[-1].split(',')
+    return (f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{coords}"/>'
+            f'<circle cx="{last_x}" cy="{last_y}" r="3" fill="{color}"/></svg>')
+
+
+def _series_delta(series):
+    """
+    Change between the first and last recorded values of a series (None if flat or missing).
+    """
+    present = [v for v in series if v is not None]
+    if len(present) < 2 or present[-1] == present[0]:
+        return None
+    return present[-1] - present[0]
+
+
+def _trend_row(label, sparkline, latest, delta, lower_is_better):
+    delta_html = ''
+    if delta is not None:
+        improved = delta < 0 if lower_is_better else delta > 0
+        color = 'text-green-600' if improved else 'text-red-600'
+        delta_html = f'<span class="{color}">{delta:+.4g}</span>'
+    return f"""
+                <tr class="hover:bg-gray-50">
+                    <td class="px-6 py-3 text-sm font-medium text-gray-900">{label}</td>
+                    <td class="px-6 py-3">{sparkline}</td>
+                    <td class="px-6 py-3 text-sm text-gray-700">{latest if latest is not None else 'N/A'}</td>
+                    <td class="px-6 py-3 text-sm">{delta_html}</td>
+                </tr>"""
+
+
+def _page_section(page_url, history):
+    rows = []
+    for key, title in CATEGORIES:
+        series = [run['scores'].get(key) for run in history]
+        rows.append(_trend_row(title, render_sparkline(series), series[-1], _series_delta(series),
+                               lower_is_better=False))
+
+    for metric_id, label in TREND_METRICS:
+        # Plot the raw numeric values; show the latest human-readable display value
+        series = [run['metrics'].get(metric_id, {}).get('numeric_value') for run in history]
+        latest_run = next((run for run in reversed(history) if metric_id in run['metrics']), None)
+        latest = latest_run['metrics'][metric_id]['display_value'] if latest_run else None
+        rows.append(_trend_row(label, render_sparkline(series, color='#f59e0b'), latest,
+                               _series_delta(series), lower_is_better=True))
+
+    latest_perf = history[-1]['scores'].get('performance') or 0
+    safe_url = html.escape(page_url)
+    return f"""
+        <section class="mb-12">
+            <h2 class="text-2xl font-bold text-gray-700 mb-2 border-b pb-2">{safe_url}</h2>
+            <p class="text-gray-500 mb-4 text-sm">
+                {len(history)} runs from {history[0]['merged_at']} to {history[-1]['merged_at']} &middot;
+                latest performance <span class="font-semibold {get_score_color_text(latest_perf)}">{latest_perf}</span>
+            </p>
+            <div class="bg-white rounded-xl shadow-lg overflow-hidden">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-indigo-50">
+                        <tr>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Series</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Trend</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Latest</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Change Over Window</th>
+                        </tr>
+                    </thead>
+                    <tbody class="divide-y divide-gray-100">{''.join(rows)}
+                    </tbody>
+                </table>
+            </div>
+        </section>"""
+
+
+def generate_trend_report(histories):
+    """
+    Builds the multi-run trend dashboard from {page_url: load_history(...)}.
+    """
+    sections = ''.join(_page_section(url, history) for url, history in histories.items() if history)
+    if not sections:
+        sections = '<p class="text-gray-600">No runs recorded yet.</p>'
+    generated = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+    return f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Lighthouse Performance Trends</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800&display=swap');
+        body {{ font-family: 'Inter', sans-serif; }}
+    </style>
+</head>
+<body class="bg-gray-100 text-gray-800 p-4 sm:p-8">
+    <div class="max-w-7xl mx-auto">
+        <header class="mb-8 p-6 bg-white shadow-lg rounded-xl border-t-4 border-indigo-600">
+            <h1 class="text-3xl font-extrabold text-indigo-700">Lighthouse Performance Trends</h1>
+            <p class="text-gray-500 mt-1 text-sm"><strong>Generated on:</strong> {generated}</p>
+        </header>
+        {sections}
+    </div>
+</body>
+</html>
+    """
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record runs into and report from the trend store.")
+    parser.add_argument('--db', default=DEFAULT_DB, help="SQLite trend store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help="Append merged reports to the store")
+    record.add_argument('inputs', nargs='+')
+    record.add_argument('--run-id', default=os.environ.get('RUN_ID', ''))
+
+    report = subparsers.add_parser('report', help="Render the trend dashboard")
+    report.add_argument('--output', default='lighthouse_trend_dashboard.html')
+    report.add_argument('--page', action='append', help="Only these page URLs (repeatable)")
+    report.add_argument('--limit', type=int, default=100, help="Most recent runs per page")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    conn = open_store(args.db)
+    try:
+        if args.command == 'record':
+            for path in args.inputs:
+                try:
+                    stored = record_run(conn, extract_report_data(load_report(path)), run_id=args.run_id)
+                except (OSError, ValueError) as e:
+                    print(f"Skipping {path}: {e}")
+                    continue
+                print(f"{'Recorded' if stored else 'Already recorded'}: {path}")
+        else:
+            pages = args.page or list_pages(conn)
+            histories = {page: load_history(conn, page, limit=args.limit) for page in pages}
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(generate_trend_report(histories))
+            print(f"Successfully generated trend report: {args.output}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())